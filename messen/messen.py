@@ -1,12 +1,13 @@
 import math
 import os
+import time
 import uuid
 from datetime import date, datetime
 from functools import partial
 
 from PyQt5.QtWidgets import QApplication
 from qgis.PyQt import uic
-from qgis.PyQt.QtCore import Qt, QTimer, QVariant
+from qgis.PyQt.QtCore import Qt, QObject, QVariant, pyqtSignal
 from qgis.PyQt.QtGui import QColor, QCursor, QIcon, QKeySequence
 from qgis.PyQt.QtWidgets import (
     QAction,
@@ -46,6 +47,7 @@ from ..utils.functions import (
     setCustomProjectVariable,
     showAndHideWidgets,
 )
+from ..utils.max_numbers import MaxNumberTracker
 from ..utils.toolbar_functions import saveProject
 
 polygonsLayerName = "E_Polygon"
@@ -99,6 +101,7 @@ class MeasurementTab(BASE, WIDGET):
         self.insertAtIndex = -1
         self.coordsTableRowCount = 0
         self.vertices = None
+        self.watchedVertices = None
         self.geometryType = None
         self.verticesCount = 0
 
@@ -602,10 +605,12 @@ class MeasurementTab(BASE, WIDGET):
         return MarkersAndRubberBand(geom)
 
     def createObjectsForTachy2GisWatch(self):
-        self.vertices = self.tachy2GisPlugin.vtk_mouse_interactor_style.vertices
-        self.watch = QTimer(self)
+        # die Vertexliste des 3D-Viewers meldet neue Punkte selbst, statt abgefragt zu werden
+        interactorStyle = self.tachy2GisPlugin.vtk_mouse_interactor_style
+        if not isinstance(interactorStyle.vertices, VertexList):
+            interactorStyle.vertices = VertexList(interactorStyle.vertices)
+        self.vertices = interactorStyle.vertices
         self.verticesCount = 0
-        self.watch.timeout.connect(self.watchevent)
 
     def resetObjectsForTachy2GisWatch(self):
         if self.vertices:
@@ -626,24 +631,46 @@ class MeasurementTab(BASE, WIDGET):
             duration=10,
         )
         QgsMessageLog.logMessage("Tachy2Gis watch started", "T2G Archäologie", Qgis.Info)
-        self.watch.start(150)
+        if self.watchedVertices is not self.vertices:
+            self.disconnectTachyWatch()
+            self.vertices.notifier.verticesAdded.connect(self.watchevent, Qt.QueuedConnection)
+            self.watchedVertices = self.vertices
         self.tachyWatchActive = True
 
+        # bereits vorliegende Punkte übernehmen
+        self.watchevent()
+
     def stopTachyWatch(self):
         if self.tachyWatchActive:
             QgsMessageLog.logMessage("Tachy2Gis watch stopped", "T2G Archäologie", Qgis.Info)
-        self.watch.stop()
-        self.tachyWatchActive = True
+        self.disconnectTachyWatch()
+        self.tachyWatchActive = False
+
+    def disconnectTachyWatch(self):
+        if self.watchedVertices is not None:
+            self.watchedVertices.notifier.verticesAdded.disconnect(self.watchevent)
+            self.watchedVertices = None
 
     def watchevent(self):
-        # Check for new points in 3D viewer
-        pointsInTachy2Gis3D = len(self.vertices)
-        if pointsInTachy2Gis3D > self.verticesCount:
-            self.verticesCount += 1
-            x, y, z = self.vertices[-1][0], self.vertices[-1][1], self.vertices[-1][2]
-            self.addRowToTable(x, y, z)
-            self.markersAndRubberBand.updateVertex(x, y, z)
-            self.beepSound()
+        # Check for new points in 3D viewer, all pending points are added at once
+        pendingSince = self.vertices.notifier.takePending()
+        newVertices = self.vertices[self.verticesCount :]
+        if not newVertices:
+            return
+
+        self.verticesCount += len(newVertices)
+        for vertex in newVertices:
+            self.addRowToTable(vertex[0], vertex[1], vertex[2])
+        self.markersAndRubberBand.addVertices([(vertex[0], vertex[1]) for vertex in newVertices])
+        self.beepSound()
+
+        if pendingSince is not None:
+            latency = (time.perf_counter() - pendingSince) * 1000
+            QgsMessageLog.logMessage(
+                f"{len(newVertices)} Punkt(e) von Tachy2Gis übernommen, Latenz {latency:.1f} ms",
+                "T2G Archäologie",
+                Qgis.Info,
+            )
 
     def addRowToTable(self, x, y, z):
         coordsTable = self.coordsTableWidget
@@ -810,15 +837,13 @@ class MeasurementTab(BASE, WIDGET):
             )
             return feature
         elif self.geometryType == "points":
-            features = []
-            for pt in geom:
-                attr = {uuidFeature: "{" + str(uuid.uuid4()) + "}"}
-                feature = QgsVectorLayerUtils.createFeature(
-                    layer=self.layerToEdit, geometry=QgsGeometry(pt), attributes=attr
-                )
-
-                features.append(feature)
-            return features
+            featuresData = [
+                QgsVectorLayerUtils.QgsFeatureData(QgsGeometry(pt), {uuidFeature: "{" + str(uuid.uuid4()) + "}"})
+                for pt in geom
+            ]
+            return QgsVectorLayerUtils.createFeatures(
+                self.layerToEdit, featuresData, self.layerToEdit.createExpressionContext()
+            )
 
     def openAttributeForm(self, feature):
         if self.cbAttributeFormular.isChecked():
@@ -867,41 +892,51 @@ class MeasurementTab(BASE, WIDGET):
             _, features = self.layerToEdit.dataProvider().addFeatures(features)
 
         if features:
+            # am Provider vorbei geschrieben, die nächsten Nummern nachführen
+            MaxNumberTracker.featuresWritten(self.layerToEdit, features)
             addedFeature = features[0]
-            self.addMeasurementPoints()
+            measurementPointsLayer = self.addMeasurementPoints()
             self.addLastMeasurementsToTable(features)
             self.deleteCurrentDigitizing()
-            iface.mapCanvas().refreshAllLayers()
+
+            # nur die geänderten Layer neu zeichnen
+            for layer in (self.layerToEdit, measurementPointsLayer):
+                if layer:
+                    layer.updateExtents()
+                    layer.triggerRepaint()
             self.tachy2GisPlugin.vtk_mouse_interactor_style.draw()
             self.openAttributeForm(addedFeature)
             self.beepSound()
 
+    ## \brief Write the measured points of the current series to the layer Messpunkte
+    #
+    # All features are created with one expression context and written with a single
+    # addFeatures call, i.e. in one transaction of the provider.
+    #
+    # @returns the layer Messpunkte or None
     def addMeasurementPoints(self):
         measurementPointsLayer = findLayerInProject("Messpunkte")
         if not measurementPointsLayer:
-            return
-        measurementPointsLayer.startEditing()
+            return None
         dateOfMeasurement = str(date.today())
-        features = []
+        featuresData = []
 
-        for i in range(len(self.vertices)):
-            x = self.vertices[i][0]
-            y = self.vertices[i][1]
-            z = self.vertices[i][2]
+        for vertex in self.vertices:
+            x, y, z = vertex[0], vertex[1], vertex[2]
             uuidPoint = "{" + str(uuid.uuid4()) + "}"
             attL = {1: dateOfMeasurement, 4: str(x), 5: str(y), 6: str(z), 8: uuidPoint}
             pt = QgsPoint(float(x), float(y), float(z))
-            features.append(
-                QgsVectorLayerUtils.createFeature(
-                    measurementPointsLayer, QgsGeometry(pt), attL, measurementPointsLayer.createExpressionContext()
-                )
-            )
+            featuresData.append(QgsVectorLayerUtils.QgsFeatureData(QgsGeometry(pt), attL))
 
-        for feat in features:
-            measurementPointsLayer.dataProvider().addFeatures([feat])
-            QgsMessageLog.logMessage(str(x) + "|" + str(y) + "|" + str(z), "Messpunkte", Qgis.Info)
+        features = QgsVectorLayerUtils.createFeatures(
+            measurementPointsLayer, featuresData, measurementPointsLayer.createExpressionContext()
+        )
+        measurementPointsLayer.dataProvider().addFeatures(features)
+        QgsMessageLog.logMessage(
+            "\n".join(f"{vertex[0]}|{vertex[1]}|{vertex[2]}" for vertex in self.vertices), "Messpunkte", Qgis.Info
+        )
 
-        measurementPointsLayer.commitChanges()
+        return measurementPointsLayer
 
     def addLastMeasurementsToTable(self, features):
         for feat in features:
@@ -1008,6 +1043,56 @@ HIGHLIGHTCOLOR = QColor(0, 255, 0)
 RUBBERBANDCOLOR = QColor(255, 0, 0, 50)
 
 
+class VertexNotifier(QObject):
+    verticesAdded = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.pending = False
+        self.pendingSince = None
+
+    def notify(self):
+        # pro Stapel nur ein Signal, die Punkte werden im Empfänger zusammen abgeholt
+        if self.pending:
+            return
+        self.pending = True
+        self.pendingSince = time.perf_counter()
+        self.verticesAdded.emit()
+
+    def takePending(self):
+        pendingSince = self.pendingSince
+        self.pending = False
+        self.pendingSince = None
+        return pendingSince
+
+
+## @brief Vertex list of the Tachy2GIS 3D viewer that signals new vertices
+#
+# Replaces the plain list of vtk_mouse_interactor_style, so new measurements are processed
+# when they arrive instead of polling the list with a timer.
+#
+class VertexList(list):
+    def __init__(self, vertices=()):
+        super().__init__(vertices)
+        self.notifier = VertexNotifier()
+
+    def append(self, vertex):
+        super().append(vertex)
+        self.notifier.notify()
+
+    def extend(self, vertices):
+        super().extend(vertices)
+        self.notifier.notify()
+
+    def insert(self, index, vertex):
+        super().insert(index, vertex)
+        self.notifier.notify()
+
+    def __iadd__(self, vertices):
+        self.extend(vertices)
+        return self
+
+
 class MarkersAndRubberBand(QgsRubberBand):
 
     def __init__(self, geometryType):
@@ -1043,6 +1128,13 @@ class MarkersAndRubberBand(QgsRubberBand):
         self.setMarker(x, y, index, new)
         self.setRubberBandGeometry(x, y, index, new)
 
+    def addVertices(self, coords):
+        for x, y in coords:
+            self.setMarker(x, y)
+        self.points.extend(QgsPointXY(float(x), float(y)) for x, y in coords)
+        self.reset(self.geometryType)
+        self.updateRubberBandGeometry()
+
     def setMarker(self, x, y, index=-1, new=True):
         m = QgsVertexMarker(iface.mapCanvas())
         m.setCenter(QgsPointXY(float(x), float(y)))
@@ -1091,6 +1183,9 @@ class MarkersAndRubberBand(QgsRubberBand):
             else:
                 self.points[index] = point
         self.reset(self.geometryType)
+        self.updateRubberBandGeometry()
+
+    def updateRubberBandGeometry(self):
         if self.geometryType == QgsWkbTypes.PolygonGeometry:
             self.setToGeometry(QgsGeometry.fromPolygonXY([self.points]))
         elif self.geometryType == QgsWkbTypes.LineGeometry:
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 
-import processing
-from qgis.PyQt.QtGui import QFont
+from qgis.PyQt.QtGui import QColor, QFont
 from qgis.core import (
     QgsRasterLayer,
+    QgsVectorLayer,
+    QgsWkbTypes,
     QgsMarkerSymbol,
     QgsPalLayerSettings,
     QgsTextFormat,
@@ -16,7 +17,7 @@ from qgis.core import (
     QgsRuleBasedLabeling,
     Qgis,
 )
-from qgis.gui import QgsMapCanvas, QgsMapToolPan, QgsMapToolZoom, QgsAttributeDialog
+from qgis.gui import QgsMapCanvas, QgsMapToolPan, QgsMapToolZoom, QgsAttributeDialog, QgsRubberBand
 
 from ..publisher import Publisher
 
@@ -46,9 +47,9 @@ class DigitizeCanvas(QgsMapCanvas):
         self.digiLineLayer = None
         self.digiPolygonLayer = None
 
-        self.digiPolygonHoverLayer = None
-        self.digiPointHoverLayer = None
-        self.digiLineHoverLayer = None
+        self.pointHoverRubberBand = None
+        self.lineHoverRubberBand = None
+        self.polygonHoverRubberBand = None
 
         self.featForm = None
 
@@ -56,23 +57,33 @@ class DigitizeCanvas(QgsMapCanvas):
         self.createMapToolZoomIn()
         self.createMapToolZoomOut()
 
+        self.createHoverRubberBands()
+
         self.createConnects()
 
+    ## \brief Create an empty memory layer with fields and geometry type of the source layer
+    #
+    # \param sourceLayer
+    # @returns
+    def createEmptyLayer(self, sourceLayer):
+        layer = QgsVectorLayer(
+            QgsWkbTypes.displayString(sourceLayer.wkbType()),
+            sourceLayer.name(),
+            "memory",
+        )
+        pr = layer.dataProvider()
+        pr.addAttributes(sourceLayer.fields().toList())
+        layer.updateFields()
+
+        return layer
+
     ## \brief Create a point layer from Point-Eingabelayer
     #
     # \param refData
     # @returns
     def createDigiPointLayer(self, refData):
-        refData["pointLayer"].selectAll()
-        self.digiPointLayer = processing.run(
-            "native:saveselectedfeatures",
-            {"INPUT": refData["pointLayer"], "OUTPUT": "memory:"},
-        )["OUTPUT"]
-        refData["pointLayer"].removeSelection()
-
-        # Layer leeren
-        pr = self.digiPointLayer.dataProvider()
-        pr.truncate()
+        # leerer Layer mit dem Schema des Eingabelayers
+        self.digiPointLayer = self.createEmptyLayer(refData["pointLayer"])
 
         # Renderer
         symbol_profile = QgsMarkerSymbol.createSimple(
@@ -147,76 +158,13 @@ class DigitizeCanvas(QgsMapCanvas):
         self.digiPointLayer.setLabeling(QgsRuleBasedLabeling(root))
         self.digiPointLayer.setLabelsEnabled(True)
 
-    ## \brief Create a hover point layer from Point-Eingabelayer
-    #
-    # \param refData
-    # @returns
-    def createDigiPointHoverLayer(self, refData):
-        refData["pointLayer"].selectAll()
-        self.digiPointHoverLayer = processing.run(
-            "native:saveselectedfeatures",
-            {"INPUT": refData["pointLayer"], "OUTPUT": "memory:"},
-        )["OUTPUT"]
-        refData["pointLayer"].removeSelection()
-
-        # Layer leeren
-        pr = self.digiPointHoverLayer.dataProvider()
-        pr.truncate()
-
-        # Renderer
-        symbol_profile = QgsMarkerSymbol.createSimple(
-            {
-                "name": "circle",
-                # "color": "red",
-                "color_border": "yellow",
-                "width_border": "1",
-                "size": "3.0",
-            }
-        )
-
-        symbol_tachy = QgsMarkerSymbol.createSimple(
-            {
-                "name": "circle",
-                # "color": "grey",
-                "color_border": "yellow",
-                "width_border": "1",
-                "size": "3.0",
-            }
-        )
-
-        categorized_renderer = QgsCategorizedSymbolRenderer()
-
-        categorized_renderer.setClassAttribute("geo_quelle")
-
-        field = self.digiPointHoverLayer.fields().lookupField("geo_quelle")
-        unique_values = self.digiPointHoverLayer.uniqueValues(field)
-        # Add a few categories
-        cat1 = QgsRendererCategory("profile_object", symbol_profile, "profile")
-        cat2 = QgsRendererCategory(None, symbol_tachy, "tachy")
-        categorized_renderer.addCategory(cat1)
-        categorized_renderer.addCategory(cat2)
-
-        self.digiPointHoverLayer.setRenderer(categorized_renderer)
-
-        # Projection
-        crs = refData["pointLayer"].sourceCrs()
-        self.digiPointHoverLayer.setCrs(crs)
-
     ## \brief Create a line layer from Line-Eingabelayer
     #
     # \param refData
     # @returns
     def createDigiLineLayer(self, refData):
-        refData["lineLayer"].selectAll()
-        self.digiLineLayer = processing.run(
-            "native:saveselectedfeatures",
-            {"INPUT": refData["lineLayer"], "OUTPUT": "memory:"},
-        )["OUTPUT"]
-        refData["lineLayer"].removeSelection()
-
-        # Layer leeren
-        pr = self.digiLineLayer.dataProvider()
-        pr.truncate()
+        # leerer Layer mit dem Schema des Eingabelayers
+        self.digiLineLayer = self.createEmptyLayer(refData["lineLayer"])
 
         # Renderer
         symbol_profile = QgsLineSymbol.createSimple({"line_style": "solid", "color": "black", "width": "0.8"})
@@ -303,102 +251,13 @@ class DigitizeCanvas(QgsMapCanvas):
         self.digiLineLayer.setLabeling(QgsRuleBasedLabeling(root))
         self.digiLineLayer.setLabelsEnabled(True)
 
-    ## \brief Create a hover line layer from Line-Eingabelayer
-    #
-    # \param refData
-    # @returns
-    def createDigiLineHoverLayer(self, refData):
-        refData["lineLayer"].selectAll()
-        self.digiLineHoverLayer = processing.run(
-            "native:saveselectedfeatures",
-            {"INPUT": refData["lineLayer"], "OUTPUT": "memory:"},
-        )["OUTPUT"]
-        refData["lineLayer"].removeSelection()
-
-        # Layer leeren
-        pr = self.digiLineHoverLayer.dataProvider()
-        pr.truncate()
-
-        # Renderer
-        symbol_profile = QgsLineSymbol.createSimple(
-            {
-                "style": "solid",
-                "color": "255, 255, 0, 50",
-                "width": "2",
-                "cap_style": "round",
-                "join_style": "round",
-            }
-        )
-        symbol_tachy = QgsLineSymbol.createSimple(
-            {
-                "style": "solid",
-                "color": "255, 255, 0, 50",
-                "width": "2",
-                "cap_style": "round",
-                "join_style": "round",
-            }
-        )
-
-        symbol_profile_vertex = QgsMarkerLineSymbolLayer()
-        symbol_profile_vertex.setSubSymbol(
-            QgsMarkerSymbol.createSimple(
-                {
-                    "name": "circle",
-                    # "color": "red",
-                    "color_border": "yellow",
-                    "width_border": "1",
-                    "size": "3.0",
-                }
-            )
-        )
-        symbol_profile_vertex.setPlacements(Qgis.MarkerLinePlacement.Vertex)
-
-        symbol_tachy_vertex = QgsMarkerLineSymbolLayer()
-        symbol_tachy_vertex.setSubSymbol(
-            QgsMarkerSymbol.createSimple(
-                {
-                    "name": "circle",
-                    # "color": "grey",
-                    "color_border": "yellow",
-                    "width_border": "1",
-                    "size": "3.0",
-                }
-            )
-        )
-        symbol_tachy_vertex.setPlacements(Qgis.MarkerLinePlacement.Vertex)
-
-        symbol_profile.appendSymbolLayer(symbol_profile_vertex)
-        symbol_tachy.appendSymbolLayer(symbol_tachy_vertex)
-
-        # Add a few categories
-        categorized_renderer = QgsCategorizedSymbolRenderer()
-        categorized_renderer.setClassAttribute("geo_quelle")
-        cat1 = QgsRendererCategory("profile_object", symbol_profile, "profile")
-        cat2 = QgsRendererCategory(None, symbol_tachy, "tachy")
-        categorized_renderer.addCategory(cat1)
-        categorized_renderer.addCategory(cat2)
-
-        self.digiLineHoverLayer.setRenderer(categorized_renderer)
-
-        crs = refData["lineLayer"].sourceCrs()
-
-        self.digiLineHoverLayer.setCrs(crs)
-
     ## \brief Create a polygon layer from Polygon-Eingabelayer
     #
     # \param refData
     # @returns
     def createDigiPolygonLayer(self, refData):
-        refData["polygonLayer"].selectAll()
-        self.digiPolygonLayer = processing.run(
-            "native:saveselectedfeatures",
-            {"INPUT": refData["polygonLayer"], "OUTPUT": "memory:"},
-        )["OUTPUT"]
-        refData["polygonLayer"].removeSelection()
-
-        # Layer leeren
-        pr = self.digiPolygonLayer.dataProvider()
-        pr.truncate()
+        # leerer Layer mit dem Schema des Eingabelayers
+        self.digiPolygonLayer = self.createEmptyLayer(refData["polygonLayer"])
 
         # Renderer
         symbol_profile = QgsFillSymbol.createSimple(
@@ -485,36 +344,50 @@ class DigitizeCanvas(QgsMapCanvas):
         self.digiPolygonLayer.setLabeling(QgsRuleBasedLabeling(root))
         self.digiPolygonLayer.setLabelsEnabled(True)
 
-    ## \brief Create a hover polygon layer from Polygon-Eingabelayer
+    ## \brief Create the rubber bands for hover highlighting
     #
-    # \param refData
-    # @returns
-
-    def createDigiPolygonHoverLayer(self, refData):
-        refData["polygonLayer"].selectAll()
-        self.digiPolygonHoverLayer = processing.run(
-            "native:saveselectedfeatures",
-            {"INPUT": refData["polygonLayer"], "OUTPUT": "memory:"},
-        )["OUTPUT"]
-        refData["polygonLayer"].removeSelection()
-
-        # Layer leeren
-        pr = self.digiPolygonHoverLayer.dataProvider()
-        pr.truncate()
+    # Hovered features are shown as canvas items, so the hover does not write into layers
+    # and does not trigger a repaint of the map layers.
+    #
+    def createHoverRubberBands(self):
+        # Punkte
+        self.pointHoverRubberBand = QgsRubberBand(self, QgsWkbTypes.PointGeometry)
+        self.pointHoverRubberBand.setIcon(QgsRubberBand.ICON_CIRCLE)
+        self.pointHoverRubberBand.setIconSize(11)
+        self.pointHoverRubberBand.setFillColor(QColor(0, 0, 0, 0))
+        self.pointHoverRubberBand.setStrokeColor(QColor(255, 255, 0))
+        self.pointHoverRubberBand.setWidth(1)
+
+        # Linien
+        symbol_vertex = QgsMarkerLineSymbolLayer()
+        symbol_vertex.setSubSymbol(
+            QgsMarkerSymbol.createSimple(
+                {
+                    "name": "circle",
+                    "color_border": "yellow",
+                    "width_border": "1",
+                    "size": "3.0",
+                }
+            )
+        )
+        symbol_vertex.setPlacements(Qgis.MarkerLinePlacement.Vertex)
 
-        # Renderer
-        symbol_profile = QgsFillSymbol.createSimple(
+        symbol_line = QgsLineSymbol.createSimple(
             {
                 "style": "solid",
                 "color": "255, 255, 0, 50",
-                "outline_style": "solid",
-                "outline_color": "255, 255, 0, 0",
-                "outline_width": "2",
+                "width": "2",
                 "cap_style": "round",
                 "join_style": "round",
             }
         )
-        symbol_tachy = QgsFillSymbol.createSimple(
+        symbol_line.appendSymbolLayer(symbol_vertex.clone())
+
+        self.lineHoverRubberBand = QgsRubberBand(self, QgsWkbTypes.LineGeometry)
+        self.lineHoverRubberBand.setSymbol(symbol_line)
+
+        # Polygone
+        symbol_polygon = QgsFillSymbol.createSimple(
             {
                 "style": "solid",
                 "color": "255, 255, 0, 50",
@@ -525,53 +398,12 @@ class DigitizeCanvas(QgsMapCanvas):
                 "join_style": "round",
             }
         )
+        symbol_polygon.appendSymbolLayer(symbol_vertex.clone())
 
-        symbol_profile_vertex = QgsMarkerLineSymbolLayer()
-        symbol_profile_vertex.setSubSymbol(
-            QgsMarkerSymbol.createSimple(
-                {
-                    "name": "circle",
-                    # "color": "red",
-                    "color_border": "yellow",
-                    "width_border": "1",
-                    "size": "3.0",
-                }
-            )
-        )
-        symbol_profile_vertex.setPlacements(Qgis.MarkerLinePlacement.Vertex)
-
-        symbol_tachy_vertex = QgsMarkerLineSymbolLayer()
-        symbol_tachy_vertex.setSubSymbol(
-            QgsMarkerSymbol.createSimple(
-                {
-                    "name": "circle",
-                    # "color": "grey",
-                    "color_border": "yellow",
-                    "width_border": "1",
-                    "size": "3.0",
-                }
-            )
-        )
-        symbol_tachy_vertex.setPlacements(Qgis.MarkerLinePlacement.Vertex)
-
-        symbol_profile.appendSymbolLayer(symbol_profile_vertex)
-        symbol_tachy.appendSymbolLayer(symbol_tachy_vertex)
-
-        # Add a few categories
-        categorized_renderer = QgsCategorizedSymbolRenderer()
-        categorized_renderer.setClassAttribute("geo_quelle")
-        cat1 = QgsRendererCategory("profile_object", symbol_profile, "profile")
-        cat2 = QgsRendererCategory(None, symbol_tachy, "tachy")
-        categorized_renderer.addCategory(cat1)
-        categorized_renderer.addCategory(cat2)
-
-        self.digiPolygonHoverLayer.setRenderer(categorized_renderer)
+        self.polygonHoverRubberBand = QgsRubberBand(self, QgsWkbTypes.PolygonGeometry)
+        self.polygonHoverRubberBand.setSymbol(symbol_polygon)
 
-        crs = refData["polygonLayer"].sourceCrs()
-
-        self.digiPolygonHoverLayer.setCrs(crs)
-
-    ## \brief Add features to a hover layer
+    ## \brief Highlight features of a digitize layer
     #
     # \param linkObj
     # @returns
@@ -579,50 +411,30 @@ class DigitizeCanvas(QgsMapCanvas):
     def addHoverFeatures(self, linkObj):
         layer = linkObj["layer"]
         features = linkObj["features"]
-        # print([(f.name(), linkObj["features"][0][f.name()]) for f in linkObj["features"][0].fields()])
 
         if layer == self.digiPolygonLayer:
-            self.digiPolygonHoverLayer.startEditing()
-            pr = self.digiPolygonHoverLayer.dataProvider()
-            pr.addFeatures(features)
-            self.digiPolygonHoverLayer.commitChanges()
-
-        if layer == self.digiLineLayer:
-            self.digiLineHoverLayer.startEditing()
-            pr = self.digiLineHoverLayer.dataProvider()
-            pr.addFeatures(features)
-            self.digiLineHoverLayer.commitChanges()
-
-        if layer == self.digiPointLayer:
-            self.digiPointHoverLayer.startEditing()
-            pr = self.digiPointHoverLayer.dataProvider()
-            pr.addFeatures(features)
-            self.digiPointHoverLayer.commitChanges()
-
-        self.refresh()
-
-    ## \brief Remove features from a hover layer
+            rubberBand = self.polygonHoverRubberBand
+        elif layer == self.digiLineLayer:
+            rubberBand = self.lineHoverRubberBand
+        elif layer == self.digiPointLayer:
+            rubberBand = self.pointHoverRubberBand
+        else:
+            return
+
+        for feature in features:
+            rubberBand.addGeometry(feature.geometry(), layer, False)
+        rubberBand.updatePosition()
+        rubberBand.update()
+
+    ## \brief Remove the highlighting
     #
     # \param linkObj
     # @returns
 
     def removeHoverFeatures(self, _):
-        self.digiPolygonHoverLayer.startEditing()
-        pr = self.digiPolygonHoverLayer.dataProvider()
-        pr.truncate()
-        self.digiPolygonHoverLayer.commitChanges()
-
-        self.digiLineHoverLayer.startEditing()
-        pr = self.digiLineHoverLayer.dataProvider()
-        pr.truncate()
-        self.digiLineHoverLayer.commitChanges()
-
-        self.digiPointHoverLayer.startEditing()
-        pr = self.digiPointHoverLayer.dataProvider()
-        pr.truncate()
-        self.digiPointHoverLayer.commitChanges()
-
-        self.refresh()
+        self.polygonHoverRubberBand.reset(QgsWkbTypes.PolygonGeometry)
+        self.lineHoverRubberBand.reset(QgsWkbTypes.LineGeometry)
+        self.pointHoverRubberBand.reset(QgsWkbTypes.PointGeometry)
 
     ## \brief Create settings for label
     #
@@ -817,13 +629,7 @@ class DigitizeCanvas(QgsMapCanvas):
         self.createDigiLineLayer(refData)
         self.createDigiPolygonLayer(refData)
 
-        self.createDigiPointHoverLayer(refData)
-        self.createDigiLineHoverLayer(refData)
-        self.createDigiPolygonHoverLayer(refData)
-
-        listLayers.append(self.digiPointHoverLayer)
-        listLayers.append(self.digiLineHoverLayer)
-        listLayers.append(self.digiPolygonHoverLayer)
+        self.removeHoverFeatures(None)
 
         listLayers.append(self.digiPointLayer)
         listLayers.append(self.digiLineLayer)
@@ -3,11 +3,12 @@
 from PyQt5.QtCore import pyqtSlot
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QWidget, QMainWindow, QAction, QVBoxLayout
-from qgis.core import QgsPointXY
+from qgis.core import QgsFeatureRequest, QgsPointXY
 from qgis.gui import QgsMessageBar
 
 from .digitize_canvas import DigitizeCanvas
 from .digitize_table import DigitizeTable
+from .map_tools import SnappingIndex
 from .maptool_digi_line import MapToolDigiLine
 from .maptool_digi_point import MapToolDigiPoint
 from .maptool_digi_polygon import MapToolDigiPolygon
@@ -94,6 +95,12 @@ class DigitizeDialog(QMainWindow):
             self.canvasDigitize, self.__iface, self.rotationCoords, self.dataStoreDigitize
         )
 
+        # gemeinsamer Fangindex der Digitalisierwerkzeuge
+        self.snappingIndex = SnappingIndex()
+        self.toolDigiPoint.setSnappingIndex(self.snappingIndex)
+        self.toolDigiLine.setSnappingIndex(self.snappingIndex)
+        self.toolDigiPolygon.setSnappingIndex(self.snappingIndex)
+
         # paramsBar
         self.parambar = Parambar(
             self,
@@ -205,18 +212,36 @@ class DigitizeDialog(QMainWindow):
             bufferGeometry, "profile", self.aar_direction, filter_by_profile_nr
         )
 
+    ## \brief Update the snapping index with the vertices of the digitize layers
+    #
+    # Features are not changed in place in the digitize layers, edited features are deleted and
+    # added again. Therefore only the vertices of added or deleted feature ids are updated.
+    #
     @pyqtSlot()
     def collect_points_from_digi_layers(self):
-        list_of_points = [
-            QgsPointXY(point.x(), point.y())
-            for layer in (
-                self.toolDigiPolygon.digiPolygonLayer,
-                self.toolDigiLine.digiLineLayer,
-                self.toolDigiPoint.digiPointLayer,
-            )
-            for feature in layer.getFeatures()
-            for point in feature.geometry().vertices()
-        ]
-        self.toolDigiPolygon.setSnappingPoints(list_of_points)
-        self.toolDigiLine.setSnappingPoints(list_of_points)
-        self.toolDigiPoint.setSnappingPoints(list_of_points)
+        layers = (
+            self.toolDigiPolygon.digiPolygonLayer,
+            self.toolDigiLine.digiLineLayer,
+            self.toolDigiPoint.digiPointLayer,
+        )
+
+        indexKeys = self.snappingIndex.keys()
+        layerKeys = set()
+        newPoints = {}
+
+        for layer in layers:
+            featureIds = layer.allFeatureIds()
+            layerKeys.update((layer.id(), fid) for fid in featureIds)
+
+            newIds = [fid for fid in featureIds if (layer.id(), fid) not in indexKeys]
+            if not newIds:
+                continue
+
+            request = QgsFeatureRequest().setFilterFids(newIds).setNoAttributes()
+            for feature in layer.getFeatures(request):
+                newPoints[(layer.id(), feature.id())] = [
+                    QgsPointXY(point.x(), point.y()) for point in feature.geometry().vertices()
+                ]
+
+        self.snappingIndex.removePoints(indexKeys - layerKeys)
+        self.snappingIndex.addPoints(newPoints)
@@ -10,6 +10,149 @@ from qgis.core import (
 from qgis.gui import QgsMapTool, QgsRubberBand, QgsVertexMarker
 
 
+## @brief Grid index of the snapping vertices
+#
+# The vertices are grouped in square cells, so a nearest vertex query only has to look at
+# the cells within the snapping tolerance. Vertices are added and removed per key
+# (e.g. layer id and feature id), so the index is updated incrementally.
+#
+class SnappingIndex:
+    # Faktor, um den Anzahl oder Ausdehnung der Stützpunkte wachsen dürfen, bevor die Zellgröße neu bestimmt wird
+    rehashFactor = 4
+
+    def __init__(self, cellSize=1.0):
+        self.cellSize = cellSize
+        self.cells = {}
+        self.points = {}
+        self.count = 0
+        self.extent = None
+        # Anzahl und Ausdehnung bei der letzten Bestimmung der Zellgröße
+        self.estimateCount = 0
+        self.estimateSpan = 0.0
+
+    def clear(self):
+        self.cells = {}
+        self.points = {}
+        self.count = 0
+        self.extent = None
+        self.estimateCount = 0
+        self.estimateSpan = 0.0
+
+    def keys(self):
+        return set(self.points)
+
+    ## \brief Add vertices
+    #
+    # The cell size is derived from the extent of the vertices. It is determined again and all
+    # vertices are rehashed when their number or extent has grown by rehashFactor since then.
+    #
+    # \param pointsByKey dict key -> list of QgsPointXY
+    def addPoints(self, pointsByKey):
+        self.removePoints([key for key in pointsByKey if key in self.points])
+
+        if not self.points:
+            self.estimateCount = 0
+            self.estimateSpan = 0.0
+
+        for key, points in pointsByKey.items():
+            entries = [(self._cell(point.x(), point.y()), point) for point in points]
+            for cell, point in entries:
+                self.cells.setdefault(cell, []).append(point)
+                self._extendExtent(point)
+            self.points[key] = entries
+            self.count += len(entries)
+
+        if self.count > self.rehashFactor * self.estimateCount or self._span() > self.rehashFactor * self.estimateSpan:
+            self._rehash()
+
+    def removePoints(self, keys):
+        for key in keys:
+            entries = self.points.pop(key, [])
+            for cell, point in entries:
+                cellPoints = self.cells[cell]
+                cellPoints.remove(point)
+                if not cellPoints:
+                    del self.cells[cell]
+            self.count -= len(entries)
+
+        if not self.points:
+            self.extent = None
+
+    ## \brief Nearest vertex within the tolerance
+    #
+    # @returns QgsPointXY or None
+    def nearest(self, x, y, tolerance):
+        cx, cy = self._cell(x, y)
+        radius = int(tolerance // self.cellSize) + 1
+
+        if (2 * radius + 1) ** 2 > len(self.cells):
+            candidates = self.cells.values()
+        else:
+            candidates = (
+                self.cells[cell]
+                for cell in (
+                    (i, j) for i in range(cx - radius, cx + radius + 1) for j in range(cy - radius, cy + radius + 1)
+                )
+                if cell in self.cells
+            )
+
+        nearestPoint = None
+        nearestDistance = tolerance
+        for cellPoints in candidates:
+            for point in cellPoints:
+                distance = point.distance(x, y)
+                if distance <= nearestDistance:
+                    nearestPoint = point
+                    nearestDistance = distance
+
+        return nearestPoint
+
+    def _cell(self, x, y):
+        return int(x // self.cellSize), int(y // self.cellSize)
+
+    def _extendExtent(self, point):
+        if self.extent is None:
+            self.extent = [point.x(), point.y(), point.x(), point.y()]
+        else:
+            self.extent[0] = min(self.extent[0], point.x())
+            self.extent[1] = min(self.extent[1], point.y())
+            self.extent[2] = max(self.extent[2], point.x())
+            self.extent[3] = max(self.extent[3], point.y())
+
+    def _span(self):
+        if self.extent is None:
+            return 0.0
+        return max(self.extent[2] - self.extent[0], self.extent[3] - self.extent[1])
+
+    ## \brief Determine the cell size from all vertices and rebuild the cells
+    #
+    def _rehash(self):
+        self.cellSize = self._estimateCellSize()
+        self.estimateCount = self.count
+        self.estimateSpan = self._span()
+
+        self.cells = {}
+        for key, entries in self.points.items():
+            entries = [(self._cell(point.x(), point.y()), point) for _, point in entries]
+            for cell, point in entries:
+                self.cells.setdefault(cell, []).append(point)
+            self.points[key] = entries
+
+    def _estimateCellSize(self):
+        if self.count < 2:
+            return self.cellSize
+
+        width = self.extent[2] - self.extent[0]
+        height = self.extent[3] - self.extent[1]
+        # im Mittel wenige Stützpunkte je Zelle
+        if width > 0 and height > 0:
+            return 2 * (width * height / self.count) ** 0.5
+        if width > 0 or height > 0:
+            return 2 * max(width, height) / self.count
+
+        return self.cellSize
+
+
 class PolygonMapTool(QgsMapTool):
     # darf nicht in den Konstruktor:
     finished_geometry = pyqtSignal(QgsGeometry)
@@ -19,7 +162,7 @@ class PolygonMapTool(QgsMapTool):
         super().__init__(self.canvas)
 
         self.markers = []
-        self.list_of_snapping_points = None
+        self.snappingIndex = None
         self.snappingMarker = None
         self.selectingMarker = None
         self.lastMapCoord = None
@@ -327,37 +470,37 @@ class PolygonMapTool(QgsMapTool):
         # draw a temporary point at mouse pointer while moving:
         self.draw_helper_rubbers()
 
-    def setSnappingPoints(self, list_of_points):
-        self.list_of_snapping_points = list_of_points
+    def setSnappingIndex(self, snappingIndex):
+        self.snappingIndex = snappingIndex
 
     def getSnappingPoint(self):
         if self.isSelecting:
             if not self.markers or len(self.markers) < 1:
                 return None
-            points_list = [vertex.center() for vertex in self.markers]
-        else:
-            if not self.list_of_snapping_points or len(self.list_of_snapping_points) < 1:
-                return None
-            points_list = self.list_of_snapping_points
+        elif not self.snappingIndex or not self.snappingIndex.cells:
+            return None
 
         move_point = self.lastMapCoord
         x = move_point.x()
         y = move_point.y()
-        distances = [p.distance(x, y) for p in points_list]
-        index_of_nearest = min(range(len(distances)), key=distances.__getitem__)
 
         # tolerance needs to be recalculated as user can zoom while moving
-        x = int(x)  # must be int for QPoint!
-        y = int(y)
-        pt1 = QPoint(x, y)
-        pt2 = QPoint(x + 20, y)
+        pt1 = QPoint(int(x), int(y))  # must be int for QPoint!
+        pt2 = QPoint(int(x) + 20, int(y))
         layerPt1 = self.toLayerCoordinates(self.canvas.layer(0), pt1)
         layerPt2 = self.toLayerCoordinates(self.canvas.layer(0), pt2)
         tolerance = layerPt2.x() - layerPt1.x()
-        if distances[index_of_nearest] > tolerance:
-            return None
 
-        return points_list[index_of_nearest]
+        if self.isSelecting:
+            points_list = [vertex.center() for vertex in self.markers]
+            distances = [p.distance(x, y) for p in points_list]
+            index_of_nearest = min(range(len(distances)), key=distances.__getitem__)
+            if distances[index_of_nearest] > tolerance:
+                return None
+
+            return points_list[index_of_nearest]
+
+        return self.snappingIndex.nearest(x, y, tolerance)
 
     def resetTempRubber(self):
         self.tempRubberBand.reset(QgsWkbTypes.LineGeometry)
@@ -380,7 +523,7 @@ class MultilineMapTool(QgsMapTool):
 
         self.markers = []
         self.markers2 = []
-        self.list_of_snapping_points = None
+        self.snappingIndex = None
         self.snappingMarker = None
         self.selectingMarker = None
         self.lastMapCoord = None
@@ -733,37 +876,37 @@ class MultilineMapTool(QgsMapTool):
         else:
             self.tempRubberBand.movePoint(movingPoint)
 
-    def setSnappingPoints(self, list_of_points):
-        self.list_of_snapping_points = list_of_points
+    def setSnappingIndex(self, snappingIndex):
+        self.snappingIndex = snappingIndex
 
     def getSnappingPoint(self):
         if self.isSelecting:
             if not self.markers or len(self.markers) < 1:
                 return None
-            points_list = [vertex.center() for vertex in self.markers]
-        else:
-            if not self.list_of_snapping_points or len(self.list_of_snapping_points) < 1:
-                return None
-            points_list = self.list_of_snapping_points
+        elif not self.snappingIndex or not self.snappingIndex.cells:
+            return None
 
         move_point = self.lastMapCoord
         x = move_point.x()
         y = move_point.y()
-        distances = [p.distance(x, y) for p in points_list]
-        index_of_nearest = min(range(len(distances)), key=distances.__getitem__)
 
         # tolerance needs to be recalculated as user can zoom while moving
-        x = int(x)  # must be int for QPoint!
-        y = int(y)
-        pt1 = QPoint(x, y)
-        pt2 = QPoint(x + 20, y)
+        pt1 = QPoint(int(x), int(y))  # must be int for QPoint!
+        pt2 = QPoint(int(x) + 20, int(y))
         layerPt1 = self.toLayerCoordinates(self.canvas.layer(0), pt1)
         layerPt2 = self.toLayerCoordinates(self.canvas.layer(0), pt2)
         tolerance = layerPt2.x() - layerPt1.x()
-        if distances[index_of_nearest] > tolerance:
-            return None
 
-        return points_list[index_of_nearest]
+        if self.isSelecting:
+            points_list = [vertex.center() for vertex in self.markers]
+            distances = [p.distance(x, y) for p in points_list]
+            index_of_nearest = min(range(len(distances)), key=distances.__getitem__)
+            if distances[index_of_nearest] > tolerance:
+                return None
+
+            return points_list[index_of_nearest]
+
+        return self.snappingIndex.nearest(x, y, tolerance)
 
     def resetTempRubber(self):
         self.tempRubberBand.reset(QgsWkbTypes.LineGeometry)
@@ -785,7 +928,7 @@ class PointMapTool(QgsMapTool):
         super().__init__(self.canvas)
 
         self.markers = []
-        self.list_of_snapping_points = None
+        self.snappingIndex = None
         self.snappingMarker = None
         self.selectingMarker = None
         self.lastMapCoord = None
@@ -967,34 +1110,34 @@ class PointMapTool(QgsMapTool):
                 self.snappingMarker.setIconSize(9)
                 self.snappingMarker.setPenWidth(3)
 
-    def setSnappingPoints(self, list_of_points):
-        self.list_of_snapping_points = list_of_points
+    def setSnappingIndex(self, snappingIndex):
+        self.snappingIndex = snappingIndex
 
     def getSnappingPoint(self):
         if self.isSelecting:
             if not self.markers or len(self.markers) < 1:
                 return None
-            points_list = [vertex.center() for vertex in self.markers]
-        else:
-            if not self.list_of_snapping_points or len(self.list_of_snapping_points) < 1:
-                return None
-            points_list = self.list_of_snapping_points
+        elif not self.snappingIndex or not self.snappingIndex.cells:
+            return None
 
         move_point = self.lastMapCoord
         x = move_point.x()
         y = move_point.y()
-        distances = [p.distance(x, y) for p in points_list]
-        index_of_nearest = min(range(len(distances)), key=distances.__getitem__)
 
         # tolerance needs to be recalculated as user can zoom while moving
-        x = int(x)  # must be int for QPoint!
-        y = int(y)
-        pt1 = QPoint(x, y)
-        pt2 = QPoint(x + 20, y)
+        pt1 = QPoint(int(x), int(y))  # must be int for QPoint!
+        pt2 = QPoint(int(x) + 20, int(y))
         layerPt1 = self.toLayerCoordinates(self.canvas.layer(0), pt1)
         layerPt2 = self.toLayerCoordinates(self.canvas.layer(0), pt2)
         tolerance = layerPt2.x() - layerPt1.x()
-        if distances[index_of_nearest] > tolerance:
-            return None
 
-        return points_list[index_of_nearest]
+        if self.isSelecting:
+            points_list = [vertex.center() for vertex in self.markers]
+            distances = [p.distance(x, y) for p in points_list]
+            index_of_nearest = min(range(len(distances)), key=distances.__getitem__)
+            if distances[index_of_nearest] > tolerance:
+                return None
+
+            return points_list[index_of_nearest]
+
+        return self.snappingIndex.nearest(x, y, tolerance)
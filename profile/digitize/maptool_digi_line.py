@@ -214,70 +214,28 @@ class MapToolDigiLine(MultilineMapTool, MapToolMixin):
     # in den Eingabelayer schreiben
     def reverseRotation2Eingabelayer(self, layer_id, aar_direction):
 
-        pr = self.refData["lineLayer"].dataProvider()
+        targetLayer = self.refData["lineLayer"]
         proj_layer = QgsProject.instance().mapLayersByName("E_Line")[0]
 
-        features_to_write = self.digiLineLayer.getFeatures()
-
-        for feature in features_to_write:
-            if feature["geo_quelle"] != "profile_object":
-                continue
-
-            self.refData["lineLayer"].startEditing()
+        request = QgsFeatureRequest().setFilterExpression("\"geo_quelle\" = 'profile_object'")
 
+        rotFeatures = []
+        for feature in self.digiLineLayer.getFeatures(request):
             # Zielgeometrie erzeugen
             emptyTargetGeometry = QgsGeometry.fromPolyline([])
 
             # Zielfeature erzeugen
-            rotFeature = QgsFeature(self.refData["lineLayer"].fields())
+            rotFeature = QgsFeature(targetLayer.fields())
 
             # Geometrie in Kartenebene umrechnen
             rotateGeom = self.rotationCoords.rotateLineFeature(feature, emptyTargetGeometry, aar_direction)
             rotFeature.setGeometry(rotateGeom)
             rotFeature.setAttributes(feature.attributes())
 
-            missing = True
-            # Features aus Eingabelayer
-            # schauen ob es schon existiert (anhand obj_uuid), wenn ja dann löschen und durch Zielfeature ersetzen
-            sourceLayerFeatures = self.refData["lineLayer"].getFeatures()
-            for sourceFeature in sourceLayerFeatures:
-                if feature["obj_uuid"] == sourceFeature["obj_uuid"]:
-                    pr.deleteFeatures([sourceFeature.id()])
-                    pr.addFeatures([rotFeature])
-                    missing = False
-            if not missing:
-                continue
-
-            # wenn feature nicht vorhanden, neues feature im Layer anlegen
-
-            # use default values for fid from actual project layer
-            # as self.digiLineLayer has no defaultValueDefinitions aka expressions
-            # formula for fid: if (count("fid") = 0, 0, maximum("fid") + 1)
-            field_default_value = proj_layer.defaultValue(proj_layer.fields().indexFromName("fid"))
-            rotFeature.setAttribute("fid", field_default_value)
-
-            retObj = pr.addFeatures([rotFeature])
-            self.refData["lineLayer"].removeSelection()
-            self.refData["lineLayer"].commitChanges()
-            self.refData["lineLayer"].updateExtents()
-            self.refData["lineLayer"].endEditCommand()
-
-            # update feature attribute in digiLineLayer
-            self.digiLineLayer.startEditing()
-            self.digiLineLayer.changeAttributeValue(
-                feature.id(),
-                self.digiLineLayer.fields().indexFromName("fid"),
-                field_default_value
-            )
-            print("commitChanges", self.digiLineLayer.commitChanges())
-            self.digiLineLayer.endEditCommand()
+            rotFeatures.append((feature.id(), rotFeature))
 
-            # update table fid
-            dataObj = {}
-            for item in proj_layer.fields():
-                if item.name() == "obj_uuid" or item.name() == "fid":
-                    dataObj[item.name()] = rotFeature[item.name()]
-            self.pup.publish("updateFeatureAttr", dataObj)
+        # vorhandene Features (anhand obj_uuid) ersetzen, fehlende neu anlegen
+        self.upsertEingabelayer(targetLayer, proj_layer, self.digiLineLayer, rotFeatures)
 
     def removeFeatureInEingabelayerByUuid(self, obj_uuid):
         features = self.refData["lineLayer"].getFeatures()
@@ -230,19 +230,16 @@ class MapToolDigiPoint(PointMapTool, MapToolMixin):
 
     # in den Eingabelayer schreiben
     def reverseRotation2Eingabelayer(self, layer_id, aar_direction):
-        pr = self.refData["pointLayer"].dataProvider()
-        proj_layer = QgsProject.instance().mapLayersByName("E_Point")[0]
-
-        features_to_write = self.digiPointLayer.getFeatures()
 
-        for feature in features_to_write:
-            if feature["geo_quelle"] != "profile_object":
-                continue
+        targetLayer = self.refData["pointLayer"]
+        proj_layer = QgsProject.instance().mapLayersByName("E_Point")[0]
 
-            self.refData["pointLayer"].startEditing()
+        request = QgsFeatureRequest().setFilterExpression("\"geo_quelle\" = 'profile_object'")
 
+        rotFeatures = []
+        for feature in self.digiPointLayer.getFeatures(request):
             # Zielfeature erzeugen
-            rotFeature = QgsFeature(self.refData["pointLayer"].fields())
+            rotFeature = QgsFeature(targetLayer.fields())
 
             # Geometrie in Kartenebene umrechnen
             rotateGeom = self.rotationCoords.rotatePointFeature(feature, aar_direction)
@@ -254,48 +251,10 @@ class MapToolDigiPoint(PointMapTool, MapToolMixin):
 
             rotFeature.setAttributes(feature.attributes())
 
-            missing = True
-            # Features aus Eingabelayer
-            # schauen ob es schon existiert (anhand obj_uuid), wenn ja dann löschen und durch Zielfeature ersetzen
-            sourceLayerFeatures = self.refData["pointLayer"].getFeatures()
-            for sourceFeature in sourceLayerFeatures:
-                if feature["obj_uuid"] == sourceFeature["obj_uuid"]:
-                    pr.deleteFeatures([sourceFeature.id()])
-                    pr.addFeatures([rotFeature])
-                    missing = False
-            if not missing:
-                continue
-
-            # wenn feature nicht vorhanden, neues feature im Layer anlegen
-
-            # use default values for fid from actual project layer
-            # as self.digiLineLayer has no defaultValueDefinitions aka expressions
-            # formula for fid: if (count("fid") = 0, 0, maximum("fid") + 1)
-            field_default_value = proj_layer.defaultValue(proj_layer.fields().indexFromName("fid"))
-            rotFeature.setAttribute("fid", field_default_value)
-
-            retObj = pr.addFeatures([rotFeature])
-            self.refData["pointLayer"].removeSelection()
-            self.refData["pointLayer"].commitChanges()
-            self.refData["pointLayer"].updateExtents()
-            self.refData["pointLayer"].endEditCommand()
-
-            # update feature attribute in digiLineLayer
-            self.digiPointLayer.startEditing()
-            self.digiPointLayer.changeAttributeValue(
-                feature.id(),
-                self.digiPointLayer.fields().indexFromName("fid"),
-                field_default_value
-            )
-            print("commitChanges", self.digiPointLayer.commitChanges())
-            self.digiPointLayer.endEditCommand()
+            rotFeatures.append((feature.id(), rotFeature))
 
-            # update table fid
-            dataObj = {}
-            for item in proj_layer.fields():
-                if item.name() == "obj_uuid" or item.name() == "fid":
-                    dataObj[item.name()] = rotFeature[item.name()]
-            self.pup.publish("updateFeatureAttr", dataObj)
+        # vorhandene Features (anhand obj_uuid) ersetzen, fehlende neu anlegen
+        self.upsertEingabelayer(targetLayer, proj_layer, self.digiPointLayer, rotFeatures)
 
     def removeFeatureInEingabelayerByUuid(self, obj_uuid):
         features = self.refData["pointLayer"].getFeatures()
@@ -214,71 +214,28 @@ class MapToolDigiPolygon(PolygonMapTool, MapToolMixin):
     # in den Eingabelayer schreiben
     def reverseRotation2Eingabelayer(self, layer_id, aar_direction):
 
-        pr = self.refData["polygonLayer"].dataProvider()
+        targetLayer = self.refData["polygonLayer"]
         proj_layer = QgsProject.instance().mapLayersByName("E_Polygon")[0]
 
-        features_to_write = self.digiPolygonLayer.getFeatures()
-
-        for feature in features_to_write:
-
-            if feature["geo_quelle"] != "profile_object":
-                continue
-
-            self.refData["polygonLayer"].startEditing()
+        request = QgsFeatureRequest().setFilterExpression("\"geo_quelle\" = 'profile_object'")
 
+        rotFeatures = []
+        for feature in self.digiPolygonLayer.getFeatures(request):
             # Zielgeometrie erzeugen
             emptyTargetGeometry = QgsGeometry.fromMultiPolygonXY([])
 
             # Zielfeature erzeugen
-            rotFeature = QgsFeature(self.refData["polygonLayer"].fields())
+            rotFeature = QgsFeature(targetLayer.fields())
 
             # Geometrie in Kartenebene umrechnen
             rotateGeom = self.rotationCoords.rotatePolygonFeature(feature, emptyTargetGeometry, aar_direction)
             rotFeature.setGeometry(rotateGeom)
             rotFeature.setAttributes(feature.attributes())
 
-            missing = True
-            # Features aus Eingabelayer
-            # schauen ob es schon existiert (anhand uuid), wenn ja dann löschen und durch Zielfeature ersetzen
-            sourceLayerFeatures = self.refData["polygonLayer"].getFeatures()
-            for sourceFeature in sourceLayerFeatures:
-                if feature["obj_uuid"] == sourceFeature["obj_uuid"]:
-                    pr.deleteFeatures([sourceFeature.id()])
-                    pr.addFeatures([rotFeature])
-                    missing = False
-            if not missing:
-                continue
-
-            # wenn feature nicht vorhanden, neues feature im Layer anlegen
-
-            # use default values for fid from actual project layer
-            # as self.digiLineLayer has no defaultValueDefinitions aka expressions
-            # formula for fid: if (count("fid") = 0, 0, maximum("fid") + 1)
-            field_default_value = proj_layer.defaultValue(proj_layer.fields().indexFromName("fid"))
-            rotFeature.setAttribute("fid", field_default_value)
-
-            retObj = pr.addFeatures([rotFeature])
-            self.refData["polygonLayer"].removeSelection()
-            self.refData["polygonLayer"].commitChanges()
-            self.refData["polygonLayer"].updateExtents()
-            self.refData["polygonLayer"].endEditCommand()
-
-            # update feature attribute in digiLineLayer
-            self.digiPolygonLayer.startEditing()
-            self.digiPolygonLayer.changeAttributeValue(
-                feature.id(),
-                self.digiPolygonLayer.fields().indexFromName("fid"),
-                field_default_value
-            )
-            print("commitChanges", self.digiPolygonLayer.commitChanges())
-            self.digiPolygonLayer.endEditCommand()
+            rotFeatures.append((feature.id(), rotFeature))
 
-            # update table fid
-            dataObj = {}
-            for item in proj_layer.fields():
-                if item.name() == "obj_uuid" or item.name() == "fid":
-                    dataObj[item.name()] = rotFeature[item.name()]
-            self.pup.publish("updateFeatureAttr", dataObj)
+        # vorhandene Features (anhand obj_uuid) ersetzen, fehlende neu anlegen
+        self.upsertEingabelayer(targetLayer, proj_layer, self.digiPolygonLayer, rotFeatures)
 
     def removeFeatureInEingabelayerByUuid(self, uuid):
         features = self.refData["polygonLayer"].getFeatures()
@@ -1,5 +1,5 @@
 from PyQt5.QtCore import Qt, QPoint, pyqtSlot, pyqtSignal, QCoreApplication, QEvent, QObject
-from qgis.core import QgsPointXY, QgsGeometry, QgsFeature
+from qgis.core import QgsPointXY, QgsGeometry, QgsFeature, QgsRectangle, QgsSpatialIndex
 from qgis.gui import QgsAttributeDialog, QgsAttributeEditorContext, QgsMapTool
 
 from ..publisher import Publisher
@@ -59,6 +59,7 @@ class MapToolIdentify(QgsMapTool):
         self.only_polygons = False
         QgsMapTool.__init__(self, self.canvas)
         self.search_features = []
+        self.search_index = QgsSpatialIndex()
         self.featForm = None
         self.lastUUID = None
         self.lastFeature = None
@@ -153,6 +154,13 @@ class MapToolIdentify(QgsMapTool):
                 filter(lambda f: f["feature"]["geo_quelle"] == "profile_object", self.search_features)
             )
 
+        # Rechteckindex über die Suchfeatures, die ID ist die Position in search_features
+        self.search_index = QgsSpatialIndex()
+        for index, search_feature in enumerate(self.search_features):
+            boundingBox = search_feature["feature"].geometry().boundingBox()
+            if not boundingBox.isNull():
+                self.search_index.addFeature(index, boundingBox)
+
     def close_form(self, event):
         self.pup.publish("removeHoverFeatures", {})
 
@@ -177,18 +185,24 @@ class MapToolIdentify(QgsMapTool):
             return
 
         map_point = self.toMapCoordinates(q_point)
-        closest_distances = [getDistance(f["feature"].geometry(), map_point) for f in self.search_features]
-        index_of_nearest = min(range(len(closest_distances)), key=closest_distances.__getitem__)
-
         vicinity = self.canvas.mapUnitsPerPixel() * 10
         squared_distance = vicinity * vicinity
-        if closest_distances[index_of_nearest] > squared_distance:
+
+        # nur Features, deren Rechteck im Suchradius liegt, werden genau geprüft
+        search_rect = QgsRectangle(
+            map_point.x() - vicinity, map_point.y() - vicinity, map_point.x() + vicinity, map_point.y() + vicinity
+        )
+        candidates = sorted(self.search_index.intersects(search_rect))
+        closest_distances = [getDistance(self.search_features[i]["feature"].geometry(), map_point) for i in candidates]
+
+        if not candidates or min(closest_distances) > squared_distance:
             if self.lastUUID is not None:
                 self.lastUUID = None
                 self.lastFeature = None
                 self.pup.publish("removeHoverFeatures", {})
             return
 
+        index_of_nearest = candidates[min(range(len(closest_distances)), key=closest_distances.__getitem__)]
         final_result = self.search_features[index_of_nearest]
         if final_result["feature"]["obj_uuid"] == self.lastUUID:
             return
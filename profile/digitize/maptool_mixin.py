@@ -1,6 +1,16 @@
 import uuid
 
-from qgis.core import QgsProject, QgsExpression, QgsExpressionContextUtils, QgsMessageLog, Qgis
+from qgis.core import (
+    QgsProject,
+    QgsExpression,
+    QgsExpressionContextUtils,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsMessageLog,
+    Qgis,
+)
+
+from ...utils.max_numbers import MaxNumberTracker
 
 
 class MapToolMixin:
@@ -38,3 +48,107 @@ class MapToolMixin:
 
         # prf_nr
         feature["prof_nr"] = prof_nr
+
+    ## \brief Gedrehte Profil-Features per obj_uuid in den Eingabelayer schreiben (Upsert)
+    #
+    # Der Index obj_uuid -> fid wird einmalig mit einer gefilterten Abfrage ohne Geometrie erstellt.
+    # Vorhandene Features werden in einem Aufruf geändert, neue Features in einem Aufruf angelegt.
+    #
+    # @param targetLayer Eingabelayer (E_Point, E_Line, E_Polygon)
+    # @param projLayer Projektlayer zur Ermittlung der fid-Defaultwerte
+    # @param digiLayer Digitalisierungslayer der Profilansicht
+    # @param rotFeatures Liste von Tupeln (Feature-Id im digiLayer, gedrehtes Zielfeature)
+    def upsertEingabelayer(self, targetLayer, projLayer, digiLayer, rotFeatures):
+
+        if not rotFeatures:
+            return
+
+        pr = targetLayer.dataProvider()
+        fields = targetLayer.fields()
+        fidIndex = fields.indexFromName("fid")
+
+        uuids = [rotFeature["obj_uuid"] for _, rotFeature in rotFeatures]
+
+        # Index obj_uuid -> fid der bereits vorhandenen Features
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(["obj_uuid"], fields)
+        request.setFilterExpression(
+            "{} IN ({})".format(
+                QgsExpression.quotedColumnRef("obj_uuid"),
+                ", ".join(QgsExpression.quotedString(str(uuid)) for uuid in set(uuids)),
+            )
+        )
+        uuidIndex = {sourceFeature["obj_uuid"]: sourceFeature.id() for sourceFeature in targetLayer.getFeatures(request)}
+
+        changedAttributes = {}
+        changedGeometries = {}
+        newFeatures = []
+        writtenFeatures = []
+
+        for digiFeatureId, rotFeature in rotFeatures:
+            fid = uuidIndex.get(rotFeature["obj_uuid"])
+
+            if fid is None:
+                newFeatures.append((digiFeatureId, rotFeature))
+                continue
+
+            # vorhandenes Feature durch Zielfeature ersetzen (fid bleibt erhalten)
+            changedGeometries[fid] = rotFeature.geometry()
+            changedAttributes[fid] = {
+                index: value for index, value in enumerate(rotFeature.attributes()) if index != fidIndex
+            }
+
+            writtenFeature = QgsFeature(rotFeature)
+            writtenFeature.setId(fid)
+            writtenFeatures.append(writtenFeature)
+
+        if changedGeometries:
+            pr.changeFeatures(changedAttributes, changedGeometries)
+
+        if newFeatures:
+            # use default values for fid from actual project layer
+            # as digiLayer has no defaultValueDefinitions aka expressions
+            # formula for fid: if (count("fid") = 0, 0, maximum("fid") + 1)
+            # der Defaultwert wird einmal ausgewertet und für jedes weitere neue Feature hochgezählt
+            projFidIndex = projLayer.fields().indexFromName("fid")
+            try:
+                nextFid = int(projLayer.defaultValue(projFidIndex))
+            except (TypeError, ValueError):
+                # kein Zahlenwert als Default, wie die Formel auf den größten fid aufsetzen
+                try:
+                    nextFid = int(projLayer.maximumValue(projFidIndex)) + 1
+                except (TypeError, ValueError):
+                    nextFid = 0
+
+            for _, rotFeature in newFeatures:
+                rotFeature.setAttribute("fid", nextFid)
+                nextFid += 1
+
+            _, addedFeatures = pr.addFeatures([rotFeature for _, rotFeature in newFeatures])
+            writtenFeatures.extend(addedFeatures)
+
+        # am Provider vorbei geschrieben, die nächsten Nummern nachführen
+        MaxNumberTracker.featuresWritten(targetLayer, writtenFeatures)
+
+        targetLayer.removeSelection()
+        targetLayer.updateExtents()
+        targetLayer.triggerRepaint()
+
+        if not newFeatures:
+            return
+
+        # update feature attribute in digiLayer
+        digiFidIndex = digiLayer.fields().indexFromName("fid")
+        digiLayer.startEditing()
+        for digiFeatureId, rotFeature in newFeatures:
+            digiLayer.changeAttributeValue(digiFeatureId, digiFidIndex, rotFeature["fid"])
+        print("commitChanges", digiLayer.commitChanges())
+
+        # update table fid
+        for _, rotFeature in newFeatures:
+            dataObj = {}
+            for item in projLayer.fields():
+                if item.name() == "obj_uuid" or item.name() == "fid":
+                    dataObj[item.name()] = rotFeature[item.name()]
+            self.pup.publish("updateFeatureAttr", dataObj)
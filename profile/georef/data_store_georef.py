@@ -11,6 +11,7 @@ from ..publisher import Publisher
 
 
 class DataStoreGeoref:
+    aarDirections = ("horizontal", "original", "absolute height")
 
     ## The constructor.
     # Creates labels with styles
@@ -19,14 +20,12 @@ class DataStoreGeoref:
     def __init__(self):
 
         self.pup = Publisher()
-        self.imagePoints = []
+        # Bildpunkte: obj_uuid -> {"obj_uuid", "x", "z"}
+        self.imagePoints = {}
         self.targetPoints = []
-        self.aarPointsHorizontal = []
-        self.aarPointsOriginal = []
-        self.aarPointsAbsolute = []
-        self.aarTransformationParamsHorizontal = {}
-        self.aarTransformationParamsAbsolute = {}
-        self.aarTransformationParamsOriginal = {}
+        # AAR-Punkte je aarDirection: obj_uuid -> Punkt (Reihenfolge wie von AAR geliefert)
+        self.aarPoints = {direction: {} for direction in self.aarDirections}
+        self.aarTransformationParams = {direction: {} for direction in self.aarDirections}
 
     ## \brief Add image point
     #
@@ -41,20 +40,17 @@ class DataStoreGeoref:
     #
     def addImagePoint(self, pointObj):
 
-        if len(self.imagePoints) == 0:
+        statePoint = self.imagePoints.get(pointObj["obj_uuid"])
 
-            self.imagePoints.append({"obj_uuid": pointObj["obj_uuid"], "x": pointObj["x"], "z": pointObj["z"]})
+        if statePoint is None:
+            self.imagePoints[pointObj["obj_uuid"]] = {
+                "obj_uuid": pointObj["obj_uuid"],
+                "x": pointObj["x"],
+                "z": pointObj["z"],
+            }
         else:
-            checker = False
-            for statePoint in self.imagePoints:
-
-                if statePoint["obj_uuid"] == pointObj["obj_uuid"]:
-                    statePoint["x"] = pointObj["x"]
-                    statePoint["z"] = pointObj["z"]
-                    checker = True
-
-            if checker == False:
-                self.imagePoints.append({"obj_uuid": pointObj["obj_uuid"], "x": pointObj["x"], "z": pointObj["z"]})
+            statePoint["x"] = pointObj["x"]
+            statePoint["z"] = pointObj["z"]
 
     def addTargetPoints(self, refData):
 
@@ -69,161 +65,89 @@ class DataStoreGeoref:
 
         aarDirection = aarList["aar_direction"]
 
-        if aarDirection == "original":
+        if aarDirection not in self.aarPoints:
+            return
+
+        aarArray = []
+        # Punkte
+        for pointObj in aarList["coord_trans"]:
+            aarArray.append(
+                {
+                    "obj_uuid": pointObj[8],
+                    "ptnr": str(pointObj[7]),
+                    "x": pointObj[0],
+                    "y": pointObj[1],
+                    "z": pointObj[2],
+                    "z_org": pointObj[4],
+                    "distance": pointObj[5],
+                    "usage": pointObj[6],
+                }
+            )
 
-            aarArray = []
-            # Punkte
-            for pointObj in aarList["coord_trans"]:
-                aarArray.append(
-                    {
-                        "obj_uuid": pointObj[8],
-                        "ptnr": str(pointObj[7]),
-                        "x": pointObj[0],
-                        "y": pointObj[1],
-                        "z": pointObj[2],
-                        "z_org": pointObj[4],
-                        "distance": pointObj[5],
-                        "usage": pointObj[6],
-                    }
-                )
+        self.pup.publish("pushAarPoints", aarArray)
 
-            self.pup.publish("pushAarPoints", aarArray)
+        self.aarPoints[aarDirection] = {aarObj["obj_uuid"]: aarObj for aarObj in aarArray}
 
-            self.aarPointsOriginal = aarArray
+        # Transformationsparameter
+        transformationParams = aarList["transformationParams"]
+        z_slope = aarList["linegress"][0]
+        z_intercept = aarList["linegress"][1]
+        transformationParams["z_slope"] = z_slope
+        transformationParams["z_intercept"] = z_intercept
+        transformationParams["ns_error"] = aarList["ns_error"]
 
-            # Transformationsparameter
-            transformationParams = aarList["transformationParams"]
-            z_slope = aarList["linegress"][0]
-            z_intercept = aarList["linegress"][1]
-            transformationParams["z_slope"] = z_slope
-            transformationParams["z_intercept"] = z_intercept
-            transformationParams["ns_error"] = aarList["ns_error"]
+        self.updateAarTransformationParams(transformationParams)
 
-            self.updateAarTransformationParams(transformationParams)
+    def updateAarTransformationParams(self, params):
+        if params["aar_direction"] in self.aarTransformationParams:
+            self.aarTransformationParams[params["aar_direction"]] = params
 
-        if aarDirection == "absolute height":
+        self.pup.publish("pushTransformationParams", self.getAarTransformationParams(params["aar_direction"]))
 
-            aarArray = []
-            # Punkte
-            for pointObj in aarList["coord_trans"]:
-                aarArray.append(
-                    {
-                        "obj_uuid": pointObj[8],
-                        "ptnr": str(pointObj[7]),
-                        "x": pointObj[0],
-                        "y": pointObj[1],
-                        "z": pointObj[2],
-                        "z_org": pointObj[4],
-                        "distance": pointObj[5],
-                        "usage": pointObj[6],
-                    }
-                )
+    def getAarTransformationParams(self, aar_direction):
 
-            self.pup.publish("pushAarPoints", aarArray)
+        return self.aarTransformationParams.get(aar_direction)
 
-            self.aarPointsAbsolute = aarArray
+    def getGeorefData(self, aarDirection):
+
+        return self.getGeorefDataAll([aarDirection])[aarDirection]
 
-            # Transformationsparameter
-            transformationParams = aarList["transformationParams"]
-            z_slope = aarList["linegress"][0]
-            z_intercept = aarList["linegress"][1]
-            transformationParams["z_slope"] = z_slope
-            transformationParams["z_intercept"] = z_intercept
-            transformationParams["ns_error"] = aarList["ns_error"]
+    ## \brief Join image points and AAR points of all (or the given) aarDirections in one pass
+    #
+    # @returns dict aarDirection -> list of GCP dictionaries
+    def getGeorefDataAll(self, aarDirections=None):
 
-            self.updateAarTransformationParams(transformationParams)
+        georefDataAll = {direction: [] for direction in aarDirections or self.aarDirections}
 
-        if aarDirection == "horizontal":
+        for aarDirection, georefData in georefDataAll.items():
+            for obj_uuid, aarObj in self.aarPoints.get(aarDirection, {}).items():
+                if aarObj["usage"] != 1:
+                    continue
 
-            aarArray = []
-            # Punkte
-            for pointObj in aarList["coord_trans"]:
-                aarArray.append(
+                imageObj = self.imagePoints.get(obj_uuid)
+                if imageObj is None:
+                    continue
+
+                georefData.append(
                     {
-                        "obj_uuid": pointObj[8],
-                        "ptnr": str(pointObj[7]),
-                        "x": pointObj[0],
-                        "y": pointObj[1],
-                        "z": pointObj[2],
-                        "z_org": pointObj[4],
-                        "distance": pointObj[5],
-                        "usage": pointObj[6],
+                        "obj_uuid": aarObj["obj_uuid"],
+                        "ptnr": aarObj["ptnr"],
+                        "input_x": imageObj["x"],
+                        "input_z": imageObj["z"],
+                        "aar_x": aarObj["x"],
+                        "aar_y": aarObj["y"],
+                        "aar_z": aarObj["z"],
+                        "aar_z_org": aarObj["z_org"],
+                        "aar_distance": aarObj["distance"],
+                        "aar_direction": aarDirection,
                     }
                 )
 
-            self.pup.publish("pushAarPoints", aarArray)
-
-            self.aarPointsHorizontal = aarArray
-
-            # Transformationsparameter
-            transformationParams = aarList["transformationParams"]
-            z_slope = aarList["linegress"][0]
-            z_intercept = aarList["linegress"][1]
-            transformationParams["z_slope"] = z_slope
-            transformationParams["z_intercept"] = z_intercept
-            transformationParams["ns_error"] = aarList["ns_error"]
-
-            self.updateAarTransformationParams(transformationParams)
-
-    def updateAarTransformationParams(self, params):
-        if params["aar_direction"] == "horizontal":
-            self.aarTransformationParamsHorizontal = params
-        if params["aar_direction"] == "absolute height":
-            self.aarTransformationParamsAbsolute = params
-        if params["aar_direction"] == "original":
-            self.aarTransformationParamsOriginal = params
-
-        self.pup.publish("pushTransformationParams", self.getAarTransformationParams(params["aar_direction"]))
-
-    def getAarTransformationParams(self, aar_direction):
-
-        if aar_direction == "horizontal":
-            return self.aarTransformationParamsHorizontal
-        if aar_direction == "absolute height":
-            return self.aarTransformationParamsAbsolute
-        if aar_direction == "original":
-            return self.aarTransformationParamsOriginal
-
-    def getGeorefData(self, aarDirection):
-
-        if aarDirection == "horizontal":
-            retPoints = self.aarPointsHorizontal
-
-        if aarDirection == "original":
-            retPoints = self.aarPointsOriginal
-
-        if aarDirection == "absolute height":
-            retPoints = self.aarPointsAbsolute
-
-        georefData = []
-
-        for aarObj in retPoints:
-            if aarObj["usage"] == 1:
-                for imageObj in self.imagePoints:
-                    if aarObj["obj_uuid"] == imageObj["obj_uuid"]:
-                        georefData.append(
-                            {
-                                "obj_uuid": aarObj["obj_uuid"],
-                                "ptnr": aarObj["ptnr"],
-                                "input_x": imageObj["x"],
-                                "input_z": imageObj["z"],
-                                "aar_x": aarObj["x"],
-                                "aar_y": aarObj["y"],
-                                "aar_z": aarObj["z"],
-                                "aar_z_org": aarObj["z_org"],
-                                "aar_distance": aarObj["distance"],
-                                "aar_direction": aarDirection,
-                            }
-                        )
-        return georefData
+        return georefDataAll
 
     def clearStore(self):
 
-        self.imagePoints = []
+        self.imagePoints = {}
         self.targetPoints = []
-        self.aarPointsHorizontal = []
-        self.aarPointsOriginal = []
-        self.aarPointsAbsolute = []
-        self.aarTransformationParamsHorizontal = {}
-        self.aarTransformationParamsAbsolute = {}
-        self.aarTransformationParamsOriginal = {}
+        self.aarPoints = {direction: {} for direction in self.aarDirections}
+        self.aarTransformationParams = {direction: {} for direction in self.aarDirections}
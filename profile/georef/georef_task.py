@@ -0,0 +1,127 @@
+import json
+import traceback
+import uuid
+
+import osgeo_utils.gdal_merge
+from PIL import Image, ImageDraw
+from osgeo import gdal
+from qgis.core import QgsTask
+
+from .image_cache import imageCache
+from .image_georef import ImageGeoref
+
+
+## @brief Task for the georeferencing of a profile image in one aarDirection
+#
+# All input data (image, GCPs, output paths, meta data) are passed to the constructor,
+# so the task runs independently of the georeferencing dialog in the QgsTaskManager.
+#
+class GeorefTask(QgsTask):
+    def __init__(self, aarDirection, georefData, crs, imageFileIn, imageFileOut, metaFileOut, metaData, backend):
+        super().__init__(f"Profil entzerren ({aarDirection})", QgsTask.CanCancel)
+        self.aarDirection = aarDirection
+        self.georefData = georefData
+        self.crs = crs
+        self.imageFileIn = imageFileIn
+        self.imageFileOut = imageFileOut
+        self.metaFileOut = metaFileOut
+        self.metaData = metaData
+        self.backend = backend
+
+        self.georefChecker = None
+        self.error = None
+
+    def run(self):
+        try:
+            imageGeoref = ImageGeoref()
+            imageGeoref.backend = self.backend
+
+            self.georefChecker = imageGeoref.run_georef(
+                self.georefData, self.crs, self.imageFileIn, self.imageFileOut, feedback=self
+            )
+            if self.georefChecker != "ok" or self.isCanceled():
+                return False
+
+            with open(self.metaFileOut, "w") as outfile:
+                json.dump(self.metaData, outfile)
+
+            return True
+
+        except Exception:
+            self.error = traceback.format_exc()
+            return False
+
+
+## @brief Task for clipping the profile image to the clipping polygon
+#
+class ClipImageTask(QgsTask):
+    def __init__(self, imageFileIn, pointsList, clippedImagePath):
+        super().__init__("Profilfoto beschneiden", QgsTask.CanCancel)
+        self.imageFileIn = imageFileIn
+        self.pointsList = pointsList
+        self.clippedImagePath = clippedImagePath
+
+        self.error = None
+
+    def run(self):
+        try:
+            img = imageCache.get(self.imageFileIn)
+            mask = Image.new("1", img.size, 0)
+            draw_tool = ImageDraw.Draw(mask)
+            draw_tool.polygon(self.pointsList, fill=1, outline=1)
+            background = Image.new(img.mode, img.size, "white")
+            result = Image.composite(img, background, mask)
+
+            if self.isCanceled():
+                return False
+
+            result.save(self.clippedImagePath)
+            # das beschnittene Bild wird von den folgenden Tasks ohne erneutes Dekodieren verwendet
+            imageCache.put(self.clippedImagePath, result)
+            result.close()
+
+            return True
+
+        except Exception:
+            self.error = traceback.format_exc()
+            return False
+
+
+## @brief Task for merging the georeferenced images of both profiles of a Kreuzprofil
+#
+# Started as soon as both profiles are georeferenced in the aarDirection.
+#
+class MergeKreuzprofilTask(QgsTask):
+    def __init__(self, aarDirection, imageFilesIn, imageFileOut):
+        super().__init__(f"Kreuzprofil zusammenführen ({aarDirection})", QgsTask.CanCancel)
+        self.aarDirection = aarDirection
+        self.imageFilesIn = imageFilesIn
+        self.imageFileOut = imageFileOut
+
+        self.error = None
+
+    def run(self):
+        mergedPath = f"/vsimem/merged_{uuid.uuid4().hex}.tif"
+        try:
+            command = f"gdal_merge.py -n 255 -init 255 -of gtiff -o {mergedPath} " + " ".join(
+                str(imageFile) for imageFile in self.imageFilesIn
+            )
+            osgeo_utils.gdal_merge.main(command.split(" "))
+
+            if self.isCanceled():
+                return False
+
+            gdal.Translate(
+                f"{self.imageFileOut}",
+                mergedPath,
+                options="-co WORLDFILE=YES -co QUALITY=100",
+            )
+
+            return True
+
+        except Exception:
+            self.error = traceback.format_exc()
+            return False
+
+        finally:
+            gdal.Unlink(mergedPath)
@@ -3,13 +3,11 @@ import json
 import os
 import pathlib
 import tempfile
-import traceback
+from functools import partial
 from glob import glob
 from shutil import rmtree
 
-import osgeo_utils.gdal_merge
-from PIL import Image, ImageDraw
-from osgeo import gdal
+from PIL import Image
 from qgis.PyQt.QtCore import Qt
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import (
@@ -22,12 +20,15 @@ from qgis.PyQt.QtWidgets import (
     QLabel,
     QMessageBox,
     QDesktopWidget,
+    QComboBox,
 )
-from qgis.core import QgsGeometry
+from qgis.core import QgsApplication, QgsGeometry
 from qgis.gui import QgsMessageBar
 
 from .data_store_georef import DataStoreGeoref
 from .gcp_parambar import GcpParambar
+from .georef_task import GeorefTask, ClipImageTask, MergeKreuzprofilTask
+from .image_cache import imageCache
 from .image_georef import ImageGeoref
 from .image_parambar import ImageParambar
 from .profile_gcp_canvas import ProfileGcpCanvas
@@ -67,6 +68,10 @@ class GeoreferencingDialog(QMainWindow):
         self.ref_data_pair = None
         self.profile_set = None
         self.clipping_polygon = QgsGeometry()
+        # laufende Entzerrungs-Tasks
+        self.georefTasks = []
+        self.georefFailed = False
+        self.georefClosed = False
 
         self.createMenu()
         self.createComponents()
@@ -75,6 +80,11 @@ class GeoreferencingDialog(QMainWindow):
 
     def closeEvent(self, event):
         print("close")
+        # laufende Entzerrung abbrechen
+        self.georefClosed = True
+        for task in self.georefTasks:
+            task.cancel()
+
         super().closeEvent(event)
         self.dataStoreGeoref.clearStore()
         # self.georefTable.cleanGeorefTable()
@@ -182,6 +192,7 @@ class GeoreferencingDialog(QMainWindow):
         self.canvasImage.pup.register("imagePointCoordinates", self.georefTable.updateErrorValues)
 
         self.startGeorefBtn.clicked.connect(self.startGeoreferencing)
+        self.georefBackendCombo.currentIndexChanged.connect(self.setGeorefBackend)
 
         self.georefTable.pup.register("dataChanged", self.profileAAR.run)
 
@@ -217,6 +228,12 @@ class GeoreferencingDialog(QMainWindow):
 
         self.toolbarMap.addWidget(self.startGeorefBtn)
 
+        # Auswahl der Entzerrung (Vergleich von Geschwindigkeit und Qualität)
+        self.georefBackendCombo = QComboBox(self)
+        self.georefBackendCombo.addItem("Entzerrung mit PIL", "pil")
+        self.georefBackendCombo.addItem("Entzerrung mit GDAL", "gdal")
+        self.toolbarMap.addWidget(self.georefBackendCombo)
+
     ## \brief Creates the layout for the window and assigns the created components
     #
     def createLayout(self):
@@ -308,7 +325,7 @@ class GeoreferencingDialog(QMainWindow):
 
     ## \brief Export GCP-Data in a textfile
     #
-    def writeMetafile(self, aarDirection, metaFileOut):
+    def getMetaData(self, aarDirection):
         transformation_params = self.dataStoreGeoref.getAarTransformationParams(aarDirection)
 
         # Wenn die AAR-Berechnung aufgrund geringer Genauigkeit (O-W- oder N-S-Profile)
@@ -331,8 +348,11 @@ class GeoreferencingDialog(QMainWindow):
             "transform_params": transformation_params,
         }
 
+        return data
+
+    def writeMetafile(self, aarDirection, metaFileOut):
         with open(str(metaFileOut), "w") as outfile:
-            json.dump(data, outfile)
+            json.dump(self.getMetaData(aarDirection), outfile)
 
         return metaFileOut
 
@@ -378,8 +398,7 @@ class GeoreferencingDialog(QMainWindow):
                 self.refData["profileDirs"][key] = str(profile_dir)
 
             # load camera file:
-            with Image.open(self.refData["imagePath"]) as imageObject:
-                imageObject.load()
+            imageObject = imageCache.get(self.refData["imagePath"])
 
             file_name = "camera_copy.png"
 
@@ -398,6 +417,7 @@ class GeoreferencingDialog(QMainWindow):
             # store file
             file_path = str(pathlib.Path(self.refData["savePath"]).joinpath(file_name))
             imageObject.save(file_path)
+            imageCache.put(file_path, imageObject)
             imageObject.close()
 
             # make the (flipped) png image the default to work with
@@ -408,135 +428,207 @@ class GeoreferencingDialog(QMainWindow):
 
         self.restore()
 
+    ## \brief Set the backend used for warping the profile image ("pil" or "gdal")
+    #
+    def setGeorefBackend(self, index):
+        self.imageGeoref.backend = self.georefBackendCombo.itemData(index)
+
     ## \brief Start georeferencing process
     #
-    # Do georeferencing for every aarDirection
+    # Do georeferencing for every aarDirection as independent tasks in the QgsTaskManager
     # Write Metadatafile
     #
     def startGeoreferencing(self):
-        try:
-            if self.clipping_polygon:
-                # clip image to polygon
-                points_list = [(p[0], abs(p[1])) for p in self.clipping_polygon.asMultiPolygon()[0][0]]
-                img = Image.open(self.refData["imagePath"])
-                mask = Image.new("1", img.size, 0)
-                draw_tool = ImageDraw.Draw(mask)
-                draw_tool.polygon(points_list, fill=1, outline=1)
-                background = Image.new(img.mode, img.size, "white")
-                result = Image.composite(img, background, mask)
-                if self.ref_data_pair:
-                    clipped_image_path = str(pathlib.Path(self.refData["savePath"]).joinpath("clipped.png"))
-                else:
-                    # not kreuzprofil, but with clipping polygon:
-                    # store clipped in temp dir:
-                    tmp_dir = tempfile.mkdtemp(prefix=f"georef_profile{self.refData['profileNumber']}_")
-                    clipped_image_path = str(pathlib.Path(tmp_dir).joinpath("clipped.png"))
-                result.save(clipped_image_path)
-                result.close()
-
-                # make clipped image the default to work with
-                self.refData["imagePath"] = clipped_image_path
-
-            imageFileIn = self.refData["imagePath"]
-            profileTargetName = self.refData["profileTargetName"]
-            if not self.ref_data_pair:
-                # not set for kreuzprofil
-                file_extension = "jpg"
+        self.startGeorefBtn.setEnabled(False)
+        self.startGeorefBtn.setStyleSheet(self.style_button_disabled)
+        self.georefBackendCombo.setEnabled(False)
+        self.messageBar.pushMessage("Hinweis", "Profil wird entzerrt ...", level=0)
+
+        if self.clipping_polygon:
+            # clip image to polygon
+            points_list = [(p[0], abs(p[1])) for p in self.clipping_polygon.asMultiPolygon()[0][0]]
+            if self.ref_data_pair:
+                clipped_image_path = str(pathlib.Path(self.refData["savePath"]).joinpath("clipped.png"))
             else:
-                file_extension = "png"
+                # not kreuzprofil, but with clipping polygon:
+                # store clipped in temp dir:
+                tmp_dir = tempfile.mkdtemp(prefix=f"georef_profile{self.refData['profileNumber']}_")
+                clipped_image_path = str(pathlib.Path(tmp_dir).joinpath("clipped.png"))
 
-            for aarDirection in self.refData["transform_methods"]:
-                base_path = pathlib.Path(self.refData["profileDirs"][self.aarDirections_to_path_dict[aarDirection]])
-                imageFileOut = base_path.joinpath(f"{profileTargetName}.{file_extension}")
-                metaFileOut = base_path.joinpath(f"{profileTargetName}.meta")
+            task = ClipImageTask(self.refData["imagePath"], points_list, clipped_image_path)
+            task.taskCompleted.connect(partial(self.clipImageFinished, task, True))
+            task.taskTerminated.connect(partial(self.clipImageFinished, task, False))
+            self.addGeorefTask(task)
+            return
 
-                georefData = self.dataStoreGeoref.getGeorefData(aarDirection)
-                georefChecker = self.imageGeoref.run_georef(
-                    georefData, self.refData["crs"], imageFileIn, str(imageFileOut)
-                )
+        self.startGeorefTasks()
 
-                if georefChecker != "ok":
-                    self.iface.messageBar().pushMessage(
-                        "Hinweis",
-                        "Konnte Profil nicht georeferenzieren. Es müssen min. 4 GCP gesetzt sein!",
-                        level=1,
-                        duration=5,
-                    )
-                    continue
-
-                _ = self.writeMetafile(aarDirection, metaFileOut)
-
-                if not self.ref_data_pair:
-                    # not set for kreuzprofil
-                    self.iface.messageBar().pushMessage(
-                        "Hinweis",
-                        "Das Profil wurde unter " + str(imageFileOut) + " referenziert",
-                        level=3,
-                        duration=5,
-                    )
-                    continue
-
-                self.refData[f"geo_ref_done_{aarDirection}"] = True
-
-                if not (
-                    self.ref_data_pair[0].get(f"geo_ref_done_{aarDirection}", False)
-                    and self.ref_data_pair[1].get(f"geo_ref_done_{aarDirection}", False)
-                ):
-                    # other profil is not ready yet
-                    continue
-
-                save_path_0_original = pathlib.Path(
-                    self.ref_data_pair[0]["profileDirs_backup"][self.aarDirections_to_path_dict[aarDirection]]
-                )
-                save_path_0 = pathlib.Path(
-                    self.ref_data_pair[0]["profileDirs"][self.aarDirections_to_path_dict[aarDirection]]
-                )
-                save_path_1 = pathlib.Path(
-                    self.ref_data_pair[1]["profileDirs"][self.aarDirections_to_path_dict[aarDirection]]
-                )
-                command = (
-                    f"gdal_merge.py "
-                    f"-n 255 "
-                    f"-init 255 "
-                    f"-of gtiff "
-                    f"-o /vsimem/merged.tif "
-                    f"{save_path_0.joinpath(f'{profileTargetName}.{file_extension}')} "
-                    f"{save_path_1.joinpath(f'{profileTargetName}.{file_extension}')}"
-                )
-                osgeo_utils.gdal_merge.main(command.split(" "))
+    ## \brief Start one georeferencing task per aarDirection
+    #
+    def startGeorefTasks(self):
+        imageFileIn = self.refData["imagePath"]
+        profileTargetName = self.refData["profileTargetName"]
+        if not self.ref_data_pair:
+            # not set for kreuzprofil
+            file_extension = "jpg"
+        else:
+            file_extension = "png"
+
+        georefDataAll = self.dataStoreGeoref.getGeorefDataAll(self.refData["transform_methods"])
+
+        for aarDirection in self.refData["transform_methods"]:
+            base_path = pathlib.Path(self.refData["profileDirs"][self.aarDirections_to_path_dict[aarDirection]])
+            imageFileOut = base_path.joinpath(f"{profileTargetName}.{file_extension}")
+            metaFileOut = base_path.joinpath(f"{profileTargetName}.meta")
+
+            task = GeorefTask(
+                aarDirection,
+                georefDataAll[aarDirection],
+                self.refData["crs"],
+                imageFileIn,
+                str(imageFileOut),
+                str(metaFileOut),
+                self.getMetaData(aarDirection),
+                self.imageGeoref.backend,
+            )
+            task.taskCompleted.connect(partial(self.georefTaskFinished, task, True))
+            task.taskTerminated.connect(partial(self.georefTaskFinished, task, False))
+            self.addGeorefTask(task)
 
-                imageFileOut = save_path_0_original.joinpath(f"{profileTargetName}.jpg")
-                gdal.Translate(
-                    f"{imageFileOut}",
-                    "/vsimem/merged.tif",
-                    options="-co WORLDFILE=YES -co QUALITY=100",
-                )
-                gdal.Unlink("/vsimem/merged.tif")
-
-                with open(f"{save_path_0.joinpath(f'{profileTargetName}.meta')}", "r") as meta_file_0:
-                    meta_0 = json.load(meta_file_0)
-                with open(f"{save_path_1.joinpath(f'{profileTargetName}.meta')}", "r") as meta_file_1:
-                    meta_1 = json.load(meta_file_1)
-                meta_0["gcps"] += meta_1["gcps"]
-                for item in meta_0["gcps"]:
-                    # do not delete as they need to be there in plan export
-                    # but they have to be 0 because half of them are not valid in kreuzprofil
-                    item["input_x"] = 0.0
-                    item["input_z"] = 0.0
-                meta_0["profilnummer"] += "_" + meta_1["profilnummer"]
-                out_path = f"{save_path_0_original.joinpath(f'{profileTargetName}.meta')}"
-                with open(out_path, "w") as outfile:
-                    json.dump(meta_0, outfile)
+        self.finishGeoreferencing()
+
+    def addGeorefTask(self, task):
+        self.georefTasks.append(task)
+        QgsApplication.taskManager().addTask(task)
+
+    def clipImageFinished(self, task, success):
+        self.georefTasks.remove(task)
+        if self.georefClosed:
+            return
+
+        if not success:
+            self.georefTaskFailed(task)
+            self.finishGeoreferencing()
+            return
+
+        # make clipped image the default to work with
+        self.refData["imagePath"] = task.clippedImagePath
 
+        self.startGeorefTasks()
+
+    def georefTaskFinished(self, task, success):
+        self.georefTasks.remove(task)
+        if self.georefClosed:
+            return
+
+        aarDirection = task.aarDirection
+
+        if not success:
+            if task.georefChecker == "error":
                 self.iface.messageBar().pushMessage(
                     "Hinweis",
-                    "Das Profil wurde unter " + str(imageFileOut) + " referenziert",
-                    level=3,
+                    "Konnte Profil nicht georeferenzieren. Es müssen min. 4 GCP gesetzt sein!",
+                    level=1,
                     duration=5,
                 )
+            else:
+                self.georefTaskFailed(task)
+            self.finishGeoreferencing()
+            return
+
+        if not self.ref_data_pair:
+            # not set for kreuzprofil
+            self.iface.messageBar().pushMessage(
+                "Hinweis",
+                "Das Profil wurde unter " + str(task.imageFileOut) + " referenziert",
+                level=3,
+                duration=5,
+            )
+            self.finishGeoreferencing()
+            return
+
+        self.refData[f"geo_ref_done_{aarDirection}"] = True
+
+        if not (
+            self.ref_data_pair[0].get(f"geo_ref_done_{aarDirection}", False)
+            and self.ref_data_pair[1].get(f"geo_ref_done_{aarDirection}", False)
+        ):
+            # other profil is not ready yet
+            self.finishGeoreferencing()
+            return
+
+        # both profiles are ready: start merge of Kreuzprofil
+        profileTargetName = self.refData["profileTargetName"]
+        save_path_0_original = pathlib.Path(
+            self.ref_data_pair[0]["profileDirs_backup"][self.aarDirections_to_path_dict[aarDirection]]
+        )
+        save_path_0 = pathlib.Path(
+            self.ref_data_pair[0]["profileDirs"][self.aarDirections_to_path_dict[aarDirection]]
+        )
+        save_path_1 = pathlib.Path(
+            self.ref_data_pair[1]["profileDirs"][self.aarDirections_to_path_dict[aarDirection]]
+        )
+
+        mergeTask = MergeKreuzprofilTask(
+            aarDirection,
+            [save_path_0.joinpath(f"{profileTargetName}.png"), save_path_1.joinpath(f"{profileTargetName}.png")],
+            save_path_0_original.joinpath(f"{profileTargetName}.jpg"),
+        )
+        mergeTask.taskCompleted.connect(
+            partial(self.mergeKreuzprofilFinished, mergeTask, True, save_path_0, save_path_1, save_path_0_original)
+        )
+        mergeTask.taskTerminated.connect(
+            partial(self.mergeKreuzprofilFinished, mergeTask, False, save_path_0, save_path_1, save_path_0_original)
+        )
+        self.addGeorefTask(mergeTask)
+
+    def mergeKreuzprofilFinished(self, task, success, save_path_0, save_path_1, save_path_0_original):
+        self.georefTasks.remove(task)
+        if self.georefClosed:
+            return
+
+        if not success:
+            self.georefTaskFailed(task)
+            self.finishGeoreferencing()
+            return
+
+        profileTargetName = self.refData["profileTargetName"]
+
+        with open(f"{save_path_0.joinpath(f'{profileTargetName}.meta')}", "r") as meta_file_0:
+            meta_0 = json.load(meta_file_0)
+        with open(f"{save_path_1.joinpath(f'{profileTargetName}.meta')}", "r") as meta_file_1:
+            meta_1 = json.load(meta_file_1)
+        meta_0["gcps"] += meta_1["gcps"]
+        for item in meta_0["gcps"]:
+            # do not delete as they need to be there in plan export
+            # but they have to be 0 because half of them are not valid in kreuzprofil
+            item["input_x"] = 0.0
+            item["input_z"] = 0.0
+        meta_0["profilnummer"] += "_" + meta_1["profilnummer"]
+        out_path = f"{save_path_0_original.joinpath(f'{profileTargetName}.meta')}"
+        with open(out_path, "w") as outfile:
+            json.dump(meta_0, outfile)
+
+        self.iface.messageBar().pushMessage(
+            "Hinweis",
+            "Das Profil wurde unter " + str(task.imageFileOut) + " referenziert",
+            level=3,
+            duration=5,
+        )
+
+        self.finishGeoreferencing()
+
+    ## \brief Report a failed task and cancel the remaining ones
+    #
+    def georefTaskFailed(self, task):
+        if task.error:
+            print(f"An exception occurred in {task.description()} \n {task.error}")
+
+        for pendingTask in self.georefTasks:
+            pendingTask.cancel()
 
-        except Exception as e:
-            print(f"An exception occurred {type(e)} \n {traceback.format_exc()}")
+        if not self.georefFailed:
+            self.georefFailed = True
             QMessageBox.critical(
                 self,
                 "Fehler bei der Profilentzerrung!",
@@ -544,6 +636,12 @@ class GeoreferencingDialog(QMainWindow):
                 QMessageBox.Abort,
             )
 
+    ## \brief Close the dialog as soon as all tasks are finished
+    #
+    def finishGeoreferencing(self):
+        if self.georefTasks or self.georefClosed:
+            return
+
         self.destroyDialog()
 
     def destroyDialog(self):
@@ -0,0 +1,113 @@
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+
+## @brief Process-wide LRU cache for decoded images
+#
+# Images are identified by path, modification time and file size. get() returns
+# read-only views sharing the decoded pixel data; modifying a view copies it first
+# (copy-on-write). Uncompressed formats are memory-mapped by PIL.
+#
+class ImageCache:
+    # Speicherbudget in Bytes
+    maxBytes = 1024 * 1024 * 1024
+
+    def __init__(self):
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loadLocks = {}
+
+    ## \brief Read-only view of the decoded image
+    #
+    # The image is decoded only once, even if several threads request it at the same time.
+    #
+    def get(self, path):
+        key = self._key(path)
+
+        with self._lock:
+            image = self._lookup(key)
+            if image is not None:
+                return self._view(image)
+            loadLock = self._loadLocks.setdefault(key, threading.Lock())
+
+        with loadLock:
+            with self._lock:
+                image = self._lookup(key)
+
+            if image is None:
+                with Image.open(path) as image:
+                    image.load()
+
+                with self._lock:
+                    self._insert(key, image)
+                    self._loadLocks.pop(key, None)
+
+        return self._view(image)
+
+    ## \brief Size of the image without decoding it
+    #
+    def size(self, path):
+        key = self._key(path)
+
+        with self._lock:
+            image = self._lookup(key)
+            if image is not None:
+                return image.size
+
+        with Image.open(path) as image:
+            return image.size
+
+    ## \brief Add an image that was just written to path
+    #
+    # The image must not be modified afterwards.
+    #
+    def put(self, path, image):
+        image.load()
+        with self._lock:
+            self._insert(self._key(path), self._view(image))
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+
+    def _key(self, path):
+        stat = os.stat(path)
+        return os.path.realpath(path), stat.st_mtime_ns, stat.st_size
+
+    def _lookup(self, key):
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+
+        return image
+
+    def _insert(self, key, image):
+        imageBytes = self._imageBytes(image)
+        if imageBytes > self.maxBytes or key in self._images:
+            return
+
+        self._images[key] = image
+        self._bytes += imageBytes
+
+        # am längsten nicht verwendete Bilder entfernen
+        while self._bytes > self.maxBytes:
+            _, oldImage = self._images.popitem(last=False)
+            self._bytes -= self._imageBytes(oldImage)
+
+    def _imageBytes(self, image):
+        # PIL speichert mehrkanalige 8-Bit-Bilder mit 4 Bytes je Pixel
+        bands = len(image.getbands())
+        return image.width * image.height * (4 if bands > 1 or image.mode in ("I", "F") else 1)
+
+    def _view(self, image):
+        view = image._new(image.im)
+        view.readonly = 1
+        return view
+
+
+imageCache = ImageCache()
@@ -1,36 +1,86 @@
 import math
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from PIL import Image
+from osgeo import gdal
 from qgis.analysis import QgsGcpTransformerInterface
 from qgis.core import QgsPointXY
 
+from .image_cache import imageCache
+
 
 class ImageGeoref:
+    # Kantenlänge der Kacheln beim Entzerren in Pixel
+    tileSize = 1024
+    # maximaler Speicher (Bytes) für gleichzeitig berechnete Kacheln (ohne Quell- und Zielbild)
+    tileMemoryBudget = 256 * 1024 * 1024
+    # Anzahl der Threads (None - Anzahl der Prozessoren)
+    maxWorkers = None
+    # Entzerrung mit "pil" oder "gdal"
+    backend = "pil"
+    # Speicherlimit für gdal.Warp in MB
+    warpMemoryLimit = 512
+
     def __init__(self):
         self.image_file_in = ""
         self.image_file_out = ""
         self.gcp_points = ""
         self.crs = ""
+        self.feedback = None
 
-    def run_georef(self, georefData, crs, imageFileIn, imageFileOut):
+    ## \brief Entzerrt das Profilfoto anhand der Passpunkte
+    #
+    # \param feedback optional, Objekt mit setProgress() und isCanceled() (z.B. QgsTask oder QgsFeedback)
+    # @returns "ok", "error" (zu wenige Passpunkte) oder "canceled"
+    def run_georef(self, georefData, crs, imageFileIn, imageFileOut, feedback=None):
         self.image_file_in = imageFileIn
         self.image_file_out = imageFileOut
         self.gcp_points = georefData
         self.crs = crs
+        self.feedback = feedback
 
         if len(self.gcp_points) < 4:
             return "error"
 
-        self._start_projective()
+        start = time.perf_counter()
+
+        if self.backend == "gdal":
+            done = self._start_gdal()
+        else:
+            done = self._start_projective()
+
+        if not done:
+            return "canceled"
+
+        print(f"Georeferenzierung ({self.backend}): {time.perf_counter() - start:.2f}s", self.image_file_out)
         return "ok"
 
+    def _set_progress(self, progress):
+        if self.feedback is not None:
+            self.feedback.setProgress(progress)
+
+    def _is_canceled(self):
+        return self.feedback is not None and self.feedback.isCanceled()
+
+    ## \brief Passpunkte im Bildraum (y negativ) und in der Profilebene
+    #
+    def _get_control_points(self):
+        src_cp = []
+        geo_cp = []
+        for point in self.gcp_points:
+            src_cp.append(QgsPointXY(float(point["input_x"]), float(point["input_z"]) * -1))
+            geo_cp.append(QgsPointXY(float(point["aar_x"]), float(point["aar_z"])))
+
+        return src_cp, geo_cp
+
     def _start_projective(self):
-        # source image
-        with Image.open(self.image_file_in) as imgOrg:
-            imgOrg.load()
-        src_w, src_h = imgOrg.size
-        imgOrg.close()
+        # source image (nur Header lesen, dekodiert wird einmalig in _img_transform)
+        src_w, src_h = imageCache.size(self.image_file_in)
 
         # vertices of source image (Ecken - Bildraum)
         src_ll = (0, -src_h)
@@ -40,11 +90,7 @@ class ImageGeoref:
 
         ############ QgsGcpTransformerInterface ##########
 
-        src_cp = []
-        geo_cp = []
-        for point in self.gcp_points:
-            src_cp.append(QgsPointXY(float(point["input_x"]), float(point["input_z"]) * -1))
-            geo_cp.append(QgsPointXY(float(point["aar_x"]), float(point["aar_z"])))
+        src_cp, geo_cp = self._get_control_points()
 
         # (1) get matrix for transformation T1 (src → geo) from 4...n control points
         transformMethod = QgsGcpTransformerInterface.TransformMethod(6)  # 6 - projective
@@ -125,11 +171,94 @@ class ImageGeoref:
         )
         coeffs = self._find_pill_coeffs(projectiveCoords, imgCoords)
 
-        self._img_transform(self.image_file_in, self.image_file_out, coeffs, dst_h, dst_w)
+        if not self._img_transform(self.image_file_in, self.image_file_out, coeffs, dst_h, dst_w):
+            return False
+
         worldfilePath = self.image_file_out[:-3] + "wld"
 
         self._write_world_file(worldfilePath, geo_ul, res_img)
 
+        return True
+
+    ## \brief Entzerrung mit GDAL
+    #
+    # Die Passpunkte werden einem VRT im Speicher (/vsimem) zugewiesen, das mit gdal.Warp
+    # mehrprozessorfähig in ein gekacheltes GeoTIFF entzerrt wird. Die Auflösung entspricht der PIL-Entzerrung.
+    # Für JPEG/PNG wird das Ergebnis anschließend mit World-File übersetzt.
+    #
+    def _start_gdal(self):
+        src_w, src_h = imageCache.size(self.image_file_in)
+
+        src_cp, geo_cp = self._get_control_points()
+
+        # Auflösung wie bei der PIL-Entzerrung über die Bilddiagonale bestimmen
+        transformMethod = QgsGcpTransformerInterface.TransformMethod(6)  # 6 - projective
+        qgisTransformer = QgsGcpTransformerInterface.createFromParameters(transformMethod, src_cp, geo_cp)
+        geo_vp_ul = qgisTransformer.transform(0, 0, False)[1:3]
+        geo_vp_lr = qgisTransformer.transform(src_w, -src_h, False)[1:3]
+        res_img = math.dist(geo_vp_ul, geo_vp_lr) / math.dist((0, 0), (src_w, -src_h))
+
+        # gdal.GCP(x, y, z, pixel, line)
+        gcps = [gdal.GCP(geo.x(), geo.y(), 0, src.x(), -src.y()) for src, geo in zip(src_cp, geo_cp)]
+
+        memPrefix = f"/vsimem/georef_{uuid.uuid4().hex}"
+        vrtPath = f"{memPrefix}.vrt"
+        warpPath = f"{memPrefix}.tif"
+
+        gdal.Translate(vrtPath, self.image_file_in, format="VRT", GCPs=gcps)
+
+        if int(gdal.VersionInfo()) >= 3110000:
+            # projektive Transformation (Homographie) ab GDAL 3.11
+            transformerOptions = dict(transformerOptions=["METHOD=GCP_HOMOGRAPHY"])
+        else:
+            print("GDAL < 3.11: keine Homographie verfügbar, es wird ein Polynom 1. Ordnung verwendet")
+            transformerOptions = dict(polynomialOrder=1)
+
+        outExtension = os.path.splitext(self.image_file_out)[1].lower()
+        isTiff = outExtension in (".tif", ".tiff")
+
+        def warpProgress(complete, message, data):
+            self._set_progress(100 * complete)
+            # 0 bricht gdal.Warp ab
+            return 0 if self._is_canceled() else 1
+
+        try:
+            result = gdal.Warp(
+                self.image_file_out if isTiff else warpPath,
+                vrtPath,
+                format="GTiff",
+                xRes=res_img,
+                yRes=res_img,
+                resampleAlg="cubic",
+                multithread=True,
+                warpMemoryLimit=self.warpMemoryLimit,
+                warpOptions=["NUM_THREADS=ALL_CPUS", "INIT_DEST=255"],
+                creationOptions=["TILED=YES", "TFW=YES"] if isTiff else ["TILED=YES"],
+                callback=warpProgress,
+                **transformerOptions,
+            )
+            if result is None or self._is_canceled():
+                return False
+            result = None
+
+            if not isTiff:
+                creationOptions = ["WORLDFILE=YES"]
+                if outExtension in (".jpg", ".jpeg"):
+                    creationOptions.append("QUALITY=100")
+
+                gdal.Translate(
+                    self.image_file_out,
+                    warpPath,
+                    format="JPEG" if outExtension in (".jpg", ".jpeg") else "PNG",
+                    creationOptions=creationOptions,
+                )
+        finally:
+            gdal.Unlink(vrtPath)
+            if not isTiff:
+                gdal.Unlink(warpPath)
+
+        return True
+
     def _find_pill_coeffs(self, pa, pb):
         # where pb is the four vertices in the current plane, and pa contains four vertices in the resulting plane.
         matrix = []
@@ -137,25 +266,129 @@ class ImageGeoref:
             matrix.append([p1[0], p1[1], 1, 0, 0, 0, -p2[0] * p1[0], -p2[0] * p1[1]])
             matrix.append([0, 0, 0, p1[0], p1[1], 1, -p2[1] * p1[0], -p2[1] * p1[1]])
 
-        A = np.matrix(matrix, dtype=np.float64)
-        B = np.array(pb).reshape(8)
+        A = np.array(matrix, dtype=np.float64)
+        B = np.array(pb, dtype=np.float64).reshape(8)
+
+        # Spalten skalieren und mit SVD lösen, statt die Normalgleichungsmatrix zu invertieren
+        scale = np.linalg.norm(A, axis=0)
+        scale[scale == 0] = 1.0
+        res = np.linalg.lstsq(A / scale, B, rcond=None)[0] / scale
 
-        res = np.dot(np.linalg.inv(A.T * A) * A.T, B)
-        return np.array(res).reshape(8)
+        return res
 
     def _img_transform(self, image_in, image_out, coeffs, heightDst, widthDst):
-        with Image.open(image_in) as img:
-            img.load()
-
-        img.transform(
-            size=(int(widthDst), int(heightDst)),
-            method=Image.PERSPECTIVE,
-            data=coeffs,
-            resample=Image.BICUBIC,
-            fillcolor="white",
-        ).save(image_out, quality=100)
-
-        img.close()
+        # dekodiertes Bild aus dem Cache (schreibgeschützte Ansicht)
+        img = imageCache.get(image_in)
+
+        imgDst = self._img_transform_tiled(img, coeffs, (int(widthDst), int(heightDst)))
+
+        if imgDst is None:
+            return False
+
+        imgDst.save(image_out, quality=100)
+        imgDst.close()
+
+        return True
+
+    ## \brief Perspektivische Entzerrung in Kacheln über einen Thread-Pool
+    #
+    # PIL gibt beim Resampling den GIL frei, daher werden die Kacheln parallel berechnet
+    # und sofort in das Zielbild kopiert. tileMemoryBudget begrenzt nur die gleichzeitig
+    # berechneten Kacheln, Quell- und Zielbild liegen immer vollständig im Speicher.
+    # Bilder mit Alphakanal werden einmal vorab in den vormultiplizierten Modus (RGBa/La)
+    # umgewandelt, sonst würde PIL bei jeder Kachel das ganze Quellbild umwandeln.
+    #
+    # Im Inneren entspricht das Ergebnis der Entzerrung in einem Stück. Entlang der Kante des
+    # Quellbildes können einzelne Pixel abweichen (Bildinhalt statt Füllfarbe oder umgekehrt),
+    # da die je Kachel verschobenen Koeffizienten anders gerundet werden.
+    #
+    # @returns Zielbild oder None, wenn abgebrochen wurde
+    def _img_transform_tiled(self, img, coeffs, size):
+        widthDst, heightDst = size
+
+        mode = img.mode
+        premultipliedMode = {"LA": "La", "RGBA": "RGBa"}.get(mode)
+        if premultipliedMode is not None:
+            img = img.convert(premultipliedMode)
+
+        imgDst = Image.new(img.mode, size, "white")
+
+        tiles = [
+            (x0, y0, min(self.tileSize, widthDst - x0), min(self.tileSize, heightDst - y0))
+            for y0 in range(0, heightDst, self.tileSize)
+            for x0 in range(0, widthDst, self.tileSize)
+        ]
+
+        bytesPerTile = self.tileSize * self.tileSize * max(len(img.getbands()), 1)
+        maxTilesInFlight = max(1, self.tileMemoryBudget // bytesPerTile)
+        workers = max(1, min(self.maxWorkers or os.cpu_count() or 1, maxTilesInFlight))
+
+        def transformTile(tile):
+            x0, y0, w, h = tile
+            return img.transform(
+                size=(w, h),
+                method=Image.PERSPECTIVE,
+                data=self._tile_coeffs(coeffs, x0, y0),
+                resample=Image.BICUBIC,
+                fillcolor="white",
+            )
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            remaining = iter(tiles)
+            done = 0
+            while True:
+                # Kacheln bis zum Speicherbudget einreihen
+                for tile in remaining:
+                    pending.append((tile, executor.submit(transformTile, tile)))
+                    if len(pending) >= maxTilesInFlight:
+                        break
+
+                if not pending:
+                    break
+
+                self._paste_tile(imgDst, *pending.popleft())
+                done += 1
+                self._set_progress(100 * done / len(tiles))
+
+                if self._is_canceled():
+                    for _, future in pending:
+                        future.cancel()
+                    imgDst.close()
+                    if premultipliedMode is not None:
+                        img.close()
+                    return None
+
+        if premultipliedMode is not None:
+            img.close()
+            imgPremultiplied = imgDst
+            imgDst = imgPremultiplied.convert(mode)
+            imgPremultiplied.close()
+
+        return imgDst
+
+    def _paste_tile(self, imgDst, tile, future):
+        imgTile = future.result()
+        imgDst.paste(imgTile, (tile[0], tile[1]))
+        imgTile.close()
+
+    ## \brief Koeffizienten der Perspektivtransformation für eine Kachel mit Versatz (x0, y0)
+    #
+    def _tile_coeffs(self, coeffs, x0, y0):
+        a, b, c, d, e, f, g, h = coeffs
+
+        # Zielkoordinaten der Kachel um (x0, y0) verschoben, Nenner wieder auf 1 normiert
+        denom = g * x0 + h * y0 + 1
+        return (
+            a / denom,
+            b / denom,
+            (a * x0 + b * y0 + c) / denom,
+            d / denom,
+            e / denom,
+            (d * x0 + e * y0 + f) / denom,
+            g / denom,
+            h / denom,
+        )
 
     def _write_world_file(self, worldfilePath, geo_ul, res_img):
         pixelwidth = res_img
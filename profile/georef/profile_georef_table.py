@@ -448,72 +448,61 @@ class GeorefTable(QTableWidget):
     def updateErrorValues(self, linkObj):
         georefData = self.dataStoreGeoref.getGeorefData(self.directionAAR)
 
+        targetByUuid = {}
+        for targetObj in self.targetGCP:
+            targetByUuid.setdefault(targetObj["obj_uuid"], []).append(targetObj)
+
         gcpArray = []
         for georefObj in georefData:
-            for targetObj in self.targetGCP:
-                if targetObj["obj_uuid"] == georefObj["obj_uuid"]:
-                    gcpArray.append(
-                        [
-                            georefObj["input_x"],
-                            georefObj["input_z"],
-                            targetObj["x"],
-                            targetObj["z"],
-                            targetObj["obj_uuid"],
-                        ]
-                    )
+            for targetObj in targetByUuid.get(georefObj["obj_uuid"], []):
+                gcpArray.append(
+                    [
+                        georefObj["input_x"],
+                        georefObj["input_z"],
+                        targetObj["x"],
+                        targetObj["z"],
+                        targetObj["obj_uuid"],
+                    ]
+                )
 
         self.hide()
 
         rowCount = self.rowCount()
         columnCount = self.columnCount()
 
-        if len(georefData) > 4:
-            V_X, V_Y, V_XY, V_XY_uuid, mo, mox, moy = self.res.projective_trans(np.array(gcpArray))
-
-            for i in range(0, rowCount):
-                tblPointUuid = None
-
-                for j in range(0, columnCount):
-                    head = self.horizontalHeaderItem(j).text()
-
-                    if head == "UUID":
-                        tblPointUuid = self.item(i, j).text()
+        headers = [self.horizontalHeaderItem(j).text() for j in range(0, columnCount)]
+        errorColumns = [j for j, head in enumerate(headers) if head == "Error"]
 
-                # in Zelle der Tabelle eintragen
-                for j in range(0, columnCount):
-                    head = self.horizontalHeaderItem(j).text()
+        errorByUuid = {}
+        if len(georefData) > 4:
+            residuals = self.res.calculate(np.array(gcpArray), "projective")
+            errorByUuid = {errorObj["obj_uuid"]: errorObj["v_xy"] for errorObj in residuals["v_xy_uuid"]}
 
-                    if head == "Error":
-                        self.item(i, j).setText(str(-99999))
-                        self.setRowColor(i, self.whiteBrush)
-                        for errorObj in V_XY_uuid:
-                            if errorObj["obj_uuid"] == tblPointUuid:
-                                self.item(i, j).setText(str(round(errorObj["v_xy"], 4)))
+        for i in range(0, rowCount):
+            tblPointUuid = None
+            if "UUID" in headers:
+                tblPointUuid = self.item(i, headers.index("UUID")).text()
 
-                                for cat in self.errorColors:
-                                    if (
-                                        cat["last"] is False
-                                        and cat["first"] is False
-                                        and cat["min"] < errorObj["v_xy"] <= cat["max"]
-                                    ):
-                                        self.setRowColor(i, cat["color"])
+            # in Zelle der Tabelle eintragen
+            for j in errorColumns:
+                self.item(i, j).setText(str(-99999))
+                self.setRowColor(i, self.whiteBrush)
 
-                                    if cat["last"] is True and errorObj["v_xy"] > cat["min"]:
-                                        self.setRowColor(i, cat["color"])
+                if tblPointUuid not in errorByUuid:
+                    continue
 
-                                    if cat["first"] is True and errorObj["v_xy"] < cat["max"]:
-                                        self.setRowColor(i, cat["color"])
+                v_xy = errorByUuid[tblPointUuid]
+                self.item(i, j).setText(str(round(v_xy, 4)))
 
-        else:
-            for i in range(0, rowCount):
-                # in Zelle der Tabelle eintragen
-                for j in range(0, columnCount):
-                    head = self.horizontalHeaderItem(j).text()
+                for cat in self.errorColors:
+                    if cat["last"] is False and cat["first"] is False and cat["min"] < v_xy <= cat["max"]:
+                        self.setRowColor(i, cat["color"])
 
-                    if head == "Error":
-                        self.item(i, j).setText(str(-99999))
+                    if cat["last"] is True and v_xy > cat["min"]:
+                        self.setRowColor(i, cat["color"])
 
-                        self.setRowColor(i, self.whiteBrush)
+                    if cat["first"] is True and v_xy < cat["max"]:
+                        self.setRowColor(i, cat["color"])
 
         self.show()
 
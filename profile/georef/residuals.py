@@ -1,106 +1,148 @@
-import math
-
 import numpy as np
-from qgis.analysis import QgsGcpTransformerInterface
-from qgis.core import QgsPointXY
 
 
 class Residuals:
     def __init__(self):
         pass
 
-    # HELMERT TRANSFORMATIONS
-    def projective_trans(self, gcps_uuid):  # cgps is numpy.array [x, y, Xmap, Ymap]
-        gcps = gcps_uuid[:, 0:4].astype(np.float64)
-
-        n = len(gcps)
-
-        src_cp = []
-        geo_cp = []
-        for point in gcps:
-            src_cp.append(QgsPointXY(float(point[0]), float(point[1]) * -1))
-            geo_cp.append(QgsPointXY(float(point[2]), float(point[3])))
-
-        transformMethod = QgsGcpTransformerInterface.TransformMethod(6)  # 6 - projective
-        qgisTransformer = QgsGcpTransformerInterface.createFromParameters(transformMethod, src_cp, geo_cp)
-
-        Xi = []
-        Yi = []
-        for point in gcps:
-            checkPoint = qgisTransformer.transform(float(point[0]), float(point[1]) * -1, False)[1:3]
-            Xi.append(checkPoint[0])
-            Yi.append(checkPoint[1])
+    ## \brief Residuals of the control points for the projective or Helmert transformation
+    #
+    # All calculations are vectorized in float64 with centred coordinates.
+    #
+    # \param gcps_uuid numpy.array [x, y, Xmap, Ymap, obj_uuid]
+    # \param method "projective" or "helmert"
+    # @returns dict with per-point residuals (v_x, v_y, v_xy, v_xy_uuid), RMSE (mo, mox, moy),
+    #          condition number of the design matrix (cond) and the transformation parameters (params)
+    def calculate(self, gcps_uuid, method="projective"):
+        gcps = np.asarray(gcps_uuid)[:, 0:4].astype(np.float64)
+
+        src = gcps[:, 0:2]
+        dst = gcps[:, 2:4]
+
+        if method == "helmert":
+            transformed, cond, params = self._helmert(src, dst)
+        else:
+            # Bildkoordinaten: y nach unten, daher wie bei der Entzerrung gespiegelt
+            transformed, cond, params = self._projective(src * (1, -1), dst)
 
         # JANEK compare calculated values to "clicked" ones
-        V_X = Xi - gcps[:, 2]
-        V_Y = Yi - gcps[:, 3]
-        V_XY = np.sqrt(V_X * V_X + V_Y * V_Y)
-
-        V_XY_uuid = []
-        V_XY_sum_sq, V_X_sum_sq, V_Y_sum_sq = 0, 0, 0
-        for i in range(n):
-            V_XY_sum_sq += V_XY[i] * V_XY[i]
-            V_X_sum_sq += V_X[i] * V_X[i]
-            V_Y_sum_sq += V_Y[i] * V_Y[i]
-
-            V_XY_uuid.append({"v_xy": V_XY[i], "obj_uuid": gcps_uuid[i, 4]})
-
-        mo = math.sqrt(V_XY_sum_sq / (n))  # avarage error
-        mox = math.sqrt(V_X_sum_sq / (n))  # avarage x error
-        moy = math.sqrt(V_Y_sum_sq / (n))  # avarage y error
-
-        return V_X, V_Y, V_XY, V_XY_uuid, mo, mox, moy
+        V_X = transformed[:, 0] - dst[:, 0]
+        V_Y = transformed[:, 1] - dst[:, 1]
+        V_XY = np.hypot(V_X, V_Y)
+
+        V_XY_uuid = [
+            {"v_xy": v_xy, "obj_uuid": obj_uuid} for v_xy, obj_uuid in zip(V_XY, np.asarray(gcps_uuid)[:, 4])
+        ]
+
+        return {
+            "v_x": V_X,
+            "v_y": V_Y,
+            "v_xy": V_XY,
+            "v_xy_uuid": V_XY_uuid,
+            "mo": float(np.sqrt(np.mean(V_XY * V_XY))),  # avarage error
+            "mox": float(np.sqrt(np.mean(V_X * V_X))),  # avarage x error
+            "moy": float(np.sqrt(np.mean(V_Y * V_Y))),  # avarage y error
+            "cond": cond,
+            "params": params,
+        }
+
+    # PROJECTIVE TRANSFORMATION
+    def projective_trans(self, gcps_uuid):  # cgps is numpy.array [x, y, Xmap, Ymap]
+        result = self.calculate(gcps_uuid, "projective")
+
+        return (
+            result["v_x"],
+            result["v_y"],
+            result["v_xy"],
+            result["v_xy_uuid"],
+            result["mo"],
+            result["mox"],
+            result["moy"],
+        )
 
     # HELMERT  TRANSFORMATIONS
     def helm_trans(self, gcps_uuid):  # cgps is numpy.array [x, y, Xmap, Ymap]
-
-        gcps = gcps_uuid[:, 0:4].astype(np.float32)
-
-        n = len(gcps)
-
-        xo, yo, Xo, Yo = 0.0, 0.0, 0.0, 0.0
-
+        result = self.calculate(gcps_uuid, "helmert")
+
+        return (
+            result["v_x"],
+            result["v_y"],
+            result["v_xy"],
+            result["v_xy_uuid"],
+            result["mo"],
+            result["mox"],
+            result["moy"],
+            result["params"],
+        )
+
+    ## \brief Projective transformation (homography) from 4...n points
+    #
+    # Direct linear transformation with normalized coordinates (centroid in origin,
+    # mean distance sqrt(2)), solved with SVD.
+    def _projective(self, src, dst):
+        src_n, T_src = self._normalize(src)
+        dst_n, T_dst = self._normalize(dst)
+
+        n = len(src)
+        ones = np.ones(n)
+        zeros = np.zeros((n, 3))
+        src_h = np.column_stack((src_n, ones))
+
+        A = np.empty((2 * n, 9))
+        A[0::2] = np.hstack((-src_h, zeros, dst_n[:, 0:1] * src_h))
+        A[1::2] = np.hstack((zeros, -src_h, dst_n[:, 1:2] * src_h))
+
+        _, s, Vt = np.linalg.svd(A)
+        H = np.linalg.inv(T_dst) @ Vt[-1].reshape(3, 3) @ T_src
+        H = H / H[2, 2]
+
+        # 8 Unbekannte: Verhältnis größter zu achtem Singulärwert
+        cond = float(s[0] / s[7]) if len(s) >= 8 and s[7] > 0 else float("inf")
+
+        p = np.column_stack((src, ones)) @ H.T
+        transformed = p[:, 0:2] / p[:, 2:3]
+
+        return transformed, cond, H
+
+    def _normalize(self, points):
+        center = points.mean(axis=0)
+        mean_dist = np.mean(np.hypot(*(points - center).T))
+        scale = np.sqrt(2.0) / mean_dist if mean_dist > 0 else 1.0
+
+        T = np.array([[scale, 0.0, -scale * center[0]], [0.0, scale, -scale * center[1]], [0.0, 0.0, 1.0]])
+
+        return (points - center) * scale, T
+
+    ## \brief Helmert transformation (similarity) from 2...n points
+    #
+    # a,b,c,d are transformation parameters X = c + b*x - a*y / Y = d + a*x + b*y
+    def _helmert(self, src, dst):
         # JANEK calculate center of gravity
-        for i in range(n):
-            xo, yo, Xo, Yo = xo + gcps[i, 0], yo + gcps[i, 1], Xo + gcps[i, 2], Yo + gcps[i, 3]
-
-        xo, yo, Xo, Yo = xo / n, yo / n, Xo / n, Yo / n
+        xo, yo = src.mean(axis=0)
+        Xo, Yo = dst.mean(axis=0)
 
-        del_x, del_y, del_X, del_Y = gcps[:, 0] - xo, gcps[:, 1] - yo, gcps[:, 2] - Xo, gcps[:, 3] - Yo
+        del_x, del_y = src[:, 0] - xo, src[:, 1] - yo
+        del_X, del_Y = dst[:, 0] - Xo, dst[:, 1] - Yo
 
         # JANEK calculation of unknowns
-        a_up, a_down, b_up, b_down = 0, 0, 0, 0
-        for i in range(n):
-            a_up += del_x[i] * del_Y[i] - del_y[i] * del_X[i]
-            a_down += del_x[i] * del_x[i] + del_y[i] * del_y[i]
-            b_up += del_x[i] * del_X[i] + del_y[i] * del_Y[i]
-
-        b_down = a_down
-        a = a_up / a_down
-        b = b_up / b_down
+        a_down = np.sum(del_x * del_x + del_y * del_y)
+        a = np.sum(del_x * del_Y - del_y * del_X) / a_down
+        b = np.sum(del_x * del_X + del_y * del_Y) / a_down
         c = yo * a - xo * b + Xo
-        d = -xo * a - yo * b + Yo  # a,b,c,d are transformation parameters X = c + b*x - a*y / Y = d + a*x + b*y
+        d = -xo * a - yo * b + Yo
+
+        # Designmatrix für (a, b, c, d) in Schwerpunktkoordinaten
+        n = len(src)
+        A = np.vstack(
+            (
+                np.column_stack((-del_y, del_x, np.ones(n), np.zeros(n))),
+                np.column_stack((del_x, del_y, np.zeros(n), np.ones(n))),
+            )
+        )
+        cond = float(np.linalg.cond(A))
 
         # JANEK calculate new coordinates for points based on transformation values
-        Xi = (gcps[:, 0] - xo) * b - (gcps[:, 1] - yo) * a + Xo
-        Yi = (gcps[:, 0] - xo) * a + (gcps[:, 1] - yo) * b + Yo
-
-        # JANEK compare calculated values to "clicked" ones
-        V_X = Xi - gcps[:, 2]
-        V_Y = Yi - gcps[:, 3]
-        V_XY = np.sqrt(V_X * V_X + V_Y * V_Y)
-
-        V_XY_uuid = []
-        V_XY_sum_sq, V_X_sum_sq, V_Y_sum_sq = 0, 0, 0
-        for i in range(n):
-            V_XY_sum_sq += V_XY[i] * V_XY[i]
-            V_X_sum_sq += V_X[i] * V_X[i]
-            V_Y_sum_sq += V_Y[i] * V_Y[i]
-
-            V_XY_uuid.append({"v_xy": V_XY[i], "obj_uuid": gcps_uuid[i, 4]})
-
-        mo = math.sqrt(V_XY_sum_sq / (n))  # avarage error
-        mox = math.sqrt(V_X_sum_sq / (n))  # avarage x error
-        moy = math.sqrt(V_Y_sum_sq / (n))  # avarage y error
+        Xi = del_x * b - del_y * a + Xo
+        Yi = del_x * a + del_y * b + Yo
 
-        return V_X, V_Y, V_XY, V_XY_uuid, mo, mox, moy, [a, b, c, d]
+        return np.column_stack((Xi, Yi)), cond, [a, b, c, d]
@@ -5,7 +5,7 @@ from glob import glob
 from shutil import rmtree
 
 import processing
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QDate, QDateTime, QTime
 from osgeo import ogr
 from qgis.PyQt.QtCore import QVariant
 from qgis.core import (
@@ -272,7 +272,7 @@ class Plan:
             filterRect = req.setFilterRect(bbox)
             featsSel = lineLayer.getFeatures(filterRect)
 
-        selFeatures = []
+        profileFeatures = []
         for feature in featsSel:
             if feature["geo_quelle"] != "profile_object":
                 continue
@@ -281,13 +281,18 @@ class Plan:
                     (profile_number and feature["prof_nr"] == profile_number) or
                     (not profile_number and feature.geometry().within(bufferGeometry))
             ):
-                rotFeature = QgsFeature(lineLayer.fields())
+                profileFeatures.append(feature)
 
-                rotateGeom = self.rotationCoords.rotateLineFeatureFromOrg(feature, self.aar_direction)
-                rotFeature.setGeometry(rotateGeom)
-                rotFeature.setAttributes(feature.attributes())
+        # alle Geometrien in einem Durchlauf in die Profilebene drehen
+        rotateGeoms = self.rotationCoords.rotateGeometriesFromOrg(profileFeatures, self.aar_direction)
 
-                selFeatures.append(rotFeature)
+        selFeatures = []
+        for feature, rotateGeom in zip(profileFeatures, rotateGeoms):
+            rotFeature = QgsFeature(lineLayer.fields())
+            rotFeature.setGeometry(rotateGeom)
+            rotFeature.setAttributes(feature.attributes())
+
+            selFeatures.append(rotFeature)
 
         return selFeatures
 
@@ -303,7 +308,7 @@ class Plan:
             filterRect = req.setFilterRect(bbox)
             featsSel = polygonLayer.getFeatures(filterRect)
 
-        selFeatures = []
+        profileFeatures = []
         for feature in featsSel:
             if feature["geo_quelle"] != "profile_object":
                 continue
@@ -312,13 +317,18 @@ class Plan:
                     (profile_number and feature["prof_nr"] == profile_number) or
                     (not profile_number and feature.geometry().within(bufferGeometry))
             ):
-                rotFeature = QgsFeature(polygonLayer.fields())
+                profileFeatures.append(feature)
 
-                rotateGeom = self.rotationCoords.rotatePolygonFeatureFromOrg(feature, self.aar_direction)
-                rotFeature.setGeometry(rotateGeom)
-                rotFeature.setAttributes(feature.attributes())
+        # alle Geometrien in einem Durchlauf in die Profilebene drehen
+        rotateGeoms = self.rotationCoords.rotateGeometriesFromOrg(profileFeatures, self.aar_direction)
 
-                selFeatures.append(rotFeature)
+        selFeatures = []
+        for feature, rotateGeom in zip(profileFeatures, rotateGeoms):
+            rotFeature = QgsFeature(polygonLayer.fields())
+            rotFeature.setGeometry(rotateGeom)
+            rotFeature.setAttributes(feature.attributes())
+
+            selFeatures.append(rotFeature)
 
         return selFeatures
 
@@ -405,6 +415,12 @@ class Plan:
                 data_provider_set.add(data_provider)
         geopackage_path = list(data_provider_set)[0]
 
+        # nur die Zeilen des aktuellen Profils ersetzen, wenn der Layer schon existiert:
+        if self.__writeLayerIncremental(inputLayer, selFeatures, geopackage_path, layer_name):
+            if was_vsi_cached:
+                set_vsi_cached(True)
+            return
+
         # get all layers of gpkg:
         geopackage_layers = []
         all_project_layer = QgsVectorLayer(geopackage_path, "", "ogr")
@@ -512,6 +528,117 @@ class Plan:
         if was_vsi_cached:
             set_vsi_cached(True)
 
+    ## \brief Schreibt die Features des aktuellen Profils inkrementell in den vorhandenen GeoPackage-Layer
+    #
+    # Innerhalb einer SQLite-Transaktion werden nur die Zeilen der aktuellen Profilnummer gelöscht und die
+    # neuen Features eingefügt. Existiert der Layer noch nicht oder fehlen ihm Felder, wird False zurückgegeben
+    # und der Layer muss vollständig geschrieben werden.
+    #
+    # @returns True, wenn die Features geschrieben wurden
+    def __writeLayerIncremental(self, inputLayer, selFeatures, geopackage_path, layer_name):
+        is_gcp = inputLayer.name() == "gcp_points"
+
+        ds = ogr.Open(geopackage_path, update=1)
+        if ds is None:
+            print(f"Could not open {geopackage_path}")
+            return False
+
+        ogr_layer = ds.GetLayerByName(layer_name)
+        if ogr_layer is None:
+            ds = None
+            return False
+
+        layer_defn = ogr_layer.GetLayerDefn()
+        gpkg_fields = [layer_defn.GetFieldDefn(i).GetName() for i in range(layer_defn.GetFieldCount())]
+        fid_column = ogr_layer.GetFIDColumn()
+
+        input_fields = [field.name() for field in inputLayer.fields()]
+        extra_field = "prof_nr" if is_gcp else "aar_direction"
+        write_fields = [name for name in input_fields + [extra_field] if name != fid_column]
+
+        if any(name not in gpkg_fields for name in write_fields):
+            print(f"{layer_name}: Felder weichen ab, Layer wird vollständig geschrieben")
+            ds = None
+            return False
+
+        # (OLD gcp table has profil_nr) E_* tables have prof_nr
+        prof_columns = [name for name in ("prof_nr", "profil_nr") if name in gpkg_fields]
+        if not prof_columns:
+            ds = None
+            return False
+
+        table = layer_name.replace('"', '""')
+        prof_nr = str(self.prof_nr).replace("'", "''")
+
+        index_columns = ", ".join(f'"{name}"' for name in prof_columns + ["aar_direction"] if name in gpkg_fields)
+        index_sql = f'CREATE INDEX IF NOT EXISTS "idx_{table}_prof_nr" ON "{table}" ({index_columns})'
+        delete_sql = f'DELETE FROM "{table}" WHERE ' + " OR ".join(
+            f"\"{name}\" = '{prof_nr}'" for name in prof_columns
+        )
+
+        ds.StartTransaction()
+        try:
+            # NULL als fid: das Geopackage vergibt eine neue fid
+            fids = []
+            if fid_column and fid_column in input_fields:
+                fid_index = input_fields.index(fid_column)
+                fids = [self.__fidValue(feature.attributes()[fid_index]) for feature in selFeatures]
+
+            ds.ExecuteSQL(index_sql)
+            ds.ExecuteSQL(delete_sql)
+
+            # Features mit gleicher fid aus anderen Profilen werden ersetzt
+            setFids = [fid for fid in fids if fid is not None]
+            for start in range(0, len(setFids), 500):
+                fid_list = ", ".join(str(fid) for fid in setFids[start:start + 500])
+                ds.ExecuteSQL(f'DELETE FROM "{table}" WHERE "{fid_column}" IN ({fid_list})')
+
+            for i, feature in enumerate(selFeatures):
+                values = dict(zip(input_fields, feature.attributes()))
+                values["aar_direction"] = self.aar_direction
+                if is_gcp:
+                    values["prof_nr"] = self.prof_nr
+
+                ogr_feature = ogr.Feature(layer_defn)
+                for name in write_fields:
+                    self.__setOgrFieldValue(ogr_feature, name, values.get(name))
+
+                if fids and fids[i] is not None:
+                    ogr_feature.SetFID(fids[i])
+
+                if feature.hasGeometry():
+                    ogr_feature.SetGeometry(ogr.CreateGeometryFromWkb(bytes(feature.geometry().asWkb())))
+
+                if ogr_layer.CreateFeature(ogr_feature) != ogr.OGRERR_NONE:
+                    raise RuntimeError(f"Feature {i} could not be written")
+
+            ds.CommitTransaction()
+        except Exception as e:
+            ds.RollbackTransaction()
+            print(f"ERROR {layer_name} incremental write: {e}")
+            ds = None
+            return False
+
+        ds = None  # Close the datasource
+        print(len(selFeatures), "features are written to:", geopackage_path, layer_name)
+
+        return True
+
+    def __fidValue(self, value):
+        if value is None or (isinstance(value, QVariant) and value.isNull()):
+            return None
+        return int(value)
+
+    def __setOgrFieldValue(self, ogr_feature, name, value):
+        if value is None or (isinstance(value, QVariant) and value.isNull()):
+            ogr_feature.SetFieldNull(name)
+        elif isinstance(value, (QDate, QDateTime, QTime)):
+            ogr_feature.SetField(name, value.toString(Qt.ISODate))
+        elif isinstance(value, bool):
+            ogr_feature.SetField(name, int(value))
+        else:
+            ogr_feature.SetField(name, value)
+
     def __delete_profile_number(self, gpkg_path, layer_name, profile_number):
         layer = QgsVectorLayer(f"{gpkg_path}|layername={layer_name}", layer_name, "ogr")
         if not layer.isValid():
@@ -263,40 +263,31 @@ class ErrorHandler(object):
 
         slope = linegress[0]
 
-        # predict points on line
-
-        for i in range(len(xw)):
-
-            # Predict the value for the minmal x
-
-            if xw[i] == min(xw):
-                x1pred = xw[i]
-
-                y1pred = intercept + slope * xw[i]
+        xw = np.asarray(xw, dtype=float)
 
-                p1 = np.array([x1pred, y1pred])
+        yw = np.asarray(yw, dtype=float)
 
-            # Predict the value for the maximal x
-
-            if xw[i] == max(xw):
-                x2pred = xw[i]
-
-                y2pred = intercept + slope * xw[i]
+        # predict points on line
 
-                # p2 =  scipy.array([x2pred, y2pred])
+        # Predict the value for the minmal x
+        x1pred = np.min(xw)
+        y1pred = intercept + slope * x1pred
+        p1 = np.array([x1pred, y1pred])
 
-                p2 = np.array([x2pred, y2pred])
+        # Predict the value for the maximal x
+        x2pred = np.max(xw)
+        y2pred = intercept + slope * x2pred
+        p2 = np.array([x2pred, y2pred])
 
         # Calculate the distance from every point to the line.
 
-        distance = []
-
         # Export this value to every point, and give a sum of all distances indicator:
         # sum = 0, fine; sum = max point (this is the bad one) ; sum > max point (maybe more than one are bad)
 
-        for i in range(len(xw)):
-            p3 = np.array([xw[i], yw[i]])
+        # 2D cross product of (p2 - p1) and (p1 - p3) for all points at once
+        direction = p2 - p1
+        cross = direction[0] * (p1[1] - yw) - direction[1] * (p1[0] - xw)
 
-            distance.append(np.linalg.norm(np.cross(p2 - p1, p1 - p3)) / np.linalg.norm(p2 - p1))
+        distance = np.abs(cross) / np.linalg.norm(direction)
 
-        return distance
+        return distance.tolist()
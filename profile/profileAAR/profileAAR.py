@@ -52,12 +52,43 @@
 
 """
 
+from concurrent.futures import ProcessPoolExecutor
+
 # the magic happens here
 from .transformation import MagicBox
 from .transformation import sectionCalc
 from ..publisher import Publisher
 
 
+def transformProfile(coord_proc, method, direction):
+    """Rectify a single profile
+
+    Module level function, so that it can be sent to a process pool.
+    Returns the result of MagicBox.transformation() with the height point
+    and the cutting line of this profile.
+    """
+
+    magicbox = MagicBox()
+
+    # Calculating the profile
+    transform_return = magicbox.transformation(coord_proc, method, direction)
+
+    # If checked, the upper right point has to be exportet as point
+    transform_return["height_point"] = magicbox.height_points(transform_return["coord_trans"])
+
+    cutting_line = sectionCalc(
+        coord_proc,
+        transform_return["cutting_start"],
+        transform_return["linegress"],
+        transform_return["ns_error"],
+    )
+
+    transform_return["transformationParams"]["cutting_line"] = [cutting_line]
+    transform_return["transformationParams"]["aar_direction"] = direction
+
+    return transform_return
+
+
 class ProfileAAR(object):
     """QGIS Plugin Implementation."""
 
@@ -71,131 +102,84 @@ class ProfileAAR(object):
     def run(self, data):
         """Run method that performs all the real work"""
 
-        magicbox = MagicBox()
+        for transform_return in self.runBatch(data).values():
+            self.pup.publish("aarPointsChanged", transform_return)
 
-        """DEFINE OUTPUT PATH"""
+    def runBatch(self, data, maxWorkers=None):
+        """Rectify all profiles of the input data
 
-        """TODO check input data"""
+        The input is grouped once by profile number, every profile is
+        rectified on its own. With maxWorkers > 1 the profiles are
+        calculated in a process pool (inside QGIS on Windows this needs
+        multiprocessing.set_executable() pointing to a python executable).
+
+        Returns a dict profile name -> result of transformProfile()
+        """
 
         result = data[0]
         transform_param = data[1]
-        if result:
-
-            """GET INPUT FROM GUI TO VARIABLES/PREPARE LIST OF DATA"""
-
-            # GET TEXT FROM METHOD AND DIRECTION
-            # Read the method that is selected
-            method = transform_param["method"]
-
-            # read the direction, that is selected
-            direction = transform_param["direction"]
 
-            # PREPARE DATA LIST
-            # Go thought all data rows in the selected layer
+        if not result:
+            return {}
 
-            iter = result
+        """GET INPUT FROM GUI TO VARIABLES/PREPARE LIST OF DATA"""
 
-            # list for the data
-            coord = []
+        # GET TEXT FROM METHOD AND DIRECTION
+        # Read the method that is selected
+        method = transform_param["method"]
 
-            # list for the different profile names
-            profile_names = []
+        # read the direction, that is selected
+        direction = transform_param["direction"]
 
-            point_id = 0
+        profiles = self.groupProfiles(result)
 
-            for feature in iter:
+        """WORK ON EVERY PROFILE"""
 
-                # retrieve every feature with its geometry and attributes
-                view = feature[3]
-                profileName = feature[4]
+        # TODO checks - ErrorHandler.singleprofile()
 
-                # fetch geometry
-                # for p in feature:
-                # getting x and y coordinate
-                x = round(feature[0], 3)
-                y = round(feature[1], 3)
-                z = round(feature[2], 3)
-                use = feature[5]
-                obj_uuid = feature[6]
+        if maxWorkers is not None and maxWorkers > 1 and len(profiles) > 1:
+            with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+                futures = {
+                    profileName: executor.submit(transformProfile, coord_proc, method, direction)
+                    for profileName, coord_proc in profiles.items()
+                }
+                return {profileName: future.result() for profileName, future in futures.items()}
 
-                # write coordinates and attributes (view, profile and z) in a list
-                # add an ID to each point
+        return {
+            profileName: transformProfile(coord_proc, method, direction)
+            for profileName, coord_proc in profiles.items()
+        }
 
-                point_id += 1
+    def groupProfiles(self, features):
+        """PREPARE DATA LIST
 
-                coord.append([x, y, z, view, profileName, use, point_id, obj_uuid])
-
-                # write a list of profilenames (unique entries)
-                if profileName not in profile_names:
-                    profile_names.append(profileName)
-
-            """WORK ON EVERY PROFILE IN LOOP"""
-
-            # CREATE A LIST OF DATA FOR EVERY PROFILE
-            # select every single profile in a loop
-            coord_trans = []
-            height_points = []
-            cutting_line = []
-
-            for i in range(len(profile_names)):
-                # instantiate a temporary list for a single profile
-                coord_proc = []
-
-                # instantiate list for the view to check if all entries in one profile are the same
-                view_check = []
-
-                # instantiate list for the selection to check if all entries in one profile are the same
-                selection_check = []
-
-                # iterate through the features in coord, if the profilename matches store the features
-                # datalist in templist
-
-                for x in range(len(coord)):
-                    coord_proc.append(coord[x])
-
-                    # write the unique view values in the checklist
-                    if coord[x][1] not in view_check:
-                        view_check.append(coord[x][1])
-
-                    # write the unique selection values in the checklist
-                    if coord[x][4] not in selection_check:
-                        selection_check.append(coord[x][3])
-
-                # Handle Errors depending on the attributes in the fields
-
-                # Errorhandling: Checking the single Profiles for inconsestency
-
-                # Therefore we need the data of the actual profile, the view_check with the view values
-                # and actual profile name, selection is 0 or 1
+        Go through all data rows once and group them by profile name.
+        Returns a dict profile name -> list of [x, y, z, view, profileName, use, point_id, obj_uuid]
+        in the order of the input.
+        """
 
-                # TODO checks
-                profileCheck, fieldCheck, inputCheck = False, False, False
+        profiles = {}
 
-                if fieldCheck is False and inputCheck is False:
-                    profileCheck = False
+        point_id = 0
 
-                if profileCheck is False and fieldCheck is False and inputCheck is False:
-                    # Calculating the profile and add it to the list
+        for feature in features:
 
-                    transform_return = magicbox.transformation(coord_proc, method, direction)
+            # retrieve every feature with its geometry and attributes
+            view = feature[3]
+            profileName = feature[4]
 
-                    coord_height_list = transform_return["coord_trans"]
+            # getting x and y coordinate
+            x = round(feature[0], 3)
+            y = round(feature[1], 3)
+            z = round(feature[2], 3)
+            use = feature[5]
+            obj_uuid = feature[6]
 
-                    coord_trans.append(coord_height_list)
+            # write coordinates and attributes (view, profile and z) in a list
+            # add an ID to each point
 
-                    # If checked, the upper right point has to be exportet as point
-                    height_points.append(magicbox.height_points(coord_height_list))
+            point_id += 1
 
-                    cutting_line.append(
-                        sectionCalc(
-                            coord_proc,
-                            transform_return["cutting_start"],
-                            transform_return["linegress"],
-                            transform_return["ns_error"],
-                        ),
-                    )
+            profiles.setdefault(profileName, []).append([x, y, z, view, profileName, use, point_id, obj_uuid])
 
-                    # return transform_return
-                    transform_return["transformationParams"]["cutting_line"] = cutting_line
-                    transform_return["transformationParams"]["aar_direction"] = direction
-                    self.pup.publish("aarPointsChanged", transform_return)
+        return profiles
@@ -61,66 +61,74 @@ from .errorhandling import ErrorHandler
 
 
 def rotation(coord_proc, slope_deg, zAdaption):
-    x_coord_proc = listToList(coord_proc, 0)
+    xyz = coordArray(coord_proc)
 
-    y_coord_proc = listToList(coord_proc, 1)
+    x_trans, y_trans, z_trans, transformationParams = rotationArray(xyz, slope_deg, zAdaption)
+
+    return {
+        "x_trans": x_trans.tolist(),
+        "y_trans": y_trans.tolist(),
+        "z_trans": z_trans.tolist(),
+        "transformationParams": transformationParams,
+    }
 
-    z_coord_proc = listToList(coord_proc, 2)
+
+def rotationArray(xyz, slope_deg, zAdaption):
+    # same as rotation(), but on a (n, 3) array and returning arrays
 
     # calculate the point of rotation
 
-    center_x = np.mean(x_coord_proc)
+    center_x = np.mean(xyz[:, 0])
 
-    center_y = np.mean(y_coord_proc)
+    center_y = np.mean(xyz[:, 1])
 
-    center_z = np.mean(z_coord_proc)
-    # instantiate lists for the transformed coordinates
+    center_z = np.mean(xyz[:, 2])
 
-    x_trans = []
+    x_trans, y_trans = rotatePlane(xyz[:, 0], xyz[:, 1], center_x, center_y, slope_deg)
 
-    y_trans = []
+    if zAdaption is True:
 
-    z_trans = []
+        z_trans = xyz[:, 2] + center_y - center_z
 
-    for i in range(len(coord_proc)):
+    else:
 
-        x_trans.append(
-            center_x
-            + (coord_proc[i][0] - center_x) * cos(slope_deg / 180 * pi)
-            - sin(slope_deg / 180 * pi) * (coord_proc[i][1] - center_y)
-        )
+        z_trans = xyz[:, 2].copy()
 
-        y_trans.append(
-            center_y
-            + (coord_proc[i][0] - center_x) * sin(slope_deg / 180 * pi)
-            + (coord_proc[i][1] - center_y) * cos(slope_deg / 180 * pi)
-        )
+    # Fuer die Transformation im AAR-Original Modus
+    center_x_trans = np.mean(x_trans)
+    center_z_trans = np.mean(z_trans)
 
-        if zAdaption is True:
+    transformationParams = {
+        "center_x_trans": center_x_trans,
+        "center_z_trans": center_z_trans,
+        "center_x": center_x,
+        "center_y": center_y,
+        "center_z": center_z,
+        "slope_deg": slope_deg,
+    }
 
-            z_trans.append(coord_proc[i][2] + center_y - center_z)
+    return x_trans, y_trans, z_trans, transformationParams
 
-        else:
 
-            z_trans.append(coord_proc[i][2])
+def rotatePlane(a, b, center_a, center_b, angle_deg):
+    # rotate the coordinate arrays a and b around (center_a, center_b) by angle_deg
+    # sin and cos are calculated once, the operation order is the same as in the former per point loops
 
-        # Fuer die Transformation im AAR-Original Modus
-        center_x_trans = np.mean(x_trans)
-        center_z_trans = np.mean(z_trans)
+    cos_angle = cos(angle_deg / 180 * pi)
+
+    sin_angle = sin(angle_deg / 180 * pi)
+
+    a_trans = center_a + (a - center_a) * cos_angle - sin_angle * (b - center_b)
+
+    b_trans = center_b + (a - center_a) * sin_angle + (b - center_b) * cos_angle
+
+    return a_trans, b_trans
 
-    return {
-        "x_trans": x_trans,
-        "y_trans": y_trans,
-        "z_trans": z_trans,
-        "transformationParams": {
-            "center_x_trans": center_x_trans,
-            "center_z_trans": center_z_trans,
-            "center_x": center_x,
-            "center_y": center_y,
-            "center_z": center_z,
-            "slope_deg": slope_deg,
-        },
-    }
+
+def coordArray(coord_proc):
+    # x, y and z of the coordinate list as (n, 3) float array
+
+    return np.array([point[0:3] for point in coord_proc], dtype=float).reshape(-1, 3)
 
 
 def listToList(coord_proc, position):
@@ -355,76 +363,48 @@ class MagicBox:
         # initialize the Errorhandler
         errorhandler = ErrorHandler()
 
-        profilnr_proc = listToList(coord_proc, 4)
-
         fehler_check = False
 
         ns_fehler_vorhanden = ns_error_determination(coord_proc)
+
+        # x, y and z of the profile as array, all calculations are done on this array
+        xyz = coordArray(coord_proc)
+
         if ns_fehler_vorhanden:
             # Profil um 45 Grad drehen
 
-            rotationresult = rotation(coord_proc, 45, False)
+            x_rot, y_rot, z_rot, transformationParams = rotationArray(xyz, 45, False)
 
             fehler_check = True
 
-            transformationParams = rotationresult["transformationParams"]
-
-            for i in range(len(coord_proc)):
-                coord_proc[i][0] = rotationresult["x_trans"][i]
-
-                coord_proc[i][1] = rotationresult["y_trans"][i]
+            xyz = np.column_stack((x_rot, y_rot, z_rot))
 
-                coord_proc[i][2] = rotationresult["z_trans"][i]
+            # the rotated coordinates are written back, sectionCalc() works on them afterwards
+            for i, point in enumerate(xyz.tolist()):
+                coord_proc[i][0:3] = point
 
         # write the x and v values in the corresponding lists
         # instantiate an empty list for the transformed coordinates and other values
 
-        # instantiate lists for the x and y values
-        # coordList = listToList(coord_proc, 0)
-        x_coord_proc = listToList(coord_proc, 0)
-
-        y_coord_proc = listToList(coord_proc, 1)
-
         selection_proc = listToList(coord_proc, 5)
 
         id_proc = listToList(coord_proc, 6)
 
         uuid_proc = listToList(coord_proc, 7)
 
-        rangcheck_orginal = []
-
-        for i in range(len(coord_proc)):
-
-            tmplist = []
-
-            for k in range(len(coord_proc[i])):
-                tmplist.append(coord_proc[i][k])
-
-            rangcheck_orginal.append(tmplist)
-
         # distanz zwischen den beiden Punkten oben CHANGE
-        # create the valuelists that are used
-
-        xw = []
-
-        yw = []
-
-        xw_check = []
+        # create the valuelists that are used, the minimum is calculated once per profile
 
-        yw_check = []
+        xw_check = xyz[:, 0] - np.min(xyz[:, 0])
 
-        for x in range(len(x_coord_proc)):
+        yw_check = xyz[:, 1] - np.min(xyz[:, 1])
 
-            # Nur Auswahl zum berechnen der Steigung verwenden
+        # Nur Auswahl zum berechnen der Steigung verwenden
+        selection_mask = np.array([selection == 1 for selection in selection_proc], dtype=bool)
 
-            if selection_proc[x] == 1:
-                xw.append(x_coord_proc[x] - min(x_coord_proc))
+        xw = xw_check[selection_mask]
 
-                yw.append(y_coord_proc[x] - min(y_coord_proc))
-
-            xw_check.append(x_coord_proc[x] - min(x_coord_proc))
-
-            yw_check.append(y_coord_proc[x] - min(y_coord_proc))
+        yw = yw_check[selection_mask]
 
         # There is a problem with lingress if the points are nearly N-S oriented
 
@@ -505,25 +485,8 @@ class MagicBox:
 
             cutting_start = "E"
 
-        # instantiate lists for the transformed coordinates
-
-        x_trans = []
-
-        y_trans = []
-
-        z_trans = []
-
         # rotation with z as y: zAdpation == True, z is adapted to mean y value
-        first_rotationresult = rotation(coord_proc, slope_deg, True)
-
-        transformationParams = first_rotationresult["transformationParams"]
-
-        for i in range(len(coord_proc)):
-            x_trans.append(first_rotationresult["x_trans"][i])
-
-            y_trans.append(first_rotationresult["y_trans"][i])
-
-            z_trans.append(first_rotationresult["z_trans"][i])
+        x_trans, y_trans, z_trans, transformationParams = rotationArray(xyz, slope_deg, True)
 
         if direction == "absolute height":
 
@@ -531,56 +494,23 @@ class MagicBox:
 
             # and move it on the y-axis
 
-            x_coord_proc = listToList(coord_proc, 0)
-
-            y_coord_proc = listToList(coord_proc, 1)
-
-            z_coord_proc = listToList(coord_proc, 2)
-
             # calculate the minimal x
 
-            mean_x = np.mean(x_coord_proc)
+            mean_x = np.mean(xyz[:, 0])
 
-            mean_y = np.mean(y_coord_proc)
+            mean_y = np.mean(xyz[:, 1])
 
-            mean_z = np.mean(z_coord_proc)
+            mean_z = np.mean(xyz[:, 2])
 
-            transformationParams["min_x"] = min(x_trans)
+            transformationParams["min_x"] = np.min(x_trans)
 
-            for i in range(len(x_trans)):
-                x_trans[i] = x_trans[i] - mean_x
+            x_trans = x_trans - mean_x
 
-                z_trans[i] = z_trans[i] - mean_y + mean_z
+            z_trans = z_trans - mean_y + mean_z
 
-            new_min_x = min(x_trans)
+            new_min_x = np.min(x_trans)
 
-            for i in range(len(x_trans)):
-                x_trans[i] = x_trans[i] + abs(new_min_x)
-
-        # instantiate a list for the transformed coordinates
-
-        coord_trans = []
-
-        rangcheck_trans = []
-
-        # build the finished list
-
-        for i in range(len(coord_proc)):
-            coord_trans.append(
-                [
-                    x_trans[i],
-                    y_trans[i],
-                    z_trans[i],
-                    coord_proc[i][4],
-                    coord_proc[i][2],
-                    distance[i],
-                    selection_proc[i],
-                    id_proc[i],
-                    uuid_proc[i],
-                ]
-            )
-
-            rangcheck_trans.append([x_trans[i], z_trans[i], y_trans[i]])
+            x_trans = x_trans + abs(new_min_x)
 
         # If the aim is to get the view of the surface, the x-axis has to be rotated aswell
 
@@ -588,14 +518,11 @@ class MagicBox:
 
             # calculating the slope, therefore preparing lists
 
-            z_yw = []
-
-            z_zw = []
+            min_yz = min(np.min(y_trans), np.min(z_trans))
 
-            for i in range(len(coord_proc)):
-                z_yw.append(y_trans[i] - min(y_trans + z_trans))
+            z_yw = y_trans - min_yz
 
-                z_zw.append(z_trans[i] - min(y_trans + z_trans))
+            z_zw = z_trans - min_yz
 
             # actual calculation of the slope using the linear regression again
 
@@ -625,47 +552,9 @@ class MagicBox:
 
             z_center_z = np.mean(z_trans)
 
-            # rewrite the lists for the y and z values
-
-            y_trans = []
-
-            z_trans = []
+            # rotate the y and z values
 
-            for i in range(len(coord_trans)):
-                y_trans.append(
-                    z_center_y
-                    + (coord_trans[i][1] - z_center_y) * cos(z_slope_deg / 180 * pi)
-                    - (coord_trans[i][2] - z_center_z) * sin(z_slope_deg / 180 * pi)
-                )
-
-                z_trans.append(
-                    z_center_z
-                    + (coord_trans[i][1] - z_center_y) * sin(z_slope_deg / 180 * pi)
-                    + (coord_trans[i][2] - z_center_z) * cos(z_slope_deg / 180 * pi)
-                )
-
-            # empty and rewrite the output list
-
-            coord_trans = []
-
-            rangcheck_trans = []
-
-            for i in range(len(coord_proc)):
-                coord_trans.append(
-                    [
-                        x_trans[i],
-                        y_trans[i],
-                        z_trans[i],
-                        coord_proc[i][4],
-                        coord_proc[i][2],
-                        distance[i],
-                        selection_proc[i],
-                        id_proc[i],
-                        uuid_proc[i],
-                    ]
-                )
-
-                rangcheck_trans.append([x_trans[i], z_trans[i], y_trans[i]])
+            y_trans, z_trans = rotatePlane(y_trans, z_trans, z_center_y, z_center_z, z_slope_deg)
 
         # If the direction is in the "original" setting, the points have
         # to be rotated back to their original orientation
@@ -688,51 +577,18 @@ class MagicBox:
 
             y_center_z = np.mean(z_trans)
 
-            # rewrite the lists for the x and z values
-
-            x_trans = []
-
-            z_trans = []
-
             transformationParams["y_slope_deg"] = y_slope_deg
 
-            for i in range(len(coord_trans)):
-                x_trans.append(
-                    y_center_x
-                    + (coord_trans[i][0] - y_center_x) * cos(y_slope_deg / 180 * pi)
-                    - (coord_trans[i][2] - y_center_z) * sin(y_slope_deg / 180 * pi)
-                )
+            # rotate the x and z values
 
-                z_trans.append(
-                    y_center_z
-                    + (coord_trans[i][0] - y_center_x) * sin(y_slope_deg / 180 * pi)
-                    + (coord_trans[i][2] - y_center_z) * cos(y_slope_deg / 180 * pi)
-                )
+            x_trans, z_trans = rotatePlane(x_trans, z_trans, y_center_x, y_center_z, y_slope_deg)
 
-            # empty and rewrite the output list
-
-            coord_trans = []
-
-            rangcheck_trans = []
-
-            for i in range(len(coord_proc)):
-                # CHANGE
-
-                coord_trans.append(
-                    [
-                        x_trans[i],
-                        y_trans[i],
-                        z_trans[i],
-                        coord_proc[i][4],
-                        coord_proc[i][2],
-                        distance[i],
-                        selection_proc[i],
-                        id_proc[i],
-                        uuid_proc[i],
-                    ]
-                )
+        # build the finished list
 
-                rangcheck_trans.append([x_trans[i], z_trans[i], y_trans[i]])
+        coord_trans = [
+            [x, y, z, coord_proc[i][4], coord_proc[i][2], distance[i], selection_proc[i], id_proc[i], uuid_proc[i]]
+            for i, (x, y, z) in enumerate(zip(x_trans.tolist(), y_trans.tolist(), z_trans.tolist()))
+        ]
 
         # check the distances of the outter points from the old points and the converted ones
         original_outer_points = self.outer_profile_points(coord_proc)
@@ -755,16 +611,8 @@ class MagicBox:
 
         print("########################")
 
-        array_z_org = []
-        for point in coord_proc:
-            array_z_org.append(point[2])
-
-        array_z_trans = []
-        for point in coord_trans:
-            array_z_trans.append(point[2])
-
-        array_z_org_t = np.vstack([array_z_org, np.ones(len(array_z_org))]).T
-        linegress_profil = np.linalg.lstsq(array_z_org_t, array_z_trans, rcond=None)[0]
+        array_z_org_t = np.vstack([xyz[:, 2], np.ones(len(xyz))]).T
+        linegress_profil = np.linalg.lstsq(array_z_org_t, z_trans, rcond=None)[0]
 
         return {
             "aar_direction": direction,
@@ -1,7 +1,18 @@
 from math import pi, cos, sin
 
 import numpy as np
-from qgis.core import QgsGeometry, QgsPoint, QgsMessageLog, Qgis, QgsWkbTypes
+from qgis.core import (
+    QgsGeometry,
+    QgsPoint,
+    QgsMessageLog,
+    Qgis,
+    QgsWkbTypes,
+    QgsLineString,
+    QgsPolygon,
+    QgsCurvePolygon,
+    QgsMultiLineString,
+    QgsMultiPolygon,
+)
 
 
 class RotationCoords:
@@ -12,8 +23,12 @@ class RotationCoords:
         self.transformationParamsAbsolute = None
         self.transformationParamsOriginal = None
 
+        # sin/cos der Rotationswinkel je AAR-Direction, wird bei neuen Parametern verworfen
+        self.aarConstants = {}
+
     # Transformationsparameter für jede AAR-Direction setzen
     def setAarTransformationParams(self, params):
+        self.aarConstants.pop(params["aar_direction"], None)
         if params["aar_direction"] == "horizontal":
             self.transformationParamsHorizontal = params
         if params["aar_direction"] == "original":
@@ -21,291 +36,270 @@ class RotationCoords:
         if params["aar_direction"] == "absolute height":
             self.transformationParamsAbsolute = params
 
-    # Karte zu Profil
-    # x,y,z sind reale Punkte bspw. im Gauss-Krüger System
-    def rotation(self, x, y, z, zAdaption, aar_direction):
+    # Transformationsparameter und vorberechnete sin/cos der Winkel für eine AAR-Direction
+    def getAarConstants(self, aar_direction):
+        constants = self.aarConstants.get(aar_direction)
+        if constants is not None:
+            return constants
 
         if aar_direction == "horizontal":
-            slope_deg = self.transformationParamsHorizontal["slope_deg"]
-            center_x = self.transformationParamsHorizontal["center_x"]
-            center_y = self.transformationParamsHorizontal["center_y"]
-            center_z = self.transformationParamsHorizontal["center_z"]
-
-            x_trans = center_x + (x - center_x) * cos(slope_deg / 180 * pi) - sin(slope_deg / 180 * pi) * (y - center_y)
-
-            y_trans = center_y + (x - center_x) * sin(slope_deg / 180 * pi) + (y - center_y) * cos(slope_deg / 180 * pi)
-
-            if zAdaption is True:
-                z_trans = z + center_y - center_z
-            else:
-                z_trans = z
-
+            params = self.transformationParamsHorizontal
         elif aar_direction == "absolute height":
+            params = self.transformationParamsAbsolute
+        elif aar_direction == "original":
+            params = self.transformationParamsOriginal
+        else:
+            raise ValueError("Wrong AAR-Direction")
 
-            slope_deg = self.transformationParamsAbsolute["slope_deg"]
-            center_x = self.transformationParamsAbsolute["center_x"]
-            center_y = self.transformationParamsAbsolute["center_y"]
-            center_z = self.transformationParamsAbsolute["center_z"]
-            min_x = self.transformationParamsAbsolute["min_x"]
-
-            x_trans = center_x + (x - center_x) * cos(slope_deg / 180 * pi) - sin(slope_deg / 180 * pi) * (y - center_y)
-
-            y_trans = center_y + (x - center_x) * sin(slope_deg / 180 * pi) + (y - center_y) * cos(slope_deg / 180 * pi)
+        slope_rad = params["slope_deg"] / 180 * pi
+        constants = {"params": params, "cos_slope": cos(slope_rad), "sin_slope": sin(slope_rad)}
 
-            z_trans = z
+        if aar_direction == "original":
+            y_slope_rad = params["y_slope_deg"] / 180 * pi
+            constants["cos_y_slope"] = cos(y_slope_rad)
+            constants["sin_y_slope"] = sin(y_slope_rad)
 
-            # Anpassung absolute height - verschieben nach x
-            x_trans = x_trans - min_x
+        self.aarConstants[aar_direction] = constants
 
-        elif aar_direction == "original":
+        return constants
 
-            slope_deg = self.transformationParamsOriginal["slope_deg"]
-            y_slope_deg = self.transformationParamsOriginal["y_slope_deg"]
-            center_x = self.transformationParamsOriginal["center_x"]
-            center_y = self.transformationParamsOriginal["center_y"]
-            center_z = self.transformationParamsOriginal["center_z"]
-            center_x_trans = self.transformationParamsOriginal["center_x_trans"]
-            center_z_trans = self.transformationParamsOriginal["center_z_trans"]
+    # Karte zu Profil
+    # x,y,z sind reale Punkte bspw. im Gauss-Krüger System
+    def rotation(self, x, y, z, zAdaption, aar_direction):
 
-            z = z + center_y - center_z
+        x_trans, y_trans, z_trans = self.rotationArray(np.array([[x, y, z]], dtype=float), zAdaption, aar_direction)[0]
 
-            y_trans = center_y + (x - center_x) * sin(slope_deg / 180 * pi) + (y - center_y) * cos(slope_deg / 180 * pi)
+        return {"x_trans": x_trans.item(), "y_trans": y_trans.item(), "z_trans": z_trans.item()}
 
-            x = center_x + (x - center_x) * cos(slope_deg / 180 * pi) - sin(slope_deg / 180 * pi) * (y - center_y)
+    # Karte zu Profil für ein (N,3) Array mit x,y,z
+    # gibt ein (N,3) Array mit x_trans, y_trans, z_trans zurück
+    def rotationArray(self, xyz, zAdaption, aar_direction):
 
-            x_trans = (
-                center_x_trans
-                + (x - center_x_trans) * cos(y_slope_deg / 180 * pi)
-                - (z - center_z_trans) * sin(y_slope_deg / 180 * pi)
-            )
+        constants = self.getAarConstants(aar_direction)
+        params = constants["params"]
+        cos_slope = constants["cos_slope"]
+        sin_slope = constants["sin_slope"]
 
-            z_trans = (
-                center_z_trans
-                + (x - center_x_trans) * sin(y_slope_deg / 180 * pi)
-                + (z - center_z_trans) * cos(y_slope_deg / 180 * pi)
-            )
+        center_x = params["center_x"]
+        center_y = params["center_y"]
+        center_z = params["center_z"]
 
-        else:
-            print("Wrong AAR-Direction")
+        x = xyz[:, 0]
+        y = xyz[:, 1]
+        z = xyz[:, 2]
 
-        return {"x_trans": x_trans, "y_trans": y_trans, "z_trans": z_trans}
+        x_trans = center_x + (x - center_x) * cos_slope - sin_slope * (y - center_y)
 
-    # Profil zu Karte
-    def rotationReverse(self, x, z, zAdaption, aar_direction):
+        y_trans = center_y + (x - center_x) * sin_slope + (y - center_y) * cos_slope
 
         if aar_direction == "horizontal":
 
-            slope_deg = self.transformationParamsHorizontal["slope_deg"] * (-1)
-            center_x = self.transformationParamsHorizontal["center_x"]
-            center_y = self.transformationParamsHorizontal["center_y"]
-            z_slope = 1  # self.transformationParams['z_slope'] -- geht nicht mit dem Neigungswinkel
-            z_intercept = self.transformationParamsHorizontal["z_intercept"]
-
             if zAdaption is True:
-                z_trans = z_slope * z - z_intercept
+                z_trans = z + center_y - center_z
             else:
                 z_trans = z
 
-            x_trans = center_x + (x - center_x) * cos(slope_deg / 180 * pi) - sin(slope_deg / 180 * pi) * 0
-            y_trans = center_y + (x - center_x) * sin(slope_deg / 180 * pi) + 0 * cos(slope_deg / 180 * pi)
-
         elif aar_direction == "absolute height":
 
-            slope_deg = self.transformationParamsAbsolute["slope_deg"] * (-1)
-            center_x = self.transformationParamsAbsolute["center_x"]
-            center_y = self.transformationParamsAbsolute["center_y"]
-            z_slope = 1  # self.transformationParamsAbsolute['z_slope'] -- geht nicht mit dem Neigungswinkel
-            z_intercept = self.transformationParamsAbsolute["z_intercept"]
-            min_x = self.transformationParamsAbsolute["min_x"]
+            z_trans = z
 
             # Anpassung absolute height - verschieben nach x
-            x = x + min_x
+            x_trans = x_trans - params["min_x"]
 
-            z_trans = z
+        else:
 
-            x_trans = center_x + (x - center_x) * cos(slope_deg / 180 * pi) - sin(slope_deg / 180 * pi) * 0
-            y_trans = center_y + (x - center_x) * sin(slope_deg / 180 * pi) + 0 * cos(slope_deg / 180 * pi)
+            center_x_trans = params["center_x_trans"]
+            center_z_trans = params["center_z_trans"]
+            cos_y_slope = constants["cos_y_slope"]
+            sin_y_slope = constants["sin_y_slope"]
 
-        elif aar_direction == "original":
+            z = z + center_y - center_z
 
-            y_slope_deg = self.transformationParamsOriginal["y_slope_deg"] * (-1)
-            slope_deg = self.transformationParamsOriginal["slope_deg"] * (-1)
-            center_x = self.transformationParamsOriginal["center_x"]
-            center_y = self.transformationParamsOriginal["center_y"]
-            center_z = self.transformationParamsOriginal["center_z"]
-            center_x_trans = self.transformationParamsOriginal["center_x_trans"]
-            center_z_trans = self.transformationParamsOriginal["center_z_trans"]
-
-            z1 = (
-                center_z_trans
-                + (x - center_x_trans) * sin(y_slope_deg / 180 * pi)
-                + (z - center_z_trans) * cos(y_slope_deg / 180 * pi)
-            )
+            x = x_trans
 
-            x1 = (
-                center_x_trans
-                + (x - center_x_trans) * cos(y_slope_deg / 180 * pi)
-                - (z - center_z_trans) * sin(y_slope_deg / 180 * pi)
-            )
+            x_trans = center_x_trans + (x - center_x_trans) * cos_y_slope - (z - center_z_trans) * sin_y_slope
 
-            x2 = center_x + (x1 - center_x) * cos(slope_deg / 180 * pi)
+            z_trans = center_z_trans + (x - center_x_trans) * sin_y_slope + (z - center_z_trans) * cos_y_slope
 
-            y1 = center_y + (x1 - center_x) * sin(slope_deg / 180 * pi)
+        return np.column_stack((x_trans, y_trans, z_trans))
 
-            z2 = z1 - center_y + center_z
+    # Profil zu Karte
+    def rotationReverse(self, x, z, zAdaption, aar_direction):
 
-            x_trans = x2
-            y_trans = y1
-            z_trans = z2
+        x_trans, y_trans, z_trans = self.rotationReverseArray(np.array([[x, z]], dtype=float), zAdaption, aar_direction)[0]
 
-        else:
-            raise ValueError("Wrong AAR-Direction")
+        return {"x_trans": x_trans.item(), "y_trans": y_trans.item(), "z_trans": z_trans.item()}
 
-        return {"x_trans": x_trans, "y_trans": y_trans, "z_trans": z_trans}
+    # Profil zu Karte für ein (N,2) Array mit x,z der Profilebene
+    # gibt ein (N,3) Array mit x_trans, y_trans, z_trans zurück
+    def rotationReverseArray(self, xz, zAdaption, aar_direction):
 
-    def rotatePointFeature(self, feature, aar_direction):
+        constants = self.getAarConstants(aar_direction)
+        params = constants["params"]
 
-        geomFeat = feature.geometry()
+        # Rückwärts wird um den negativen Winkel gedreht: cos bleibt, sin wechselt das Vorzeichen
+        cos_slope = constants["cos_slope"]
+        sin_slope = -constants["sin_slope"]
 
-        rotateGeom = self.rotationReverse(geomFeat.get().x(), geomFeat.get().y(), True, aar_direction)
+        center_x = params["center_x"]
+        center_y = params["center_y"]
 
-        return rotateGeom
+        x = xz[:, 0]
+        z = xz[:, 1]
 
-    def rotatePointFeatureFromOrg(self, feature, aar_direction):
+        if aar_direction == "horizontal":
 
-        geomFeat = self.castMultiGeometry2Single(feature.geometry())
+            z_slope = 1  # self.transformationParams['z_slope'] -- geht nicht mit dem Neigungswinkel
+            z_intercept = params["z_intercept"]
 
-        rotateGeom = self.rotation(geomFeat.get().x(), geomFeat.get().y(), geomFeat.get().z(), True, aar_direction)
+            if zAdaption is True:
+                z_trans = z_slope * z - z_intercept
+            else:
+                z_trans = z
 
-        return rotateGeom
+        elif aar_direction == "absolute height":
 
-    def rotateLineFeatureFromOrg(self, feature, aar_direction):
+            # Anpassung absolute height - verschieben nach x
+            x = x + params["min_x"]
 
-        geomFeat = feature.geometry()
+            z_trans = z
 
-        geomType = geomFeat.wkbType()
+        else:
 
-        mls = geomFeat.get()
+            center_z = params["center_z"]
+            center_x_trans = params["center_x_trans"]
+            center_z_trans = params["center_z_trans"]
+            cos_y_slope = constants["cos_y_slope"]
+            sin_y_slope = -constants["sin_y_slope"]
 
-        if (
-            geomType == QgsWkbTypes.LineString
-            or geomType == QgsWkbTypes.LineStringZ
-            or geomType == QgsWkbTypes.LineString25D
-        ):
+            z1 = center_z_trans + (x - center_x_trans) * sin_y_slope + (z - center_z_trans) * cos_y_slope
 
-            adjustGeom = QgsGeometry(mls.createEmptyWithSameType())
+            x = center_x_trans + (x - center_x_trans) * cos_y_slope - (z - center_z_trans) * sin_y_slope
 
-            pointList = []
-            mls = geomFeat.get()
+            z_trans = z1 - center_y + center_z
 
-            for part in mls.vertices():
-                try:
-                    rotateGeom = self.rotation(part.x(), part.y(), part.z(), True, aar_direction)
-                except:
-                    rotateGeom = self.rotation(part.x(), part.y(), 0, True, aar_direction)
+        x_trans = center_x + (x - center_x) * cos_slope
+        y_trans = center_y + (x - center_x) * sin_slope
 
-                zPoint = QgsPoint(rotateGeom["x_trans"], rotateGeom["z_trans"], rotateGeom["z_trans"])
-                pointList.append(zPoint)
+        return np.column_stack((x_trans, y_trans, z_trans))
 
-            adjustGeom.addPoints(pointList)
+    # Stützpunkte einer Geometrie (Linie, Polygon mit allen Ringen) als (N,3) Array mit x,y,z
+    # fehlende z-Werte sind NaN
+    def vertexArray(self, abstractGeometry):
 
-            retAdjustGeom = self.castMultiGeometry2Single(adjustGeom)
+        if isinstance(abstractGeometry, QgsLineString):
+            if abstractGeometry.is3D():
+                zValues = abstractGeometry.zVector()
+            else:
+                zValues = np.full(abstractGeometry.numPoints(), np.nan)
+            return np.column_stack((abstractGeometry.xVector(), abstractGeometry.yVector(), zValues)).reshape(-1, 3)
 
-            return retAdjustGeom
+        if isinstance(abstractGeometry, QgsCurvePolygon) and abstractGeometry.exteriorRing() is not None:
+            rings = [abstractGeometry.exteriorRing()]
+            rings += [abstractGeometry.interiorRing(i) for i in range(abstractGeometry.numInteriorRings())]
+            return np.vstack([self.vertexArray(ring) for ring in rings])
 
-        if (
-            geomType == QgsWkbTypes.MultiLineString
-            or geomType == QgsWkbTypes.MultiLineStringZ
-            or geomType == QgsWkbTypes.MultiLineString25D
-        ):
+        return np.array([[v.x(), v.y(), v.z()] for v in abstractGeometry.vertices()], dtype=float).reshape(-1, 3)
 
-            QgsMessageLog.logMessage(
-                "Achtung, Multi-Geometrien werden zu Single-Geometrien umgewandelt!", "T2G Archäologie", Qgis.Info
-            )
+    # Liste von QgsPoint aus einem (N,3) Array
+    def pointsFromArray(self, xyz):
 
-            adjustGeom = QgsGeometry(mls.createEmptyWithSameType())
+        return [QgsPoint(x, y, z) for x, y, z in xyz.tolist()]
 
-            for poly in geomFeat.parts():
+    # Geometrien der Eingabelayer (Karte) für mehrere Features in einem Durchlauf in die Profilebene drehen
+    # alle Stützpunkte werden in einem Array gesammelt und gemeinsam rotiert
+    # gibt eine Liste mit einer Geometrie je Feature zurück (None, wenn der Geometrietyp nicht unterstützt wird)
+    def rotateGeometriesFromOrg(self, features, aar_direction):
 
-                pointList = []
+        lineTypes = [QgsWkbTypes.LineString, QgsWkbTypes.LineStringZ, QgsWkbTypes.LineString25D]
+        multiLineTypes = [QgsWkbTypes.MultiLineString, QgsWkbTypes.MultiLineStringZ, QgsWkbTypes.MultiLineString25D]
+        polygonTypes = [QgsWkbTypes.Polygon, QgsWkbTypes.PolygonZ, QgsWkbTypes.Polygon25D]
+        multiPolygonTypes = [QgsWkbTypes.MultiPolygon, QgsWkbTypes.MultiPolygonZ, QgsWkbTypes.MultiPolygon25D]
 
-                # part ist QgsPoint
-                for part in poly.vertices():
+        featureParts = []
+        vertexArrays = []
 
-                    try:
-                        rotateGeom = self.rotation(part.x(), part.y(), part.z(), True, aar_direction)
-                    except:
-                        rotateGeom = self.rotation(part.x(), part.y(), 0, True, aar_direction)
+        for feature in features:
 
-                    zPoint = QgsPoint(rotateGeom["x_trans"], rotateGeom["z_trans"], rotateGeom["z_trans"])
-                    pointList.append(zPoint)
+            geomFeat = feature.geometry()
+            geomType = geomFeat.wkbType()
 
-                adjustGeom.addPoints(pointList)
+            isPolygon = geomType in polygonTypes or geomType in multiPolygonTypes
+            isMulti = geomType in multiLineTypes or geomType in multiPolygonTypes
 
-            retAdjustGeom = self.castMultiGeometry2Single(adjustGeom)
+            if not (isPolygon or isMulti or geomType in lineTypes):
+                featureParts.append(None)
+                continue
 
-            return retAdjustGeom
+            if isMulti:
+                QgsMessageLog.logMessage(
+                    "Achtung, Multi-Geometrien werden zu Single-Geometrien umgewandelt!", "T2G Archäologie", Qgis.Info
+                )
+                parts = [self.vertexArray(part) for part in geomFeat.constParts()]
+            else:
+                parts = [self.vertexArray(geomFeat.constGet())]
 
-    def rotatePolygonFeatureFromOrg(self, feature, aar_direction):
+            featureParts.append((isPolygon, isMulti, len(parts)))
+            vertexArrays.extend(parts)
 
-        geomFeat = feature.geometry()
+        rotatedParts = []
+        if vertexArrays:
+            rotated = self.rotationArray(np.vstack(vertexArrays), True, aar_direction)
+            rotatedParts = np.split(rotated, np.cumsum([len(a) for a in vertexArrays])[:-1])
 
-        geomType = geomFeat.wkbType()
+        rotatedGeometries = []
+        partIndex = 0
 
-        mls = geomFeat.get()
+        for entry in featureParts:
 
-        if geomType == QgsWkbTypes.Polygon or geomType == QgsWkbTypes.PolygonZ or geomType == QgsWkbTypes.Polygon25D:
+            if entry is None:
+                rotatedGeometries.append(None)
+                continue
 
-            adjustGeom = QgsGeometry(mls.createEmptyWithSameType())
+            isPolygon, isMulti, partCount = entry
 
-            pointList = []
-            mls = geomFeat.get()
-            for part in mls.vertices():
-                try:
-                    rotateGeom = self.rotation(part.x(), part.y(), part.z(), True, aar_direction)
-                except:
-                    rotateGeom = self.rotation(part.x(), part.y(), 0, True, aar_direction)
+            geomParts = []
+            for rotatedPart in rotatedParts[partIndex : partIndex + partCount]:
+                # Profilansicht: x bleibt, y und z sind der z-Wert der Profilebene
+                line = QgsLineString(rotatedPart[:, 0].tolist(), rotatedPart[:, 2].tolist(), rotatedPart[:, 2].tolist())
+                geomParts.append(QgsPolygon(line) if isPolygon else line)
+            partIndex += partCount
 
-                zPoint = QgsPoint(rotateGeom["x_trans"], rotateGeom["z_trans"], rotateGeom["z_trans"])
-                pointList.append(zPoint)
+            if isMulti:
+                multiGeom = QgsMultiPolygon() if isPolygon else QgsMultiLineString()
+                for geomPart in geomParts:
+                    multiGeom.addGeometry(geomPart)
+                adjustGeom = QgsGeometry(multiGeom)
+            else:
+                adjustGeom = QgsGeometry(geomParts[0])
 
-            adjustGeom.addPoints(pointList)
+            rotatedGeometries.append(self.castMultiGeometry2Single(adjustGeom))
 
-            retAdjustGeom = self.castMultiGeometry2Single(adjustGeom)
+        return rotatedGeometries
 
-            return retAdjustGeom
+    def rotatePointFeature(self, feature, aar_direction):
 
-        if (
-            geomType == QgsWkbTypes.MultiPolygon
-            or geomType == QgsWkbTypes.MultiPolygonZ
-            or geomType == QgsWkbTypes.MultiPolygon25D
-        ):
+        geomFeat = feature.geometry()
 
-            QgsMessageLog.logMessage(
-                "Achtung, Multi-Geometrien werden zu Single-Geometrien umgewandelt!", "T2G Archäologie", Qgis.Info
-            )
+        rotateGeom = self.rotationReverse(geomFeat.get().x(), geomFeat.get().y(), True, aar_direction)
+
+        return rotateGeom
 
-            adjustGeom = QgsGeometry(mls.createEmptyWithSameType())
+    def rotatePointFeatureFromOrg(self, feature, aar_direction):
 
-            for poly in geomFeat.parts():
+        geomFeat = self.castMultiGeometry2Single(feature.geometry())
 
-                pointList = []
+        rotateGeom = self.rotation(geomFeat.get().x(), geomFeat.get().y(), geomFeat.get().z(), True, aar_direction)
 
-                # part ist QgsPoint
-                for part in poly.vertices():
-                    try:
-                        rotateGeom = self.rotation(part.x(), part.y(), part.z(), True, aar_direction)
-                    except:
-                        rotateGeom = self.rotation(part.x(), part.y(), 0, True, aar_direction)
+        return rotateGeom
 
-                    zPoint = QgsPoint(rotateGeom["x_trans"], rotateGeom["z_trans"], rotateGeom["z_trans"])
-                    pointList.append(zPoint)
+    def rotateLineFeatureFromOrg(self, feature, aar_direction):
 
-                adjustGeom.addPoints(pointList)
+        return self.rotateGeometriesFromOrg([feature], aar_direction)[0]
 
-            retAdjustGeom = self.castMultiGeometry2Single(adjustGeom)
+    def rotatePolygonFeatureFromOrg(self, feature, aar_direction):
 
-            return retAdjustGeom
+        return self.rotateGeometriesFromOrg([feature], aar_direction)[0]
 
     def rotateLineFeature(self, feature, emptyTargetGeometry, aar_direction):
 
@@ -320,15 +314,9 @@ class RotationCoords:
             or geomFeatWkbType == QgsWkbTypes.LineStringZM
         ):
 
-            pointList = []
+            rotated = self.rotationReverseArray(self.vertexArray(geomFeat.constGet())[:, 0:2], True, aar_direction)
 
-            mls = geomFeat.get()
-            for part in mls.vertices():
-                rotateGeom = self.rotationReverse(part.x(), part.y(), True, aar_direction)
-                zPoint = QgsPoint(rotateGeom["x_trans"], rotateGeom["y_trans"], rotateGeom["z_trans"])
-                pointList.append(zPoint)
-
-            targetGeometry = QgsGeometry.fromPolyline(self.punkte_von_profillinie_abheben(pointList))
+            targetGeometry = QgsGeometry.fromPolyline(self.pointsFromArray(self.punkteVonProfillinieAbhebenArray(rotated)))
 
         else:
             QgsMessageLog.logMessage(
@@ -342,7 +330,7 @@ class RotationCoords:
         geomFeat = feature.geometry()
         geomFeatWkbType = geomFeat.wkbType()
 
-        pointList = []
+        rotated = np.empty((0, 3))
 
         if (
             geomFeatWkbType == QgsWkbTypes.Polygon
@@ -350,11 +338,8 @@ class RotationCoords:
             or geomFeatWkbType == QgsWkbTypes.PolygonZM
         ):
 
-            mls = geomFeat.get()
-            for part in mls.vertices():
-                rotateGeom = self.rotationReverse(part.x(), part.y(), True, aar_direction)
-                zPoint = QgsPoint(rotateGeom["x_trans"], rotateGeom["y_trans"], rotateGeom["z_trans"])
-                pointList.append(zPoint)
+            xz = self.vertexArray(geomFeat.constGet())[:, 0:2]
+            rotated = self.rotationReverseArray(xz, True, aar_direction)
 
         elif (
             geomFeatWkbType == QgsWkbTypes.MultiPolygon
@@ -364,19 +349,15 @@ class RotationCoords:
             or geomFeatWkbType == QgsWkbTypes.MultiPolygonZM
         ):
 
-            for poly in geomFeat.parts():
-
-                for part in poly.vertices():
-                    rotateGeom = self.rotationReverse(part.x(), part.y(), True, aar_direction)
-                    zPoint = QgsPoint(rotateGeom["x_trans"], rotateGeom["y_trans"], rotateGeom["z_trans"])
-                    pointList.append(zPoint)
+            xz = np.vstack([self.vertexArray(poly) for poly in geomFeat.constParts()] or [np.empty((0, 3))])[:, 0:2]
+            rotated = self.rotationReverseArray(xz, True, aar_direction)
 
         else:
             QgsMessageLog.logMessage(
                 "Achtung, die Geometrie kann nicht verarbeitet werden!", "T2G Archäologie", Qgis.Info
             )
 
-        emptyTargetGeometry.addPoints(self.punkte_von_profillinie_abheben(pointList))
+        emptyTargetGeometry.addPoints(self.pointsFromArray(self.punkteVonProfillinieAbhebenArray(rotated)))
 
         retTargetGeometry = self.castMultiGeometry2Single(emptyTargetGeometry)
 
@@ -485,86 +466,90 @@ class RotationCoords:
         return normal_vector * (gewuenschte_laenge / betrag)
 
     def punkte_von_profillinie_abheben(self, list_of_qgspoints):
-        debugging_print = False
 
         if len(list_of_qgspoints) <= 2:
             return list_of_qgspoints
 
-        is_polygon = False
-        if list_of_qgspoints[0] == list_of_qgspoints[-1]:
-            # wenn der erste und letzte Punkt gleich sind, dann ist es vermutlich ein Polygon
-            is_polygon = True
-            if debugging_print:
-                for p in list_of_qgspoints:
-                    print("original:", p.x(), p.y(), p.z())
+        xyz = np.array([[p.x(), p.y(), p.z()] for p in list_of_qgspoints], dtype=float)
+
+        return self.pointsFromArray(self.punkteVonProfillinieAbhebenArray(xyz))
+
+    ## \brief Punkte (N,3) schrittweise von der Profilwand abheben
+    #
+    # Der Normalvektor der Profilwand wird einmal aus den ersten drei Punkten berechnet,
+    # die Abhebung aller Punkte erfolgt anschließend in einer Array-Operation.
+    #
+    def punkteVonProfillinieAbhebenArray(self, xyz):
+        debugging_print = False
+
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+
+        if len(xyz) <= 2:
+            return xyz
+
+        # wenn der erste und letzte Punkt gleich sind, dann ist es vermutlich ein Polygon
+        is_polygon = np.array_equal(xyz[0], xyz[-1], equal_nan=True)
 
         if not is_polygon:
-            anzahl_der_abzuhebenden = len(list_of_qgspoints)
-            index_stufen = [(i, i) for i in range(anzahl_der_abzuhebenden)]
+            anzahl_der_abzuhebenden = len(xyz)
+            indizes = np.arange(anzahl_der_abzuhebenden)
+            stufen = indizes.copy()
         else:
+            if debugging_print:
+                for p in xyz:
+                    print("original:", *p)
 
-            i = 0
-            while i < len(list_of_qgspoints) - 1:
-                # wenn Abstand kleiner, dann ist es vermutlich ein vormals eingefügter Punkt:
-                if list_of_qgspoints[i].distance3D(list_of_qgspoints[i + 1]) < 0.000001:
-                    if debugging_print:
-                        print("pop", list_of_qgspoints[i], "distance", list_of_qgspoints[i].distance(list_of_qgspoints[i + 1]))
-                    list_of_qgspoints.pop(i)
-                else:
-                    i += 1
+            # wenn Abstand zum Folgepunkt kleiner, dann ist es vermutlich ein vormals eingefügter Punkt
+            # (NaN-Abstände ergeben False, die Punkte bleiben erhalten):
+            abstand = np.linalg.norm(xyz[1:] - xyz[:-1], axis=1)
+            behalten = np.append(~(abstand < 0.000001), True)
+            xyz = xyz[behalten]
 
             # da im Polygon der letzte Punkt gleich dem ersten ist, diesen weglassen und später extra hinzufügen:
-            anzahl_der_abzuhebenden = len(list_of_qgspoints) - 1
+            anzahl_der_abzuhebenden = len(xyz) - 1
+
+            if anzahl_der_abzuhebenden < 3:
+                return xyz
 
             # INFO: Folgendes funktioniert nur, wenn die Profilebene nicht zufällig exakt nord-süd ausgerichtet ist.
             # Finde den Punkt mit dem kleinsten x-Wert:
-            extremum_x_index = min(range(anzahl_der_abzuhebenden), key=lambda i: list_of_qgspoints[i].x())
+            extremum_x_index = int(np.argmin(xyz[:anzahl_der_abzuhebenden, 0]))
             if extremum_x_index == 0:
                 # Wenn der Punkt mit dem kleinsten x-Wert zugleich der Anfang des Polygons ist,
                 # verwende Punkt mit dem größten x-Wert:
-                extremum_x_index = max(range(anzahl_der_abzuhebenden), key=lambda i: list_of_qgspoints[i].x())
-
-            index_stufen = []
-            for i in range(anzahl_der_abzuhebenden):
-                if i == extremum_x_index:
-                    # Zum verschnittfreien Schließen des Polygons in der 2D-Kartenansicht
-                    # zusätzlichen Punkt einfügen:
-                    index_stufen.append((i, anzahl_der_abzuhebenden))
-                # Stufen beginnen beim Extrem-Punkt (extremum_x_index) und enden beim eingefügten Punkt:
-                abhebung_stufe = (i - extremum_x_index) % anzahl_der_abzuhebenden
-                index_stufen.append((i, abhebung_stufe))
+                extremum_x_index = int(np.argmax(xyz[:anzahl_der_abzuhebenden, 0]))
+
+            # Stufen beginnen beim Extrem-Punkt (extremum_x_index) und enden beim eingefügten Punkt,
+            # der zum verschnittfreien Schließen des Polygons in der 2D-Kartenansicht vor dem Extrem-Punkt liegt:
+            indizes = np.arange(anzahl_der_abzuhebenden)
+            stufen = (indizes - extremum_x_index) % anzahl_der_abzuhebenden
+            indizes = np.insert(indizes, extremum_x_index, extremum_x_index)
+            stufen = np.insert(stufen, extremum_x_index, anzahl_der_abzuhebenden)
 
         if debugging_print:
-            print("index_stufen", index_stufen)
+            print("index_stufen", list(zip(indizes.tolist(), stufen.tolist())))
+
+        # Normalvektor der Profilwand aus den ersten drei Punkten:
+        normal_vector = np.cross(xyz[1] - xyz[0], xyz[2] - xyz[0])
+        betrag = np.linalg.norm(normal_vector)
 
         abhebung = 0.000001  # 1000stel mm
         # abhebung = 0.001  # zum Angucken
-        shifted_points = []
-        for index, abhebung_stufe in index_stufen:
-            # Punkte laut Plan (index_stufen) fortlaufend von der Profilwand abheben ...
-
-            vektor_abhebung = self.calculate_normal_vector(list_of_qgspoints, abhebung_stufe * abhebung)
-
-            if debugging_print:
-                print(f"{index:2d} Vektor der Abhebung: {vektor_abhebung}, Betrag {np.linalg.norm(vektor_abhebung)}")
 
-            shifted_points.append(
-                QgsPoint(
-                    list_of_qgspoints[index].x() + vektor_abhebung[0],
-                    list_of_qgspoints[index].y() + vektor_abhebung[1],
-                    list_of_qgspoints[index].z() + vektor_abhebung[2]
-                )
-            )
+        # Punkte laut Plan (indizes, stufen) fortlaufend von der Profilwand abheben ...
+        # in Klammern kleine Zahl mit kleiner Zahl zuerst verrechnen (numerische Stabilität):
+        vektor_abhebung = normal_vector[np.newaxis, :] * ((stufen * abhebung) / betrag)[:, np.newaxis]
+        shifted_points = xyz[indizes] + vektor_abhebung
 
         if is_polygon:
             # letzter Punkt wurde oben ausgelassen - muss aber gleich mit dem ersten sein:
-            shifted_points.append(shifted_points[0])
+            shifted_points = np.vstack((shifted_points, shifted_points[0]))
 
             if debugging_print:
                 for p in shifted_points:
-                    print("shifted:", p.x(), p.y(), p.z())
+                    print("shifted:", *p)
 
-        fehler = (abhebung * 1000) * max(index_stufen, key=lambda i: i[1])[1]
+        fehler = (abhebung * 1000) * int(stufen.max())
         print(
             f"Abhebung: {abhebung * 1000:.15f}mm\n"
             f"Fehler insgesamt: {fehler:.15f}mm"
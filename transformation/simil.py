@@ -26,6 +26,12 @@ import numpy as np
 
 
 class Simil:
+    # maximum number of iterations to find the multiplier factor
+    _max_iterations = 1000
+
+    # convergence tolerance of the multiplier factor
+    _lambda_tolerance = 0.000001
+
     def __init__(self):
         """ """
 
@@ -36,102 +42,234 @@ class Simil:
     @staticmethod
     def _get_scalar(alpha_0, q_coords=None):
         if q_coords is None:
-            scalar = np.einsum("i->", alpha_0)
+            scalar = np.einsum("...i->...", alpha_0)
         else:
-            scalar = np.einsum("i,i->", alpha_0, (q_coords * q_coords).sum(0))
+            scalar = np.einsum("...i,i->...", alpha_0, (q_coords * q_coords).sum(0))
         return scalar
 
     @staticmethod
     def _get_q_matrix(quaternions):
-        q_matrix = [
-            [
-                [q[3], -q[2], q[1], q[0]],
-                [q[2], q[3], -q[0], q[1]],
-                [-q[1], q[0], q[3], q[2]],
-                [-q[0], -q[1], -q[2], q[3]],
-            ]
-            for q in quaternions
-        ]
-        return np.array(q_matrix)
+        q = np.asarray(quaternions)
+        q0, q1, q2, q3 = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+        q_matrix = np.stack(
+            (
+                np.stack((q3, -q2, q1, q0), axis=-1),
+                np.stack((q2, q3, -q0, q1), axis=-1),
+                np.stack((-q1, q0, q3, q2), axis=-1),
+                np.stack((-q0, -q1, -q2, q3), axis=-1),
+            ),
+            axis=-2,
+        )
+        return q_matrix
 
     @staticmethod
     def _get_w_matrix(quaternions):
-        w_matrix = [
-            [
-                [q[3], q[2], -q[1], q[0]],
-                [-q[2], q[3], q[0], q[1]],
-                [q[1], -q[0], q[3], q[2]],
-                [-q[0], -q[1], -q[2], q[3]],
-            ]
-            for q in quaternions
-        ]
-        return np.array(w_matrix)
+        q = np.asarray(quaternions)
+        q0, q1, q2, q3 = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+        w_matrix = np.stack(
+            (
+                np.stack((q3, q2, -q1, q0), axis=-1),
+                np.stack((-q2, q3, q0, q1), axis=-1),
+                np.stack((q1, -q0, q3, q2), axis=-1),
+                np.stack((-q0, -q1, -q2, q3), axis=-1),
+            ),
+            axis=-2,
+        )
+        return w_matrix
 
     @staticmethod
     def _get_abc_matrices(alpha_0, m1, m2=None):
         if m2 is None:
-            matrix = np.einsum("i,ijk->jk", alpha_0, m1)
+            matrix = np.einsum("...i,ijk->...jk", alpha_0, m1)
         else:
-            matrix = np.einsum("i,ijk->jk", alpha_0, np.transpose(m1, (0, 2, 1)) @ m2)
+            matrix = np.einsum("...i,ijk->...jk", alpha_0, np.transpose(m1, (0, 2, 1)) @ m2)
         return matrix
 
     @staticmethod
     def _get_blc_matrix(b_matrix, lambda_i, c_matrix):
-        blc_matrix = b_matrix - lambda_i * c_matrix
+        blc_matrix = b_matrix - lambda_i[:, None, None] * c_matrix
         return blc_matrix
 
     @staticmethod
     def _get_d_matrix(li, cs, am, blcm):
-        d_matrix = 2 * li * am + (1 / cs) * (blcm.T @ blcm)
+        d_matrix = 2 * li[:, None, None] * am + (1 / cs)[:, None, None] * (np.transpose(blcm, (0, 2, 1)) @ blcm)
         return d_matrix
 
     @staticmethod
     def _get_r_quat(d_matrix):
         eigvals, eigvects = np.linalg.eig(d_matrix)
-        beta_1 = np.argmax(eigvals)
-        r_quat = eigvects[:, beta_1]
+        beta_1 = np.argmax(eigvals, axis=-1)
+        r_quat = eigvects[np.arange(len(beta_1)), :, beta_1]
         return beta_1, r_quat
 
     @staticmethod
     def _get_lambda_next(am, bs, bm, cs, cm, rq):
-        expr_1 = rq.T @ am @ rq
-        expr_2 = (1 / cs) * (rq.T @ bm.T @ cm @ rq)
-        expr_3 = (1 / cs) * (rq.T @ cm.T @ cm @ rq)
+        expr_1 = np.einsum("ki,kij,kj->k", rq, am, rq)
+        expr_2 = (1 / cs) * np.einsum("ki,kji,kjl,kl->k", rq, bm, cm, rq)
+        expr_3 = (1 / cs) * np.einsum("ki,kji,kjl,kl->k", rq, cm, cm, rq)
         lambda_next = (expr_1 - expr_2) / (bs - expr_3)
         return lambda_next
 
     @staticmethod
     def _get_solution(am, bs, bm, cs, cm, scale, li, i):
-        blc_matrix = Simil._get_blc_matrix(bm, li, cm)
-        d_matrix = Simil._get_d_matrix(li, cs, am, blc_matrix)
-        beta_1, r_quat = Simil._get_r_quat(d_matrix)
-        if scale is False:
-            return blc_matrix, d_matrix, beta_1, r_quat, li, i
-        else:
+        for i in range(i, i + Simil._max_iterations):
+            blc_matrix = Simil._get_blc_matrix(bm, li, cm)
+            d_matrix = Simil._get_d_matrix(li, cs, am, blc_matrix)
+            beta_1, r_quat = Simil._get_r_quat(d_matrix)
+            if scale is False:
+                break
             lambda_next = Simil._get_lambda_next(am, bs, bm, cs, cm, r_quat)
-            if abs(li - lambda_next) < 0.000001:
-                return blc_matrix, d_matrix, beta_1, r_quat, li, i
-            else:
-                li, i = lambda_next, i + 1
-                return Simil._get_solution(am, bs, bm, cs, cm, scale, li, i)
+            pending = np.abs(li - lambda_next) >= Simil._lambda_tolerance
+            if not pending.any():
+                break
+            li = np.where(pending, lambda_next, li)
+        return blc_matrix, d_matrix, beta_1, r_quat, li, i
 
     @staticmethod
     def _get_r_matrix(r_quat):
-        r_w_matrix = Simil._get_w_matrix([r_quat])[0]
-        r_q_matrix = Simil._get_q_matrix([r_quat])[0]
-        r_matrix = (r_w_matrix.T @ r_q_matrix)[:3, :3]
+        r_w_matrix = Simil._get_w_matrix(r_quat)
+        r_q_matrix = Simil._get_q_matrix(r_quat)
+        r_matrix = (np.transpose(r_w_matrix, (0, 2, 1)) @ r_q_matrix)[:, :3, :3]
         return r_matrix
 
     @staticmethod
     def _get_s_quat(c_scalar, blcm, r_quat):
-        s_quat = 1 / (2 * c_scalar) * (blcm @ r_quat)
+        s_quat = (1 / (2 * c_scalar))[:, None] * np.einsum("kij,kj->ki", blcm, r_quat)
         return s_quat
 
     @staticmethod
     def _get_t_vector(r_quat, s_quat):
-        r_w_matrix = Simil._get_w_matrix([r_quat])[0]
-        t_vector = [2 * (r_w_matrix.T @ s_quat)[:3]]
-        return t_vector
+        r_w_matrix = Simil._get_w_matrix(r_quat)
+        t_vector = 2 * np.einsum("kji,kj->ki", r_w_matrix, s_quat)[:, :3]
+        return t_vector[:, :, None]
+
+    @staticmethod
+    def _solve_quaternion(source_coords, target_coords, alpha_0, scale, lambda_0):
+        n = source_coords.shape[1]
+
+        source_q_coords = np.concatenate((source_coords, np.zeros((1, n))))
+
+        target_q_coords = np.concatenate((target_coords, np.zeros((1, n))))
+
+        b_scalar = Simil._get_scalar(alpha_0, source_q_coords)
+
+        c_scalar = Simil._get_scalar(alpha_0)
+
+        q0_w_matrix = Simil._get_w_matrix(source_q_coords.T)
+
+        qt_q_matrix = Simil._get_q_matrix(target_q_coords.T)
+
+        a_matrix = Simil._get_abc_matrices(alpha_0, q0_w_matrix, qt_q_matrix)
+
+        b_matrix = Simil._get_abc_matrices(alpha_0, qt_q_matrix)
+
+        c_matrix = Simil._get_abc_matrices(alpha_0, q0_w_matrix)
+
+        lambda_i, i = np.full(alpha_0.shape[0], lambda_0), 1
+
+        blc_matrix, d_matrix, beta_1, r_quat, lambda_i, i = Simil._get_solution(
+            a_matrix, b_scalar, b_matrix, c_scalar, c_matrix, scale, lambda_i, i
+        )
+
+        r_matrix = Simil._get_r_matrix(r_quat)
+
+        s_quat = Simil._get_s_quat(c_scalar, blc_matrix, r_quat)
+
+        t_vector = Simil._get_t_vector(r_quat, s_quat)
+
+        return lambda_i, r_matrix, t_vector
+
+    @staticmethod
+    def _solve_planar(source_coords, target_coords, alpha_0, scale, lambda_0):
+        # closed-form weighted Helmert / Procrustes solution in the xy plane
+        c_scalar = Simil._get_scalar(alpha_0)
+
+        source_centroid = np.einsum("ki,ji->kj", alpha_0, source_coords[:2]) / c_scalar[:, None]
+        target_centroid = np.einsum("ki,ji->kj", alpha_0, target_coords[:2]) / c_scalar[:, None]
+
+        source_x = source_coords[0] - source_centroid[:, 0, None]
+        source_y = source_coords[1] - source_centroid[:, 1, None]
+        target_x = target_coords[0] - target_centroid[:, 0, None]
+        target_y = target_coords[1] - target_centroid[:, 1, None]
+
+        a_scalar = np.einsum("ki,ki->k", alpha_0, source_x * target_x + source_y * target_y)
+        b_scalar = np.einsum("ki,ki->k", alpha_0, source_x * target_y - source_y * target_x)
+
+        angle = np.arctan2(b_scalar, a_scalar)
+        cos_angle = np.cos(angle)
+        sin_angle = np.sin(angle)
+
+        if scale is False:
+            lambda_i = np.full(alpha_0.shape[0], lambda_0)
+        else:
+            s_scalar = np.einsum("ki,ki->k", alpha_0, source_x * source_x + source_y * source_y)
+            lambda_i = np.hypot(a_scalar, b_scalar) / s_scalar
+
+        k = alpha_0.shape[0]
+        r_matrix = np.zeros((k, 3, 3))
+        r_matrix[:, 0, 0] = cos_angle
+        r_matrix[:, 0, 1] = -sin_angle
+        r_matrix[:, 1, 0] = sin_angle
+        r_matrix[:, 1, 1] = cos_angle
+        r_matrix[:, 2, 2] = 1.0
+
+        t_vector = np.zeros((k, 3, 1))
+        t_vector[:, :2, 0] = target_centroid - lambda_i[:, None] * np.einsum(
+            "kij,kj->ki", r_matrix[:, :2, :2], source_centroid
+        )
+
+        return lambda_i, r_matrix, t_vector
+
+    @staticmethod
+    def _check_points(source_points, target_points):
+        source_coords = np.array(source_points, dtype=float).T
+
+        if source_coords.ndim != 2:
+            err_msg = "source_points array must have dimension = 2."
+            raise ValueError(err_msg)
+
+        if source_coords.shape[0] != 3:
+            err_msg = "There are not three coordinates in source points."
+            raise ValueError(err_msg)
+
+        n = source_coords.shape[1]
+
+        if n == 1 or (source_coords[None, 0] == source_coords).all():
+            err_msg = "There are not two distinct source points."
+            raise ValueError(err_msg)
+
+        target_coords = np.array(target_points, dtype=float).T
+
+        if target_coords.ndim != 2:
+            err_msg = "target_points array must have dimension = 2."
+            raise ValueError(err_msg)
+
+        if target_coords.shape[0] != 3:
+            err_msg = "There are not three coordinates in target points."
+            raise ValueError(err_msg)
+
+        if target_coords.shape[1] != n:
+            err_msg = "There are not as many target points as source points."
+            raise ValueError(err_msg)
+
+        return source_coords, target_coords
+
+    @staticmethod
+    def _check_lambda(lambda_0):
+        lambda_0 = float(lambda_0)
+
+        if lambda_0 == 0:
+            err_msg = "lambda_0 cannot be zero."
+            raise ValueError(err_msg)
+
+        return lambda_0
+
+    @staticmethod
+    def _solve(source_coords, target_coords, alpha_0, scale, lambda_0):
+        # the planar solution can't force mirroring, so negative lambda_0 stays on the quaternion path
+        if lambda_0 > 0 and not source_coords[2].any() and not target_coords[2].any():
+            return Simil._solve_planar(source_coords, target_coords, alpha_0, scale, lambda_0)
+        return Simil._solve_quaternion(source_coords, target_coords, alpha_0, scale, lambda_0)
 
     # ================
     # Process function
@@ -142,6 +280,10 @@ class Simil:
         """
         Find similarity transformation parameters given a set of control points
 
+        If all z coordinates of source and target points are zero, the
+        closed-form 2D Helmert solution is used instead of the quaternion
+        eigenvalue solution.
+
         Parameters
         ----------
         source_points : array_like
@@ -164,7 +306,7 @@ class Simil:
             Default is True.
         lambda_0 : float, optional
             Multiplier factor to find the first solution. Default is 1.0.
-            If `scale=True`, a recursion is implemented to find a better
+            If `scale=True`, an iteration is implemented to find a better
             value. If it is negative, forces mirroring. Can't be zero.
 
         Returns
@@ -179,36 +321,10 @@ class Simil:
 
         # declarations and checkups
 
-        source_coords = np.array(source_points, dtype=float).T
-
-        if source_coords.ndim != 2:
-            err_msg = "source_points array must have dimension = 2."
-            raise ValueError(err_msg)
-
-        if source_coords.shape[0] != 3:
-            err_msg = "There are not three coordinates in source points."
-            raise ValueError(err_msg)
+        source_coords, target_coords = Simil._check_points(source_points, target_points)
 
         n = source_coords.shape[1]
 
-        if n == 1 or (source_coords[None, 0] == source_coords).all():
-            err_msg = "There are not two distinct source points."
-            raise ValueError(err_msg)
-
-        target_coords = np.array(target_points, dtype=float).T
-
-        if target_coords.ndim != 2:
-            err_msg = "target_points array must have dimension = 2."
-            raise ValueError(err_msg)
-
-        if target_coords.shape[0] != 3:
-            err_msg = "There are not three coordinates in target points."
-            raise ValueError(err_msg)
-
-        if target_coords.shape[1] != n:
-            err_msg = "There are not as many target points as source points."
-            raise ValueError(err_msg)
-
         if alpha_0 is None:
             alpha_0 = np.ones(n)
         else:
@@ -222,42 +338,68 @@ class Simil:
             err_msg = "There are not as many alpha_0 coefficients as " "control points."
             raise ValueError(err_msg)
 
-        lambda_0 = float(lambda_0)
-
-        if lambda_0 == 0:
-            err_msg = "lambda_0 cannot be zero."
-            raise ValueError(err_msg)
+        lambda_0 = Simil._check_lambda(lambda_0)
 
         # processes
 
-        source_q_coords = np.concatenate((source_coords, np.zeros((1, n))))
-
-        target_q_coords = np.concatenate((target_coords, np.zeros((1, n))))
+        lambda_i, r_matrix, t_vector = Simil._solve(source_coords, target_coords, alpha_0[None, :], scale, lambda_0)
 
-        b_scalar = Simil._get_scalar(alpha_0, source_q_coords)
+        return lambda_i[0], r_matrix[0], t_vector[0]
 
-        c_scalar = np.einsum("i->", alpha_0)
+    @staticmethod
+    def process_many(source_points, target_points, alpha_0, scale=True, lambda_0=1.0):
+        """
+        Find similarity transformation parameters for many weightings of
+        the same set of control points in one call
 
-        q0_w_matrix = Simil._get_w_matrix(source_q_coords.T)
+        Each row of `alpha_0` is one fit. A subset of the control points is
+        selected by setting the weights of all other points to zero, e.g.
+        ``1 - np.eye(n)`` gives all leave-one-out fits. Every row must keep
+        at least two distinct points with a non zero weight.
 
-        qt_q_matrix = Simil._get_q_matrix(target_q_coords.T)
+        Parameters
+        ----------
+        source_points : array_like
+            Shape ``(n, 3)``, see `process`.
+        target_points : array_like
+            Shape ``(n, 3)``, see `process`.
+        alpha_0 : array_like
+            Per fit and per point weights with shape ``(k, n)``, where ``k``
+            is the number of fits.
+        scale : boolean, optional
+            Allow to find a multiplier factor different from lambda_0.
+            Default is True.
+        lambda_0 : float, optional
+            Multiplier factor to find the first solution. Default is 1.0.
 
-        a_matrix = Simil._get_abc_matrices(alpha_0, q0_w_matrix, qt_q_matrix)
+        Returns
+        -------
+        lambda_i : numpy.ndarray
+            Multiplier factors with shape ``(k,)``.
+        r_matrix : numpy.ndarray
+            Rotation matrices with shape ``(k, 3, 3)``.
+        t_vector : numpy.ndarray
+            Translation (column) vectors with shape ``(k, 3, 1)``.
+        """
 
-        b_matrix = Simil._get_abc_matrices(alpha_0, qt_q_matrix)
+        source_coords, target_coords = Simil._check_points(source_points, target_points)
 
-        c_matrix = Simil._get_abc_matrices(alpha_0, q0_w_matrix)
+        n = source_coords.shape[1]
 
-        lambda_i, i = lambda_0, 1
+        alpha_0 = np.array(alpha_0, dtype=float)
 
-        blc_matrix, d_matrix, beta_1, r_quat, lambda_i, i = Simil._get_solution(
-            a_matrix, b_scalar, b_matrix, c_scalar, c_matrix, scale, lambda_i, i
-        )
+        if alpha_0.ndim != 2:
+            err_msg = "alpha_0 array must have dimension = 2."
+            raise ValueError(err_msg)
 
-        r_matrix = Simil._get_r_matrix(r_quat)
+        if alpha_0.shape[1] != n:
+            err_msg = "There are not as many alpha_0 coefficients as " "control points."
+            raise ValueError(err_msg)
 
-        s_quat = Simil._get_s_quat(c_scalar, blc_matrix, r_quat)
+        if (alpha_0.sum(1) == 0).any():
+            err_msg = "Every alpha_0 row needs at least one non zero weight."
+            raise ValueError(err_msg)
 
-        t_vector = np.array(Simil._get_t_vector(r_quat, s_quat)).reshape(3, 1)
+        lambda_0 = Simil._check_lambda(lambda_0)
 
-        return lambda_i, r_matrix, t_vector
+        return Simil._solve(source_coords, target_coords, alpha_0, scale, lambda_0)
@@ -3,7 +3,8 @@ import math
 
 import numpy as np
 from processing.gui import AlgorithmExecutor
-from qgis.core import QgsGeometry, QgsApplication, QgsRectangle, QgsWkbTypes
+from qgis.PyQt.QtGui import QTransform
+from qgis.core import QgsGeometry, QgsApplication, QgsRectangle, QgsWkbTypes, QgsFeatureRequest
 
 from .simil import Simil
 
@@ -16,6 +17,24 @@ from .simil import Simil
 
 class TransformationCalculations:
 
+    ## number of geometries which are written to the provider in one changeGeometryValues call
+    geometryBatchSize = 5000
+
+    ## robust estimation (RANSAC start and IRLS with Tukey weights) instead of least-squares
+    robustEstimation = False
+    ## maximum number of two point samples for the RANSAC start
+    robustMaxSamples = 500
+    ## number of samples which are solved in one batch, the sampling stops early after a perfect batch
+    robustSampleBatchSize = 100
+    ## maximum number of reweighting iterations
+    robustMaxIterations = 20
+    ## the reweighting stops if no weight changes more than this value
+    robustTolerance = 0.000001
+    ## tuning constant of the Tukey biweight function (95 % efficiency)
+    robustTuning = 4.685
+    ## lower bound of the robust standard deviation, so that exact GCPs are not marked as outliers
+    robustMinSigma = 0.001
+
     ## The constructor.
     #
     #  @param dialogInstance pointer to the dialogInstance
@@ -27,14 +46,15 @@ class TransformationCalculations:
     #
     # - calls calcTransformation2D() to calculate the 2D-parameters
     # - calls calcTransformationZ() to calculate Z translation value
+    # - calls calcLeaveOneOutDiagnostics() to find bad GCPs
     #
     # \param GcpData Dictionary
     # @returns zAngle, translationX, translationY, globalError2D, translationZ, GcpData, globalErrorZ
     def calcTransformationParams(self, GcpData):
 
-        zAngle, translationX, translationY, globalError2D, pointError2D = self.calcTransformation2D(GcpData)
+        zAngle, translationX, translationY, globalError2D, pointError2D, outliersXY = self.calcTransformation2D(GcpData)
 
-        translationZ, residualsZ, globalErrorZ = self.calcTransformationZ(GcpData)
+        translationZ, residualsZ, globalErrorZ, outliersZ = self.calcTransformationZ(GcpData)
 
         # Rueckgabe
         for i in range(0, len(GcpData)):
@@ -42,28 +62,148 @@ class TransformationCalculations:
                 for z in range(0, len(residualsZ)):
                     if GcpData[i]["uuid"] == residualsZ[z][3]:
                         GcpData[i]["errorZ"] = residualsZ[z][2]
+                GcpData[i]["outlierZ"] = GcpData[i]["uuid"] in outliersZ
             else:
                 GcpData[i]["errorZ"] = -99999
+                GcpData[i]["outlierZ"] = -99999
 
         for i in range(0, len(GcpData)):
             if GcpData[i]["usage"] == "3D" or GcpData[i]["usage"] == "2D":
                 for z in range(0, len(pointError2D)):
                     if GcpData[i]["uuid"] == pointError2D[z][7]:
                         GcpData[i]["errorXY"] = pointError2D[z][6]
+                GcpData[i]["outlierXY"] = GcpData[i]["uuid"] in outliersXY
             else:
                 GcpData[i]["errorXY"] = -99999
+                GcpData[i]["outlierXY"] = -99999
+
+        self.calcLeaveOneOutDiagnostics(GcpData)
 
         return zAngle, translationX, translationY, globalError2D, translationZ, GcpData, globalErrorZ
 
+    ## \brief Leave-one-out diagnostics for all GCPs
+    #
+    # All leave-one-out fits are calculated in one batched call of Simil.process_many(),
+    # the Z diagnostics follow in closed form from the mean z translation.
+    # The results are written to GcpData (-99999 if a value is not available):
+    # - looErrorXY - 2D residual of the point against the fit without this point
+    # - studentizedXY - looErrorXY divided by its expected standard deviation
+    # - influenceXY - RMS shift of all transformed GCPs when the point is left out
+    # - looErrorZ - z residual of the point against the translation without this point
+    # - studentizedZ - looErrorZ divided by its expected standard deviation
+    #
+    # \param GcpData Dictionary
+    # @returns GcpData
+    def calcLeaveOneOutDiagnostics(self, GcpData):
+
+        for pointObj in GcpData:
+            pointObj["looErrorXY"] = -99999
+            pointObj["studentizedXY"] = -99999
+            pointObj["influenceXY"] = -99999
+            pointObj["looErrorZ"] = -99999
+            pointObj["studentizedZ"] = -99999
+
+        objXY = [pointObj for pointObj in GcpData if pointObj["usage"] == "3D" or pointObj["usage"] == "2D"]
+        objZ = [pointObj for pointObj in GcpData if pointObj["usage"] == "3D" or pointObj["usage"] == "Z"]
+
+        # mindestens drei Punkte, damit nach dem Weglassen noch zwei Punkte bleiben
+        if len(objXY) >= 3:
+            source = np.array([pointObj["sourcePoints"] for pointObj in objXY], dtype=float)
+            target = np.array([pointObj["targetPoints"] for pointObj in objXY], dtype=float)
+            looErrorXY, studentizedXY, influenceXY = self.leaveOneOutDiagnostics2d(source, target)
+
+            for i, pointObj in enumerate(objXY):
+                pointObj["looErrorXY"] = looErrorXY[i].item()
+                if np.isfinite(studentizedXY[i]):
+                    pointObj["studentizedXY"] = studentizedXY[i].item()
+                pointObj["influenceXY"] = influenceXY[i].item()
+
+        if len(objZ) >= 3:
+            sourceZ = np.array([pointObj["sourcePoints"][2] for pointObj in objZ], dtype=float)
+            targetZ = np.array([pointObj["targetPoints"][2] for pointObj in objZ], dtype=float)
+            looErrorZ, studentizedZ = self.leaveOneOutDiagnostics1d(sourceZ, targetZ)
+
+            for i, pointObj in enumerate(objZ):
+                pointObj["looErrorZ"] = looErrorZ[i].item()
+                if np.isfinite(studentizedZ[i]):
+                    pointObj["studentizedZ"] = studentizedZ[i].item()
+
+        return GcpData
+
+    ## \brief Leave-one-out residuals, studentized residuals and influence of a 2D rigid transformation
+    #
+    # \param source source coordinates as numpy array (n, 3), only x and y are used
+    # \param target target coordinates as numpy array (n, 3), only x and y are used
+    # @returns looError, studentized, influence as numpy arrays (n,)
+    def leaveOneOutDiagnostics2d(self, source, target):
+
+        n = len(source)
+
+        source2D = np.zeros((n, 3))
+        source2D[:, 0:2] = source[:, 0:2]
+        target2D = np.zeros((n, 3))
+        target2D[:, 0:2] = target[:, 0:2]
+
+        # Fit mit allen Punkten und alle n Leave-one-out Fits in einem Aufruf
+        weights = np.vstack([np.ones(n), 1 - np.eye(n)])
+        m, r, t = Simil.process_many(source2D, target2D, weights, scale=False)
+
+        # transformierte Quellpunkte fuer jeden Fit (n + 1, n, 2)
+        transformed = self.transformPoints2d(m, r, t, source2D)
+        residuals = np.linalg.norm(transformed - target2D[None, :, 0:2], axis=2)
+
+        looFits = transformed[1:]
+        looError = residuals[1:][np.arange(n), np.arange(n)]
+
+        # Standardabweichung eines Punktes (2D) ohne den Punkt, 3 Parameter bei 2 Beobachtungen je Punkt
+        sumSquares = (residuals[1:] ** 2).sum(axis=1) - looError**2
+        redundancy = 2 * (n - 1) - 3
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sigma = np.sqrt(2 * sumSquares / redundancy) if redundancy > 0 else np.full(n, np.nan)
+
+            # Hebelwirkung des Punktes bezogen auf den Schwerpunkt der uebrigen Punkte
+            centroid = (source2D[:, 0:2].sum(axis=0) - source2D[:, 0:2]) / (n - 1)
+            distSquares = ((source2D[None, :, 0:2] - centroid[:, None, :]) ** 2).sum(axis=2)
+            ownDistSquares = distSquares[np.arange(n), np.arange(n)]
+            leverage = 1 / (n - 1) + ownDistSquares / (2 * (distSquares.sum(axis=1) - ownDistSquares))
+
+            studentized = looError / (sigma * np.sqrt(1 + leverage))
+
+        influence = np.sqrt(((looFits - transformed[0][None, :, :]) ** 2).sum(axis=2).mean(axis=1))
+
+        return looError, studentized, influence
+
+    ## \brief Leave-one-out residuals and studentized residuals of the 1D z translation
+    #
+    # \param sourceZ source z values as numpy array (n,)
+    # \param targetZ target z values as numpy array (n,)
+    # @returns looError, studentized as numpy arrays (n,)
+    def leaveOneOutDiagnostics1d(self, sourceZ, targetZ):
+
+        n = len(sourceZ)
+
+        diff = targetZ - sourceZ
+        residuals = diff - diff.mean()
+
+        # Residuum gegen den Mittelwert der uebrigen Punkte
+        looError = residuals * n / (n - 1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sumSquares = (residuals**2).sum() - residuals**2 * n / (n - 1)
+            sigma = np.sqrt(sumSquares / (n - 2))
+            studentized = residuals / (sigma * np.sqrt(1 - 1 / n))
+
+        return looError, studentized
+
     ## \brief Calculates the 2D-parameters for the transformation
     #
     # - Prepares data for the calculation
-    # - calls simil.process()
+    # - calls simil.process() or robustSimil2d() if robustEstimation is set
     # - calls rotMat2Euler() to get the euler angle from rotation matrix
     # - calls estimateError2d() to calculate the errors
     #
     # \param GcpData Dictionary
-    # @returns zAngle, translationX, translationY, globalError2D, pointError2D
+    # @returns zAngle, translationX, translationY, globalError2D, pointError2D, outliersXY (uuids)
 
     def calcTransformation2D(self, GcpData):
         sourcePointsWithId = []
@@ -94,7 +234,12 @@ class TransformationCalculations:
         targetPoints2D = targetPoints2D.astype(float)
 
         # start estimation of the 2D parameters
-        m, r, t = Simil.process(sourcePoints2D, targetPoints2D, scale=False)
+        outliersXY = []
+        if self.robustEstimation:
+            m, r, t, weights = self.robustSimil2d(sourcePoints2D, targetPoints2D)
+            outliersXY = [sourcePointsWithId[i][3] for i in np.flatnonzero(weights == 0)]
+        else:
+            m, r, t = Simil.process(sourcePoints2D, targetPoints2D, scale=False)
         # euler from rotation matrix
         E = self.rotMat2Euler(r)
         # zAngle
@@ -114,16 +259,16 @@ class TransformationCalculations:
         globalError2D, pointError2D = self.estimateError2d([m, r, t], sourcePointsWithId, targetPointsWithId)
 
         # print('translationX', translationX)
-        return zAngle, translationX, translationY, globalError2D, pointError2D
+        return zAngle, translationX, translationY, globalError2D, pointError2D, outliersXY
 
     ## \brief Calculates the Z-translation for the transformation
     #
     # - Prepares data for the calculation
-    # - calls calculate1dTranslationParams()
+    # - calls calculate1dTranslationParams() or robustTranslation1d() if robustEstimation is set
     # - calls estimateError1d() to calculate the error
     #
     # \param GcpData Dictionary
-    # @returns translationZ, residualsZ, globalErrorZ
+    # @returns translationZ, residualsZ, globalErrorZ, outliersZ (uuids)
 
     def calcTransformationZ(self, GcpData):
 
@@ -148,11 +293,138 @@ class TransformationCalculations:
         targetPointsZ = targetPointsZ.astype(float)
 
         # calculation of z translation
-        translationZ = self.calculate1dTranslationParams(sourcePointsZ, targetPointsZ)
+        outliersZ = []
+        if self.robustEstimation:
+            translationZ, weights = self.robustTranslation1d(sourcePointsZ, targetPointsZ)
+            outliersZ = [sourcePointsZWithId[i][3] for i in np.flatnonzero(weights == 0)]
+        else:
+            translationZ = self.calculate1dTranslationParams(sourcePointsZ, targetPointsZ)
         # error calculation
         residualsZ, globalErrorZ = self.estimateError1d(translationZ, sourcePointsZWithId, targetPointsZWithId)
 
-        return translationZ, residualsZ, globalErrorZ
+        return translationZ, residualsZ, globalErrorZ, outliersZ
+
+    ## \brief Robust 2D transformation, not affected by single swapped or mis-coded GCPs
+    #
+    # - RANSAC start: rigid fits of two point samples, solved batchwise with Simil.process_many(),
+    #   the sample with the smallest median residual wins
+    # - IRLS: Simil.process() with Tukey biweights as alpha_0 until the weights are stable
+    #
+    # \param source source points as numpy array (n, 3) with z = 0
+    # \param target target points as numpy array (n, 3) with z = 0
+    # @returns m, r, t, weights - points with weight 0 are outliers
+    def robustSimil2d(self, source, target):
+
+        n = len(source)
+
+        # alle Punktpaare, bei zu vielen Paaren eine reproduzierbare Stichprobe
+        pairs = np.transpose(np.triu_indices(n, 1))
+        if len(pairs) > self.robustMaxSamples:
+            rng = np.random.default_rng(0)
+            pairs = pairs[rng.choice(len(pairs), self.robustMaxSamples, replace=False)]
+        pairs = pairs[(source[pairs[:, 0], 0:2] != source[pairs[:, 1], 0:2]).any(axis=1)]
+
+        bestMedian = np.inf
+        best = None
+        for start in range(0, len(pairs), self.robustSampleBatchSize):
+            batch = pairs[start : start + self.robustSampleBatchSize]
+            sampleWeights = np.zeros((len(batch), n))
+            sampleWeights[np.arange(len(batch)), batch[:, 0]] = 1
+            sampleWeights[np.arange(len(batch)), batch[:, 1]] = 1
+
+            m, r, t = Simil.process_many(source, target, sampleWeights, scale=False)
+            medians = np.median(self.residuals2d(m, r, t, source, target), axis=1)
+
+            i = np.argmin(medians)
+            if medians[i] < bestMedian:
+                bestMedian = medians[i]
+                best = (m[i], r[i], t[i])
+
+            if bestMedian <= self.robustMinSigma:
+                break
+
+        weights = np.ones(n)
+        if best is None:
+            m, r, t = Simil.process(source, target, scale=False)
+            return m, r, t, weights
+
+        m, r, t = best
+        for i in range(self.robustMaxIterations):
+            residuals = self.residuals2d(np.array([m]), np.array([r]), np.array([t]), source, target)[0]
+            newWeights = self.tukeyWeights(residuals)
+
+            # fuer die Loesung werden mindestens zwei Punkte gebraucht
+            if np.count_nonzero(newWeights) < 2:
+                break
+
+            m, r, t = Simil.process(source, target, alpha_0=newWeights, scale=False)
+            converged = np.abs(newWeights - weights).max() < self.robustTolerance
+            weights = newWeights
+            if converged:
+                break
+
+        return m, r, t, weights
+
+    ## \brief Robust 1D translation as Tukey weighted mean, starting from the median
+    #
+    # \param sourceZ source z values as numpy array (n,)
+    # \param targetZ target z values as numpy array (n,)
+    # @returns translationZ, weights - points with weight 0 are outliers
+    def robustTranslation1d(self, sourceZ, targetZ):
+
+        diff = targetZ - sourceZ
+        translationZ = np.median(diff)
+        weights = np.ones(len(diff))
+
+        for i in range(self.robustMaxIterations):
+            newWeights = self.tukeyWeights(np.abs(diff - translationZ))
+            translationZ = np.average(diff, weights=newWeights)
+            converged = np.abs(newWeights - weights).max() < self.robustTolerance
+            weights = newWeights
+            if converged:
+                break
+
+        return translationZ.item(), weights
+
+    ## \brief Tukey biweights of residuals, scaled with the median absolute residual
+    #
+    # \param residuals absolute residuals as numpy array (n,)
+    # @returns weights as numpy array (n,)
+    def tukeyWeights(self, residuals):
+
+        sigma = max(1.4826 * np.median(residuals), self.robustMinSigma)
+        u = residuals / (self.robustTuning * sigma)
+        weights = np.where(u < 1, (1 - u**2) ** 2, 0.0)
+
+        return weights
+
+    ## \brief 2D residuals of the source points for a batch of transformations
+    #
+    # \param m multiplier factors (k,)
+    # \param r rotation matrices (k, 3, 3)
+    # \param t translation vectors (k, 3, 1)
+    # \param source source points as numpy array (n, 3)
+    # \param target target points as numpy array (n, 3)
+    # @returns residuals as numpy array (k, n)
+    def residuals2d(self, m, r, t, source, target):
+
+        transformed = self.transformPoints2d(m, r, t, source)
+        residuals = np.linalg.norm(transformed - target[None, :, 0:2], axis=2)
+
+        return residuals
+
+    ## \brief Transforms source points with a batch of 2D transformations
+    #
+    # \param m multiplier factors (k,)
+    # \param r rotation matrices (k, 3, 3)
+    # \param t translation vectors (k, 3, 1)
+    # \param source source points as numpy array (n, 3)
+    # @returns transformed xy coordinates as numpy array (k, n, 2)
+    def transformPoints2d(self, m, r, t, source):
+
+        transformed = m[:, None, None] * np.einsum("kij,nj->kni", r[:, 0:2, 0:2], source[:, 0:2]) + t[:, None, 0:2, 0]
+
+        return transformed.real
 
     ## \brief layer translation Z direction
     #
@@ -325,6 +597,96 @@ class TransformationCalculations:
         AlgorithmExecutor.execute_in_place(translateAlg, paramTranslate)
         layer.commitChanges()
 
+    ## \brief Combines rotation, XY translation and Z translation into one 4x4 matrix
+    #
+    # The rotation is counterclockwise by zAngle around the origin (0,0), followed by the translation.
+    # This is the same order as layerRotation() and layerTranslationXYZ() in forward direction.
+    # The reverse transformation is the inverse of this matrix.
+    #
+    # \param zAngle - rotation angle in degree
+    # \param translationX
+    # \param translationY
+    # \param translationZ
+    # \param tranlationDirection - forward or reverse
+    # @returns 4x4 numpy matrix
+    def transformationMatrix(self, zAngle, translationX, translationY, translationZ, tranlationDirection="forward"):
+
+        angleRad = math.radians(zAngle)
+        cosA = math.cos(angleRad)
+        sinA = math.sin(angleRad)
+
+        matrix = np.array(
+            [
+                [cosA, -sinA, 0.0, translationX],
+                [sinA, cosA, 0.0, translationY],
+                [0.0, 0.0, 1.0, translationZ],
+                [0.0, 0.0, 0.0, 1.0],
+            ]
+        )
+
+        if tranlationDirection == "reverse":
+            matrix = np.linalg.inv(matrix)
+
+        return matrix
+
+    ## \brief Applies a 4x4 transformation matrix to all features of a layer in one pass
+    #
+    # - the geometries are read without attributes and transformed in place (C++ QgsGeometry.transform())
+    # - changed geometries are written back in batches with dataProvider().changeGeometryValues()
+    # - the layer extent is calculated during the same pass, the spatial index is rebuilt once at the end
+    #
+    # Only rotation around the z axis, translation and a z translation are supported
+    # (no scale or tilt), which is all that transformationMatrix() creates.
+    #
+    # \param layer
+    # \param matrix - 4x4 numpy matrix from transformationMatrix()
+    # @returns extent of the transformed layer
+    def layerAffineTransformation(self, layer, matrix):
+
+        print("Transformation - Affine: ", layer.name())
+
+        qTransform = QTransform(
+            float(matrix[0, 0]),
+            float(matrix[1, 0]),
+            float(matrix[0, 1]),
+            float(matrix[1, 1]),
+            float(matrix[0, 3]),
+            float(matrix[1, 3]),
+        )
+        zTranslate = float(matrix[2, 3])
+        zScale = float(matrix[2, 2])
+
+        provider = layer.dataProvider()
+
+        targetExtent = QgsRectangle()
+        targetExtent.setNull()
+
+        request = QgsFeatureRequest()
+        request.setNoAttributes()
+
+        changedGeometries = {}
+        for feat in layer.getFeatures(request):
+            geom = feat.geometry()
+            if geom.isNull():
+                continue
+
+            geom.transform(qTransform, zTranslate, zScale)
+            targetExtent.combineExtentWith(geom.boundingBox())
+            changedGeometries[feat.id()] = geom
+
+            if len(changedGeometries) >= self.geometryBatchSize:
+                provider.changeGeometryValues(changedGeometries)
+                changedGeometries = {}
+
+        if changedGeometries:
+            provider.changeGeometryValues(changedGeometries)
+
+        layer.setExtent(targetExtent)
+        provider.createSpatialIndex()
+        layer.triggerRepaint()
+
+        return targetExtent
+
     ## \brief Calculates the current extent of a layer
     #
     # \param layer
@@ -129,6 +129,7 @@ class TransformationDialog(QMainWindow):
 
         self.actionExport.triggered.connect(self.exportTxt)
         self.actionImport.triggered.connect(self.importTxt)
+        self.actionRobust.toggled.connect(self.setRobustEstimation)
         self.takeParametersBtn.clicked.connect(self.takeTransformParams)
 
     ## \brief create actions
@@ -143,6 +144,11 @@ class TransformationDialog(QMainWindow):
         iconImport = QIcon(ICON_PATHS["mActionLoadGCPpoints"])
         self.actionImport = QAction(iconImport, "Import data", self)
 
+        # Robuste Schaetzung
+        self.actionRobust = QAction("Robust", self)
+        self.actionRobust.setCheckable(True)
+        self.actionRobust.setToolTip("Robuste Schätzung - Ausreißer unter den Georeferenzierungspunkten werden erkannt")
+
     ## \brief create toolbars
     #
     # - toolbarMap
@@ -160,6 +166,7 @@ class TransformationDialog(QMainWindow):
         self.toolbarExchange = self.addToolBar("Datenaustausch")
         self.toolbarExchange.addAction(self.actionExport)
         self.toolbarExchange.addAction(self.actionImport)
+        self.toolbarExchange.addAction(self.actionRobust)
         spacer = QWidget()
         spacer.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.toolbarExchange.addWidget(spacer)
@@ -202,7 +209,7 @@ class TransformationDialog(QMainWindow):
     # - check the conditions for the transformation checkTransformationConditions()
     # - calculate transformation parameters TransformationCalculations.calcTransformationParams()
     # - update results in parambar TransformationDialogParambar.showTransformationParamsMessage()
-    # - update the point residuals in the gcpTable TransformationDialogTable.updateGcpTableResiduals()
+    # - update the point residuals and leave-one-out diagnostics in the gcpTable TransformationDialogTable.updateGcpTableResiduals()
 
     def estimateParameters(self):
 
@@ -241,6 +248,15 @@ class TransformationDialog(QMainWindow):
 
             self.transformationParamsBar.setEmptyTransformationParamsBar()
 
+    ## \brief Switch between least-squares and robust estimation of the transformation parameters
+    #
+    # \param state - True for robust estimation
+    def setRobustEstimation(self, state):
+
+        self.paramCalc.robustEstimation = state
+        if self.gcpTable.rowCount() > 0:
+            self.estimateParameters()
+
     ## \brief Check the conditions for the transformation
     #
     # - at least two XY- point pairs
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtGui import QColor
 from qgis.PyQt.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QComboBox
 
 
@@ -43,10 +44,22 @@ class TransformationDialogTable(QTableWidget):
             "Punkt verwenden",
         ]
 
+        # Leave-one-out Diagnose, nur Anzeige (nicht im Export)
+        self.diagnosticHeaders = {
+            "LOO XY": "looErrorXY",
+            "Stud. XY": "studentizedXY",
+            "Einfluss XY": "influenceXY",
+            "LOO Z": "looErrorZ",
+            "Stud. Z": "studentizedZ",
+        }
+
+        # ab diesem studentisierten Residuum wird die Zelle markiert
+        self.studentizedLimit = 3.0
+
         self.setObjectName("gcpTable")
         self.setRowCount(0)
-        self.setColumnCount(12)
-        self.setHorizontalHeaderLabels(self.colHeaders)
+        self.setColumnCount(len(self.colHeaders) + len(self.diagnosticHeaders))
+        self.setHorizontalHeaderLabels(self.colHeaders + list(self.diagnosticHeaders))
         self.setStyleSheet(
             "QTableWidget::item { padding: 4px } QTableWidget::item:selected{ background-color: rgba(255, 255, 255, 100%) }"
         )
@@ -137,39 +150,71 @@ class TransformationDialogTable(QTableWidget):
 
         return GcpData
 
-    ## \brief Residuals columns in table will be updated
+    ## \brief Residuals and leave-one-out diagnostics columns in table will be updated
+    #
+    # The cell of the largest studentized residual is marked if it exceeds self.studentizedLimit,
+    # the error cells of outliers of the robust estimation are marked as well
     #
     # \param GcpDataResiduals
     # @returns
     def updateGcpTableResiduals(self, GcpDataResiduals):
 
         self.hide()
-        rowCount = self.rowCount()
-        columnCount = self.columnCount()
 
-        for i in range(0, rowCount):
+        residualsByUuid = {pointObj["uuid"]: pointObj for pointObj in GcpDataResiduals}
 
-            tblPointUuid = None
+        columns = {self.horizontalHeaderItem(j).text(): j for j in range(0, self.columnCount())}
+        valueColumns = {"errorXY": columns["Error XY"], "errorZ": columns["Error Z"]}
+        for head, key in self.diagnosticHeaders.items():
+            valueColumns[key] = columns[head]
 
-            for j in range(0, columnCount):
+        maxStudentized = {"studentizedXY": (self.studentizedLimit, None), "studentizedZ": (self.studentizedLimit, None)}
 
-                head = self.horizontalHeaderItem(j).text()
-                if head == "UUID":
-                    tblPointUuid = self.item(i, j).text()
+        for i in range(0, self.rowCount()):
+
+            pointObj = residualsByUuid.get(self.item(i, columns["UUID"]).text())
+            if pointObj is None:
+                continue
 
             # in Zelle der Tabelle eintragen
-            for j in range(0, columnCount):
-                head = self.horizontalHeaderItem(j).text()
+            for key, j in valueColumns.items():
+                item = self.item(i, j)
+                item.setText(str(round(pointObj.get(key, -99999), 3)))
+                item.setBackground(QColor(0, 0, 0, 0))
+
+            # Ausreisser der robusten Schaetzung markieren
+            if pointObj.get("outlierXY") is True:
+                self.item(i, valueColumns["errorXY"]).setBackground(QColor(255, 200, 100))
+            if pointObj.get("outlierZ") is True:
+                self.item(i, valueColumns["errorZ"]).setBackground(QColor(255, 200, 100))
+
+            for key in maxStudentized:
+                value = abs(pointObj.get(key, -99999))
+                if pointObj.get(key, -99999) != -99999 and value > maxStudentized[key][0]:
+                    maxStudentized[key] = (value, i)
+
+        # Punkt mit dem groessten studentisierten Residuum markieren
+        for key, (value, row) in maxStudentized.items():
+            if row is not None:
+                self.item(row, valueColumns[key]).setBackground(QColor(255, 150, 150))
 
-                for pointObj in GcpDataResiduals:
-                    if pointObj["uuid"] == tblPointUuid:
-                        if head == "Error XY":
-                            self.item(i, j).setText(str(round(pointObj["errorXY"], 3)))
-                        if head == "Error Z":
-                            self.item(i, j).setText(str(round(pointObj["errorZ"], 3)))
-                        break
         self.show()
 
+    ## \brief Adds empty items for the leave-one-out diagnostics columns in a row
+    #
+    # \param rowPosition
+    # @returns
+    def addDiagnosticItems(self, rowPosition):
+
+        gcpTableHeader = self.horizontalHeader()
+
+        for k in range(0, len(self.diagnosticHeaders)):
+            col = len(self.colHeaders) + k
+            diagnosticItem = QTableWidgetItem(str(-99999))
+            diagnosticItem.setFlags(Qt.ItemIsEnabled)
+            self.setItem(rowPosition, col, diagnosticItem)
+            gcpTableHeader.setSectionResizeMode(col, QHeaderView.ResizeToContents)
+
     ## \brief Update der GCP-Tabelle
     #
     # \param gcpSource
@@ -298,6 +343,9 @@ class TransformationDialogTable(QTableWidget):
             self.setCellWidget(rowPosition, 11, usageCombo)
             gcpTableHeader.setSectionResizeMode(11, QHeaderView.Stretch)
 
+            # Leave-one-out Diagnose
+            self.addDiagnosticItems(rowPosition)
+
         # hide column with ugly uuid
         self.setColumnHidden(0, True)
 
@@ -416,6 +464,9 @@ class TransformationDialogTable(QTableWidget):
             self.setCellWidget(rowPosition, 11, usageCombo)
             gcpTableHeader.setSectionResizeMode(11, QHeaderView.Stretch)
 
+            # Leave-one-out Diagnose
+            self.addDiagnosticItems(rowPosition)
+
         # hide column with ugly uuid
         self.setColumnHidden(0, True)
         self.show()
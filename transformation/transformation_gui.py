@@ -670,11 +670,8 @@ class TransformationGui:
     # - check validity of the inputlayers checkInputlayersValidity()
     # - Backup of the folders Shape and Projekt to the folder Backup Transformation backupBeforeTransformation()
     # - set target CRS to the layer
-    # - create spatial index for the layer TransformationCalculations.createLayerSpatialIndex()
-    # - do the rotation of the layer TransformationCalculations.layerRotation()
-    # - calculate translation in z direction TransformationCalculations.layerTranslationZ()
-    # - calculate translation in xy direction TransformationCalculations.layerTranslationXY
-    # - recalculate the extent of the layer TransformationCalculations.recalculateLayerExtent()
+    # - combine rotation and translation to one matrix TransformationCalculations.transformationMatrix()
+    # - transform the layer in one pass, including extent and spatial index TransformationCalculations.layerAffineTransformation()
     # - do some GUI updates
     # - save the current project saveProject()
 
@@ -694,6 +691,10 @@ class TransformationGui:
                 inputLayers = self.getInputlayers(False)
                 self.backupBeforeTransformation()
 
+                transformationMatrix = self.paramCalc.transformationMatrix(
+                    self.zAngle, self.translationX, self.translationY, self.translationZ, "forward"
+                )
+
                 for layer in inputLayers:
 
                     print("layer_name: ", layer.name())
@@ -702,42 +703,8 @@ class TransformationGui:
 
                     layer.setCrs(QgsCoordinateReferenceSystem(self.targetCrs))
 
-                    self.paramCalc.createLayerSpatialIndex(layer)
-
-                    layerType = layer.wkbType()
-
-                    print("layerType: ", layerType)
-                    # Abfrage nach Z und ZM Single Layertypen - layerTranslationXYZ gibt dort keinen korrekten Z Wert aus
-                    # 3002 LineStringZM , 3001 PointZM, 3003 PolygonZM
-                    if (
-                        layerType == QgsWkbTypes.PointZM
-                        or layerType == QgsWkbTypes.LineStringZM
-                        or layerType == QgsWkbTypes.PolygonZM
-                    ):
-
-                        print("Translation XY")
-
-                        # Rotation
-                        self.paramCalc.layerRotation(layer, "forward", self.zAngle)
-
-                        # Z-Translation - unbedingt zuerst ausführen sonst Fehler bei Extentberechnung
-                        self.paramCalc.layerTranslationZ(layer, "forward", self.translationZ)
-
-                        # Translation in X und Y
-                        self.paramCalc.layerTranslationXY(layer, "forward", self.translationX, self.translationY)
-                    else:
-                        print("Translation XYZ")
-                        # Rotation
-                        self.paramCalc.layerRotation(layer, "forward", self.zAngle)
-                        # Translation in X, Y und Z
-                        self.paramCalc.layerTranslationXYZ(
-                            layer, "forward", self.translationX, self.translationY, self.translationZ
-                        )
-
-                    # Recalculate Extent
-                    self.paramCalc.recalculateLayerExtent(layer)
-
-                    self.paramCalc.createLayerSpatialIndex(layer)
+                    # Rotation, Translation in X, Y und Z und Extent in einem Durchlauf
+                    self.paramCalc.layerAffineTransformation(layer, transformationMatrix)
 
                     layer.removeSelection()
 
@@ -771,11 +738,8 @@ class TransformationGui:
     # - check if transformation paramters are available
     # - check validity of the inputlayers checkInputlayersValidity()
     # - set target CRS to the layer
-    # - create spatial index for the layer TransformationCalculations.createLayerSpatialIndex()
-    # - calculate translation in z direction TransformationCalculations.layerTranslationZ()
-    # - calculate translation in xy direction TransformationCalculations.layerTranslationXY
-    # - do the rotation of the layer TransformationCalculations.layerRotation()
-    # - recalculate the extent of the layer TransformationCalculations.recalculateLayerExtent()
+    # - inverse matrix of the transformation TransformationCalculations.transformationMatrix()
+    # - transform the layer in one pass, including extent and spatial index TransformationCalculations.layerAffineTransformation()
     # - do some GUI updates
 
     def startReverseTransformation(self):
@@ -793,6 +757,10 @@ class TransformationGui:
 
                 inputLayers = self.getInputlayers(False)
 
+                transformationMatrix = self.paramCalc.transformationMatrix(
+                    self.zAngle, self.translationX, self.translationY, self.translationZ, "reverse"
+                )
+
                 for layer in inputLayers:
 
                     print("layer_name", layer.name())
@@ -801,39 +769,8 @@ class TransformationGui:
 
                     layer.setCrs(QgsCoordinateReferenceSystem(self.sourceCrs))
 
-                    self.paramCalc.createLayerSpatialIndex(layer)
-
-                    layerType = layer.wkbType()
-
-                    print("layerType", layerType)
-
-                    # Abfrage nach Z und ZM Single Layertypen - layerTranslationXYZ gibt dort keinen korrekten Z Wert aus
-                    if (
-                        layerType == QgsWkbTypes.PointZM
-                        or layerType == QgsWkbTypes.LineStringZM
-                        or layerType == QgsWkbTypes.PolygonZM
-                    ):  # Z-Translation - unbedingt zuerst ausführen sonst Fehler bei Extentberechnung
-                        self.paramCalc.layerTranslationZ(layer, "reverse", self.translationZ)
-
-                        # Translation in X und Y
-                        self.paramCalc.layerTranslationXY(layer, "reverse", self.translationX, self.translationY)
-
-                        # Rotation
-                        self.paramCalc.layerRotation(layer, "reverse", self.zAngle)
-
-                    else:
-                        # Translation in X, Y und Z
-                        self.paramCalc.layerTranslationXYZ(
-                            layer, "reverse", self.translationX, self.translationY, self.translationZ
-                        )
-
-                        # Rotation
-                        self.paramCalc.layerRotation(layer, "reverse", self.zAngle)
-
-                    # Recalculate Extent
-                    self.paramCalc.recalculateLayerExtent(layer)
-
-                    self.paramCalc.createLayerSpatialIndex(layer)
+                    # inverse Matrix - Translation und Rotation in einem Durchlauf
+                    self.paramCalc.layerAffineTransformation(layer, transformationMatrix)
 
                     layer.removeSelection()
 
@@ -212,30 +212,47 @@ class ProjectSaveFunc:
 
 
 def addPoint3D(layer, point, attListe):
+    addPoints3D(layer, [(point, attListe)])
+
+
+# Punkte mit einem einzigen addFeatures schreiben, Attribute werden direkt am Feature gesetzt
+# points: Liste aus (QgsPoint, {Feldname oder Feldindex: Wert})
+def addPoints3D(layer, points):
     referenceNumber = getCustomProjectVariable("aktcode")
     # geoarch = getCustomProjectVariable('geo-arch')
 
     # ToDo: should geo-arch be included as a field?
-    dateFieldIndex = layer.fields().indexFromName("erf_datum")
-    referenceFieldIndex = layer.fields().indexFromName("aktcode")
+    fields = layer.fields()
+    dateFieldIndex = fields.indexFromName("erf_datum")
+    referenceFieldIndex = fields.indexFromName("aktcode")
     # geoArchFieldIndex = layer.fields().indexFromName('geo-arch')
+    dateOfImport = str(datetime.datetime.now())
+
+    features = []
+    for point, attListe in points:
+        attListe.update(
+            {
+                dateFieldIndex: dateOfImport,
+                referenceFieldIndex: referenceNumber,
+                # geoArchFieldIndex: geoarch
+            }
+        )
 
-    attListe.update(
-        {
-            dateFieldIndex: str(datetime.now()),
-            referenceFieldIndex: referenceNumber,
-            # geoArchFieldIndex: geoarch
-        }
-    )
+        feature = QgsFeature(fields)
+        feature.setGeometry(QgsGeometry(point))
+        for key, value in attListe.items():
+            fieldIndex = fields.indexFromName(key) if isinstance(key, str) else key
+            if fieldIndex >= 0:
+                feature.setAttribute(fieldIndex, value)
+        features.append(feature)
 
-    feature = QgsFeature()
-    fields = layer.fields()
-    feature.setFields(fields)
-    feature.setGeometry(QgsGeometry(point))
-    _, addedFeatures = layer.dataProvider().addFeatures([feature])
+    if not features:
+        return 0
+
+    ok, addedFeatures = layer.dataProvider().addFeatures(features)
     layer.updateExtents()
 
-    layer.dataProvider().changeAttributeValues({addedFeatures[-1].id(): attListe})
+    return len(addedFeatures) if ok else 0
 
 
 # -------------------- Refactoring ----------------------------
@@ -351,29 +368,24 @@ def str2bool(v):
         return v.lower() in ("yes", "true", "on", "t", "1", "2")
 
 
+# Nummern in einem Attributwert: Zahl (bsp. 236) oder alle Ziffernfolgen im Text, Werte mit "_" werden übergangen
+NUMBER_PATTERN = re.compile(r"\d+(?:;\.\d+)?")
+
+
+def numbersInValue(value):
+    if value == None or "_" in str(value):
+        return []
+    try:
+        return [int(value)]
+    except (TypeError, ValueError):
+        return [int(a) for a in NUMBER_PATTERN.findall(str(value))]
+
+
 def maxValue(layer, fieldname):
-    values = []
-    values.append(0)
-    x = 0
+    values = [0]
     idField = layer.dataProvider().fieldNameIndex(fieldname)
     for feat in layer.getFeatures():
-        attrs = feat.attributes()
-        if attrs[idField] != None:
-            x = x + 1
-            try:
-                if "_" in str(attrs[idField]):
-                    continue
-                # Attribute eine Zahl (bsp. 236)
-                values.append(int(attrs[idField]))
-            except ValueError:
-
-                # list = [int(temp)for temp in str(attrs[idField]).split() if temp.isdigit()]
-                # list = [int(s) for s in re.findall(r'-?\d+\.?\d*', str(attrs[idField]))]
-                pattern = re.compile(r"\d+(?:;\.\d+)?")
-                list = pattern.findall(str(attrs[idField]))
-                for a in list:
-                    values.append(int(a))
-                pass
+        values.extend(numbersInValue(feat.attributes()[idField]))
     return int(max(values))
 
 
@@ -523,11 +535,15 @@ def delSelectFeature():
 
 
 def fileLineCount(file):
-    file = open(file)
+    # Zeilenumbrüche blockweise zählen, ohne die Zeilen zu dekodieren
     linecount = 0
-    for line in file:
-        linecount = linecount + 1
-    file.close()
+    lastChunk = b""
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            linecount += chunk.count(b"\n")
+            lastChunk = chunk
+    if lastChunk and not lastChunk.endswith(b"\n"):
+        linecount += 1
     return linecount
 
 
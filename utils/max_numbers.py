@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+import heapq
+import weakref
+
+from qgis.PyQt.QtCore import QObject, pyqtSignal
+from qgis.core import QgsFeatureRequest
+
+from .functions import numbersInValue
+
+
+## @brief Maxima of the numbering fields (bef_nr, fund_nr, ...) of the input layers
+#
+# The maxima are calculated once with one attribute-only request per layer and then kept up to
+# date from the featureAdded, attributeValueChanged and featuresDeleted signals of the layers.
+# Per field a count of every number is kept together with a max-heap (lazy deletion), so a change
+# of a feature only updates the numbers of this feature.
+#
+# Writes directly to the data provider emit none of these signals, the plugin reports the written
+# features with MaxNumberTracker.featuresWritten(layer, features) and bulk writes with
+# MaxNumberTracker.layerChanged(layer).
+#
+class MaxNumberTracker(QObject):
+    maxValuesChanged = pyqtSignal(dict)
+
+    fieldNames = ["bef_nr", "fund_nr", "prof_nr", "prob_nr"]
+
+    # verbundene Tracker, für featuresWritten und layerChanged
+    _trackers = weakref.WeakSet()
+
+    def __init__(self):
+        super().__init__()
+        self.layers = []
+        self.layerIds = set()
+        self.connections = []
+        self.features = {}
+        self.counts = {fieldName: {} for fieldName in self.fieldNames}
+        self.heaps = {fieldName: [] for fieldName in self.fieldNames}
+
+    ## \brief Connect to the signals of the layers
+    #
+    # \param layers list of QgsVectorLayer
+    def connectLayers(self, layers):
+        self.disconnectLayers()
+        self.layers = layers
+        self.layerIds = {layer.id() for layer in layers}
+
+        for layer in layers:
+            connections = [
+                (layer.featureAdded, lambda fid, layer=layer: self.featureAdded(layer, fid)),
+                (layer.featuresDeleted, lambda fids, layer=layer: self.featuresDeleted(layer, fids)),
+                (
+                    layer.attributeValueChanged,
+                    lambda fid, idx, value, layer=layer: self.attributeValueChanged(layer, fid, idx, value),
+                ),
+                (
+                    layer.committedFeaturesAdded,
+                    lambda layerId, features, layer=layer: self.committedFeaturesAdded(layer, features),
+                ),
+                (layer.afterCommitChanges, lambda layer=layer: self.removeTemporaryFeatures(layer)),
+                (layer.afterRollBack, lambda layer=layer: self.reloadLayer(layer)),
+            ]
+            for signal, slot in connections:
+                signal.connect(slot)
+            self.connections.extend(connections)
+
+        MaxNumberTracker._trackers.add(self)
+
+    def disconnectLayers(self):
+        for signal, slot in self.connections:
+            try:
+                signal.disconnect(slot)
+            except (RuntimeError, TypeError):
+                # Layer wurde bereits gelöscht
+                pass
+        self.connections = []
+        self.layerIds = set()
+        MaxNumberTracker._trackers.discard(self)
+
+    ## \brief Report features written to the data provider of a layer to all connected trackers
+    #
+    # Only the numbers of these features are updated.
+    #
+    # \param layer QgsVectorLayer
+    # \param features list of QgsFeature with their final ids
+    @classmethod
+    def featuresWritten(cls, layer, features):
+        for tracker in list(cls._trackers):
+            tracker.setFeatures(layer, features)
+
+    ## \brief Report a bulk write to the data provider of a layer to all connected trackers
+    #
+    # The whole layer is read again, for single features use featuresWritten.
+    #
+    # \param layer QgsVectorLayer
+    @classmethod
+    def layerChanged(cls, layer):
+        for tracker in list(cls._trackers):
+            tracker.reloadLayer(layer)
+
+    ## \brief Calculate the maxima of all layers
+    #
+    def rebuild(self):
+        self.features = {}
+        self.counts = {fieldName: {} for fieldName in self.fieldNames}
+        self.heaps = {fieldName: [] for fieldName in self.fieldNames}
+
+        for layer in self.layers:
+            self._loadLayer(layer)
+
+        self.maxValuesChanged.emit(self.maxValues())
+
+    ## \brief Set the numbers of written features
+    #
+    # \param layer QgsVectorLayer, ignored if it is not connected
+    # \param features list of QgsFeature with their final ids
+    def setFeatures(self, layer, features):
+        if layer.id() not in self.layerIds:
+            return
+
+        maxValues = self.maxValues()
+        for feature in features:
+            self._setFeature(layer, feature.id(), self._attributes(feature))
+        self._emitIfChanged(maxValues)
+
+    ## \brief Calculate the numbers of one layer again
+    #
+    # Used after a rollback of the edit buffer and after bulk writes to the data provider.
+    #
+    # \param layer QgsVectorLayer, ignored if it is not connected
+    def reloadLayer(self, layer):
+        if layer.id() not in self.layerIds:
+            return
+
+        maxValues = self.maxValues()
+        for key in [key for key in self.features if key[0] == layer.id()]:
+            self._removeFeature(key)
+        self._loadLayer(layer)
+        self._emitIfChanged(maxValues)
+
+    ## \brief Largest number per field, 0 if there is none
+    #
+    # @returns dict fieldName -> int
+    def maxValues(self):
+        return {fieldName: self._max(fieldName) for fieldName in self.fieldNames}
+
+    def featureAdded(self, layer, fid):
+        maxValues = self.maxValues()
+        self._loadFeature(layer, fid)
+        self._emitIfChanged(maxValues)
+
+    def featuresDeleted(self, layer, fids):
+        maxValues = self.maxValues()
+        for fid in fids:
+            self._removeFeature((layer.id(), fid))
+        self._emitIfChanged(maxValues)
+
+    def attributeValueChanged(self, layer, fid, idx, value):
+        fieldName = layer.fields().at(idx).name()
+        if fieldName not in self.fieldNames:
+            return
+
+        maxValues = self.maxValues()
+        key = (layer.id(), fid)
+        if key not in self.features:
+            # z.B. über den Provider hinzugefügte Features
+            self._loadFeature(layer, fid)
+
+        values = self.features.get(key, {})
+        self._removeNumbers(fieldName, values.get(fieldName, []))
+        values[fieldName] = numbersInValue(value)
+        self._addNumbers(fieldName, values[fieldName])
+        self.features[key] = values
+        self._emitIfChanged(maxValues)
+
+    def committedFeaturesAdded(self, layer, features):
+        for feature in features:
+            self._setFeature(layer, feature.id(), self._attributes(feature))
+
+    ## \brief Remove the features with temporary ids of the edit buffer after commit
+    #
+    # The features are added again with their final ids in committedFeaturesAdded.
+    #
+    def removeTemporaryFeatures(self, layer):
+        maxValues = self.maxValues()
+        for key in [key for key in self.features if key[0] == layer.id() and key[1] < 0]:
+            self._removeFeature(key)
+        self._emitIfChanged(maxValues)
+
+    def _loadLayer(self, layer):
+        fieldNames = [fieldName for fieldName in self.fieldNames if layer.fields().indexFromName(fieldName) != -1]
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(fieldNames, layer.fields())
+        for feature in layer.getFeatures(request):
+            self._setFeature(layer, feature.id(), {fieldName: feature[fieldName] for fieldName in fieldNames})
+
+    def _loadFeature(self, layer, fid):
+        feature = layer.getFeature(fid)
+        if not feature.isValid():
+            return
+        self._setFeature(layer, fid, self._attributes(feature))
+
+    def _attributes(self, feature):
+        return {
+            fieldName: feature[fieldName] for fieldName in self.fieldNames if feature.fieldNameIndex(fieldName) != -1
+        }
+
+    def _setFeature(self, layer, fid, attributes):
+        key = (layer.id(), fid)
+        self._removeFeature(key)
+
+        values = {fieldName: numbersInValue(value) for fieldName, value in attributes.items()}
+        for fieldName, numbers in values.items():
+            self._addNumbers(fieldName, numbers)
+        self.features[key] = values
+
+    def _removeFeature(self, key):
+        for fieldName, numbers in self.features.pop(key, {}).items():
+            self._removeNumbers(fieldName, numbers)
+
+    def _addNumbers(self, fieldName, numbers):
+        counts = self.counts[fieldName]
+        for number in numbers:
+            if counts.get(number, 0) == 0:
+                heapq.heappush(self.heaps[fieldName], -number)
+            counts[number] = counts.get(number, 0) + 1
+
+    def _removeNumbers(self, fieldName, numbers):
+        counts = self.counts[fieldName]
+        for number in numbers:
+            counts[number] -= 1
+            if counts[number] == 0:
+                del counts[number]
+
+    def _max(self, fieldName):
+        heap = self.heaps[fieldName]
+        counts = self.counts[fieldName]
+        # nicht mehr vorhandene Nummern verwerfen
+        while heap and -heap[0] not in counts:
+            heapq.heappop(heap)
+        return max(-heap[0], 0) if heap else 0
+
+    def _emitIfChanged(self, maxValues):
+        newMaxValues = self.maxValues()
+        if newMaxValues != maxValues:
+            self.maxValuesChanged.emit(newMaxValues)
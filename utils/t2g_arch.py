@@ -25,6 +25,7 @@ import math
 import operator
 import os
 import uuid
+from functools import partial
 
 from qgis.PyQt.QtCore import QCoreApplication, QSettings, Qt, QTranslator, qVersion, QVariant
 from qgis.PyQt.QtGui import QIcon, QCursor
@@ -58,7 +59,7 @@ from qgis.gui import QgisInterface
 from qgis.utils import plugins, active_plugins
 
 from .functions import (
-    addPoint3D,
+    addPoints3D,
     delLayer,
     delSelectFeature,
     fileFunc,
@@ -68,12 +69,12 @@ from .functions import (
     getlayerSelectedFeatures,
     isNumber,
     makerAndRubberbands,
-    maxValue,
     progressBar,
     ProjectSaveFunc,
     setCustomProjectVariable,
 )
 from .identifygeometry import IdentifyGeometry
+from .max_numbers import MaxNumberTracker
 from .t2g_arch_dockwidget import T2GArchDockWidget
 from ..ExtDialoge.myDlgGeometryCheck import GeometryCheckDockWidget
 from ..ExtDialoge.myDlgRasterLayerView import RasterLayerViewDockWidget
@@ -90,7 +91,25 @@ FN_DEF_FOTOENTZERRPUNKT = "obj_typ"
 AW_FOTOENTZERRPUNKT = "Fotoentzerrpunkt"  # Entzerrpunkt-definition
 
 
+# Punktimport: Zeile einer csv-Datei "ptnr, x, y, z"
+def parseCsvPointLine(line):
+    lineList = line.split(",")
+    return lineList[0].strip(), float(lineList[1]), float(lineList[2]), float(lineList[3])
+
+
+# Punktimport: Zeile einer txt-Datei mit Spaltentrenner oder im festen Format der Vermessung
+def parseTxtPointLine(line, sep):
+    if sep != "V" and "." in line:
+        lineList = line.split(sep)
+    else:
+        lineList = [line[0:15], line[16:32], line[33:44], line[45:53]]
+    return lineList[0].lstrip(), float(lineList[1]), float(lineList[2]), float(lineList[3])
+
+
 class T2gArch:
+    # Anzahl Punkte je addFeatures-Aufruf beim Punktimport
+    importBatchSize = 1000
+
     def __del__(self):
         """
         use the following print message as indicator for success deleting T2gArch instance
@@ -211,6 +230,11 @@ class T2gArch:
             self.layerPoly.featureAdded.connect(self.eventFeatureAdded)
             self.layerPoint.featureAdded.connect(self.eventFeatureAdded)
 
+            # nächste freie Nummern
+            self.maxNumbers = MaxNumberTracker()
+            self.maxNumbers.maxValuesChanged.connect(self.setNextNumbers)
+            self.maxNumbers.connectLayers([self.layerLine, self.layerPoly, self.layerPoint])
+
             # ToDo: refactoring - Tab "Tools Allgemein"
             self.dockwidget.butObjFind.setIcon(QIcon(ICON_PATHS["suchen"]))
             self.dockwidget.butObjFind.clicked.connect(self.ozoom_1_ok)
@@ -247,7 +271,6 @@ class T2gArch:
             # ToDo: Refactoring - watch (autosave?) needed?
             # self.watch.timeout.connect(self.watchEvent)
             self.iface.projectRead.connect(self.eventReadProject)
-            self.__lastMaxNumber = []
             self.setup()
 
     def setup(self):
@@ -332,6 +355,7 @@ class T2gArch:
                 self.layerPoly.featureAdded.disconnect(self.eventFeatureAdded)
             if self.geoEdit:
                 self.geoEdit.disconnectSignals()
+            self.maxNumbers.disconnectLayers()
 
     def setupModules(self):
         # Messen
@@ -444,93 +468,26 @@ class T2gArch:
                 progress = progressBar("Fortschritt")
                 QCoreApplication.processEvents()
                 setCustomProjectVariable("maxWerteAktualisieren", False)
+                objCount = 0
 
                 if dateiFormat == ".csv":
                     QgsMessageLog.logMessage("Point import- read data from .csv", self.plugin_name_tag, Qgis.Info)
-                    with open(inputFile[0]) as file:
-                        lineCount = fileLineCount(inputFile[0])
-                        progress.setText(f"{lineCount} Punkte werden importiert")
-                        progress.setMaximum(lineCount)
-                        pointNumber = 0
-                        objCount = 0
-                        for line in file:
-                            progress.setValue(pointNumber)
-                            lineList = line.split(",")
-                            try:
-                                a = lineList[0].strip()
-                                b = lineList[1].strip()
-                                c = lineList[2].strip()
-                                d = lineList[3].strip()
-                                pt = QgsPoint(float(b), float(c), float(d))
-                                attL = {"pt_nr": a}
-                                addPoint3D(pointsLayer, pt, attL)
-                                objCount += 1
-                            except:
-                                QgsMessageLog.logMessage(
-                                    f"Point import: Could not read point in line {pointNumber}",
-                                    self.plugin_name_tag,
-                                    Qgis.Info,
-                                )
-                            pointNumber += 1
+                    objCount = self.importPointsFromFile(inputFile[0], parseCsvPointLine, pointsLayer, progress)
                 elif dateiFormat == ".txt":
                     QgsMessageLog.logMessage("Point import- read data from .txt", self.plugin_name_tag, Qgis.Info)
-                    with open(inputFile[0]) as file:
-                        lines = file.readlines()
-                        lineCount = len(lines)
-                        progress.setText(f"{lineCount} Punkte werden importiert")
-                        progress.setMaximum(lineCount)
-                        pointNumber = 0
-                        objCount = 0
-                        if "Komma" in inputFile[1]:
-                            sep = ","
-                        if "Tab" in inputFile[1]:
-                            sep = "\t"
-                        if "Vermessung" in inputFile[1]:
-                            sep = "V"
-                        for line in lines:
-                            progress.setValue(pointNumber)
-                            if sep != "V" and "." in line:
-                                if "." in line:
-                                    try:
-                                        a = str(line).split(sep)[0].lstrip()
-                                        b = str(line).split(sep)[1].lstrip()
-                                        c = str(line).split(sep)[2].lstrip()
-                                        d = str(line).split(sep)[3].lstrip()
-                                        pt = QgsPoint(float(b), float(c), float(d))
-                                        attL = {"pt_nr": a}
-                                        addPoint3D(pointsLayer, pt, attL)
-                                        objCount += 1
-                                    except:
-                                        QgsMessageLog.logMessage(
-                                            f"Point import: Could not read point in line {pointNumber}",
-                                            self.plugin_name_tag,
-                                            Qgis.Info,
-                                        )
-                                else:
-                                    self.iface.messageBar().pushMessage(
-                                        self.plugin_name_tag,
-                                        f"Fehler! Falscher Spaltentrenner oder vorhandene Kopfzeile in Zeile {pointNumber}.",
-                                        level=Qgis.Critical,
-                                    )
-                            else:
-                                try:
-                                    a = str(line)[0:15].lstrip()
-                                    b = str(line)[16:32].lstrip()
-                                    c = str(line)[33:44].lstrip()
-                                    d = str(line)[45:53].lstrip()
-                                    pt = QgsPoint(float(b), float(c), float(d))
-                                    attL = {"pt_nr": a}
-                                    addPoint3D(pointsLayer, pt, attL)
-                                    objCount += 1
-                                except:
-                                    QgsMessageLog.logMessage(
-                                        f"Point import: Could not read point in line {pointNumber}",
-                                        self.plugin_name_tag,
-                                        Qgis.Info,
-                                    )
-
-                            pointNumber += 1
+                    sep = "V"
+                    if "Komma" in inputFile[1]:
+                        sep = ","
+                    if "Tab" in inputFile[1]:
+                        sep = "\t"
+                    if "Vermessung" in inputFile[1]:
+                        sep = "V"
+                    objCount = self.importPointsFromFile(
+                        inputFile[0], partial(parseTxtPointLine, sep=sep), pointsLayer, progress
+                    )
                 setCustomProjectVariable("maxWerteAktualisieren", True)
+                # am Provider vorbei geschrieben, die nächsten Nummern nachführen
+                MaxNumberTracker.layerChanged(pointsLayer)
 
                 if objCount > 0:
                     self.iface.messageBar().pushMessage(
@@ -541,6 +498,43 @@ class T2gArch:
                         self.plugin_name_tag, "Keine Punkte eingetragen.", level=Qgis.Critical
                     )
 
+    ## \brief Import the points of a file into the layer E_Point
+    #
+    # The file is read line by line, the points are written in batches of importBatchSize
+    # features with one addFeatures call each.
+    #
+    # \param parseLine function line -> (pt_nr, x, y, z)
+    # @returns number of imported points
+    def importPointsFromFile(self, path, parseLine, pointsLayer, progress):
+        lineCount = fileLineCount(path)
+        progress.setText(f"{lineCount} Punkte werden importiert")
+        progress.setMaximum(lineCount)
+
+        objCount = 0
+        batch = []
+        with open(path) as file:
+            for pointNumber, line in enumerate(file):
+                try:
+                    ptnr, x, y, z = parseLine(line)
+                    batch.append((QgsPoint(x, y, z), {"pt_nr": ptnr}))
+                except (ValueError, IndexError):
+                    QgsMessageLog.logMessage(
+                        f"Point import: Could not read point in line {pointNumber}",
+                        self.plugin_name_tag,
+                        Qgis.Info,
+                    )
+
+                if len(batch) >= self.importBatchSize:
+                    objCount += addPoints3D(pointsLayer, batch)
+                    batch = []
+                    progress.setValue(pointNumber)
+                    QCoreApplication.processEvents()
+
+        objCount += addPoints3D(pointsLayer, batch)
+        progress.setValue(lineCount)
+
+        return objCount
+
     def exportPoints(self):
         exportPath = self.config.getValue("Punkte Export", "pfad Exportordner", "./../Jobs")
         # Should be: layer "Messpunkte" or layer 'E_Point'
@@ -876,16 +870,9 @@ class T2gArch:
         # self.valueTemp1 = int(getCustomProjectVariable('nextBefNr'))
         # setCustomProjectVariable('maxWerteAktualisieren', 'False')
         QgsMessageLog.logMessage("Beginne Änderung", self.plugin_name_tag, Qgis.Info)
-        self.__lastMaxNumber = []
-        self.__lastMaxNumber.append(self.measurementTab.txtNextBef.text())
-        self.__lastMaxNumber.append(self.measurementTab.txtNextFund.text())
-        self.__lastMaxNumber.append(self.measurementTab.txtNextProf.text())
-        self.__lastMaxNumber.append(self.measurementTab.txtNextProb.text())
 
     def __eventFeaturesDeleted(self, fid):
-        setCustomProjectVariable("maxWerteAktualisieren", True)
-        self.getMaxValues()
-        setCustomProjectVariable("maxWerteAktualisieren", False)
+        # die nächsten Nummern aktualisiert der MaxNumberTracker
         self.iface.mapCanvas().refreshAllLayers()
 
     def eventAttributeValueChanged(self, fid, idx, value, lyr):
@@ -896,27 +883,7 @@ class T2gArch:
             self.plugin_name_tag,
             Qgis.Info,
         )
-        if isNumber(str(value)):
-            if field.name() == "bef_nr":
-                if int(value) >= int(self.__lastMaxNumber[0]):
-                    self.measurementTab.txtNextBef.setText(str(int(value) + 1))
-                else:
-                    self.dockwidget.txtNextBef.setText(str(self.__lastMaxNumber[0]))
-            elif field.name() == "fund_nr":
-                if int(value) >= int(self.__lastMaxNumber[1]):
-                    self.measurementTab.txtNextFund.setText(str(int(value) + 1))
-                else:
-                    self.measurementTab.txtNextFund.setText(str(self.__lastMaxNumber[1]))
-            elif field.name() == "prof_nr":
-                if int(value) >= int(self.__lastMaxNumber[2]):
-                    self.measurementTab.txtNextProf.setText(str(int(value) + 1))
-                else:
-                    self.dockwidget.txtNextProf.setText(str(self.__lastMaxNumber[2]))
-            elif field.name() == "prob_nr":
-                if int(value) >= int(self.__lastMaxNumber[3]):
-                    self.measurementTab.txtNextProb.setText(str(int(value) + 1))
-                else:
-                    self.measurementTab.txtNextProb.setText(str(self.__lastMaxNumber[3]))
+        # die nächsten Nummern aktualisiert der MaxNumberTracker
 
     def filterGesetzt(self):
         # QgsMessageLog.logMessage('filter gesetzt', 'T2G Archäologie', Qgis.Info)
@@ -1259,51 +1226,8 @@ class T2gArch:
     # ToDo: refactoring - increments values in measurement tab
     def getMaxValues(self):
         if getCustomProjectVariable("maxWerteAktualisieren") == True:
-            layerLine = QgsProject.instance().mapLayersByName("E_Line")[0]
-            layerPoly = QgsProject.instance().mapLayersByName("E_Polygon")[0]
-            layerPoint = QgsProject.instance().mapLayersByName("E_Point")[0]
-            layerlist = [layerLine, layerPoly, layerPoint]
-
-            BefNrMax = 0
-            FundNrMax = 0
-            ProfNrMax = 0
-            ProbNrMax = 0
-
-            for layer in layerlist:
-                if len([feat["bef_nr"] for feat in layer.getFeatures()]) > 0:
-                    max1 = maxValue(layer, "bef_nr")
-                    # QgsMessageLog.logMessage(str(max1), 'T2G Archäologie', Qgis.Info)
-                    if BefNrMax < max1:
-                        BefNrMax = max1
-                if len([feat["fund_nr"] for feat in layer.getFeatures()]) > 0:
-                    max2 = maxValue(layer, "fund_nr")
-                    if FundNrMax < max2:
-                        FundNrMax = max2
-                try:
-                    if len([feat["prob_nr"] for feat in layer.getFeatures()]) > 0:
-                        max3 = maxValue(layer, "prob_nr")
-                        if ProbNrMax < max3:
-                            ProbNrMax = max3
-                except Exception as e:
-                    QgsMessageLog.logMessage(str(e), self.plugin_name_tag, Qgis.Info)
-
-                try:
-                    if len([feat["prof_nr"] for feat in layer.getFeatures()]) > 0:
-                        max4 = maxValue(layer, "prof_nr")
-                        if ProfNrMax < max4:
-                            ProfNrMax = max4
-                except Exception as e:
-                    QgsMessageLog.logMessage(str(e), self.plugin_name_tag, Qgis.Info)
-
-                self.measurementTab.txtNextBef.setText(str(BefNrMax + 1))
-                self.measurementTab.txtNextFund.setText(str(FundNrMax + 1))
-                self.measurementTab.txtNextProf.setText(str(ProfNrMax + 1))
-                self.measurementTab.txtNextProb.setText(str(ProbNrMax + 1))
-
-                setCustomProjectVariable("nextBefNr", str(BefNrMax + 1))
-                setCustomProjectVariable("nextProfNr", str(ProfNrMax + 1))
-                setCustomProjectVariable("nextFundNr", str(FundNrMax + 1))
-                setCustomProjectVariable("nextProbNr", str(ProbNrMax + 1))
+            # vollständige Berechnung, danach hält der MaxNumberTracker die Werte aktuell
+            self.maxNumbers.rebuild()
 
             self.iface.messageBar().pushMessage(
                 self.plugin_name_tag, "Nächste zu vergebende Nummern wurden aktuallisiert.", level=Qgis.Info
@@ -1311,6 +1235,17 @@ class T2gArch:
             setCustomProjectVariable("maxWerteAktualisieren", False)
             # self.autoNummer()
 
+    def setNextNumbers(self, maxValues):
+        self.measurementTab.txtNextBef.setText(str(maxValues["bef_nr"] + 1))
+        self.measurementTab.txtNextFund.setText(str(maxValues["fund_nr"] + 1))
+        self.measurementTab.txtNextProf.setText(str(maxValues["prof_nr"] + 1))
+        self.measurementTab.txtNextProb.setText(str(maxValues["prob_nr"] + 1))
+
+        setCustomProjectVariable("nextBefNr", str(maxValues["bef_nr"] + 1))
+        setCustomProjectVariable("nextProfNr", str(maxValues["prof_nr"] + 1))
+        setCustomProjectVariable("nextFundNr", str(maxValues["fund_nr"] + 1))
+        setCustomProjectVariable("nextProbNr", str(maxValues["prob_nr"] + 1))
+
     # ToDo: Refactoring, "Befundnummer setzen" in "Tools Allgemein"
     def setBefundLabel_n(self):
         pass